@@ -0,0 +1,247 @@
+import csv
+import io
+
+from django.conf import settings
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models import Case, CharField, F, TextField, Value, When
+from django.db.models.functions import NullIf
+from django.http import StreamingHttpResponse
+
+from . import enrollment, exports, imports, pipeline, versioning
+from .models import Class, Student
+
+# Bulk CSV I/O. On PostgreSQL exports run as COPY (<query>) TO STDOUT and the
+# student import stages the upload with COPY ... FROM STDIN, so no row passes
+# through Python. Exports use COPY only with psycopg 3, whose copy() yields
+# blocks as the server sends them; psycopg2's copy_expert returns when the
+# whole COPY is done, so there exports stream from a server-side cursor
+# instead. Other databases (SQLite locally) take the streaming Python
+# path (apps.api.imports), as do an import with rows to reject and any upload
+# COPY cannot read as is (XLSX, JSON, template headers). Cells
+# are rendered the same way on both sides (csv_values: booleans as True/False,
+# empty text as an empty field, ISO dates) and both use the csv module's
+# quoting with "\r\n" line endings (crlf_lines converts COPY's "\n"), so the
+# files are identical.
+
+
+def use_copy(conn=None):
+    return settings.BULK_COPY and (conn or connection).vendor == 'postgresql'
+
+
+def copy_streams(conn=None):
+    """COPY TO STDOUT reaches the client block by block (psycopg 3, not psycopg2)."""
+    return use_copy(conn) and (conn or connection).Database.__name__ == 'psycopg'
+
+
+# -- export -----------------------------------------------------------------
+
+def csv_values(queryset, fields):
+    """``values_list`` over ``fields`` with each cell rendered as the CSV shows it."""
+    meta = queryset.model._meta
+    annotations = {}
+    for i, name in enumerate(fields):
+        field = meta.get_field(name)
+        if isinstance(field, models.BooleanField):
+            expression = Case(When(**{name: True}, then=Value('True')), When(**{name: False}, then=Value('False')),
+                              default=None, output_field=CharField())
+        elif isinstance(field, (models.CharField, models.TextField)):
+            # COPY quotes '' to tell it from NULL; the csv module writes both as an empty field
+            expression = NullIf(F(name), Value(''), output_field=TextField())
+        else:
+            expression = F(name)
+        annotations[f'csv_{i}'] = expression
+    return queryset.annotate(**annotations).values_list(*annotations)
+
+
+def _header(header):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\r\n').writerow(header)
+    return buffer.getvalue().encode('utf-8')
+
+
+def crlf_lines(blocks):
+    """COPY's "\n" line ends as "\r\n"; a newline inside a quoted field is data and stays.
+
+    Quotes are counted across blocks: a block may end inside a quoted field.
+    An escaped quote ("") toggles twice, so it never changes the state.
+    """
+    quoted = False
+    for block in blocks:
+        parts = bytes(block).split(b'"')
+        for i in range(1 if quoted else 0, len(parts), 2):
+            parts[i] = parts[i].replace(b'\n', b'\r\n')
+        quoted ^= len(parts) % 2 == 0
+        yield b'"'.join(parts)
+
+
+def copy_chunks(queryset, header):
+    """Yield the CSV for ``queryset`` (from csv_values) as produced by COPY TO STDOUT (psycopg 3)."""
+    yield _header(header)
+    sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL datestyle TO 'ISO, YMD'")
+        statement = 'COPY (%s) TO STDOUT WITH (FORMAT csv)' % connection.ops.compose_sql(sql, params)
+        with cursor.cursor.copy(statement) as copy:
+            yield from crlf_lines(copy)
+
+
+def csv_stream(header, queryset, fields):
+    """The CSV of ``fields`` of ``queryset`` as UTF-8 chunks (COPY on PostgreSQL with psycopg 3)."""
+    rows = csv_values(queryset, fields)
+    if copy_streams():
+        return copy_chunks(rows, header)
+    chunks = exports.csv_chunks(header, rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+    return (chunk.encode('utf-8') for chunk in chunks)
+
+
+def export_csv(filename, header, queryset, fields):
+    """Streaming CSV download of ``fields`` of ``queryset``."""
+    response = StreamingHttpResponse(csv_stream(header, queryset, fields), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class CsvExportMixin:
+    """CSV export of ``export_queryset(params)``; ``export_columns`` are (header, model field) pairs.
+
+    ``export_filters`` names the parameters export_queryset reads (export jobs
+    keep only those).
+    """
+
+    export_filename = 'export.csv'
+    export_columns = []
+    export_filters = ()
+
+    def export_queryset(self, params):
+        return self.get_queryset()
+
+    def export_response(self, params):
+        header, fields = zip(*self.export_columns)
+        return export_csv(self.export_filename, list(header), self.export_queryset(params), list(fields))
+
+
+# -- student import ---------------------------------------------------------
+
+def student_stage_sql(header):
+    """(create staging table, expressions per students column) for a CSV ``header``.
+
+    Mirrors pipeline.STUDENTS: cells are stripped, a missing column is NULL
+    (is_active: true), empty optional fields become NULL, and with FORMAT csv
+    an unquoted empty field arrives as NULL where the csv module reads ''.
+    """
+    qn = connection.ops.quote_name
+    stage = [f'c{i}' for i in range(len(header))]
+    # DictReader keeps the last of duplicated header names
+    position = {name: f'c{i}' for i, name in enumerate(header)}
+    create = 'CREATE TEMPORARY TABLE import_students_stage (%s) ON COMMIT DROP' % ', '.join(
+        f'{column} text' for column in stage)
+
+    def col(name, required=False):
+        if name not in position:
+            return 'NULL'
+        return f"btrim(COALESCE({position[name]}, ''))" if required else f"NULLIF(btrim({position[name]}), '')"
+
+    is_active = (f"lower(btrim(COALESCE({position['is_active']}, ''))) = 'true'" if 'is_active' in position
+                 else 'TRUE')
+    columns = {
+        qn('id'): 'gen_random_uuid()',
+        qn('student_code'): col('student_code', required=True),
+        qn('full_name'): col('full_name', required=True),
+        qn('email'): col('email'),
+        qn('class_id'): '%s::uuid' % col('class_id'),
+        qn('phone'): col('phone'),
+        qn('is_active'): is_active,
+    }
+    return create, columns
+
+
+def student_stage_checks(columns):
+    """SQL conditions under which a staged row fails pipeline.STUDENTS validation."""
+    qn = connection.ops.quote_name
+    code, name, email, class_id, phone = (columns[qn(c)] for c in ('student_code', 'full_name', 'email',
+                                                                   'class_id', 'phone'))
+    return [
+        f"{code} = ''", f"{name} = ''",
+        f'length({code}) > 64', f'length({name}) > 255',
+        f'COALESCE(length({email}), 0) > 254', f'COALESCE(length({phone}), 0) > 32',
+        f'({class_id}) IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {qn(Class._meta.db_table)} c '
+        f'WHERE c.{qn("id")} = {class_id})',
+    ]
+
+
+# Headers the staging table understands; others (the Excel templates' names,
+# gender, date_of_birth) take the per-row path
+COPY_COLUMNS = {'student_code', 'full_name', 'email', 'class_id', 'phone', 'is_active'}
+
+
+def _import_students_copy(file):
+    """Import through a COPY staging table; None when rows need the per-row path.
+
+    That is the case when a row is invalid or a class would overflow, and
+    when the header is not made of COPY_COLUMNS alone: nothing is inserted and
+    the caller reruns the file through imports.StudentSink, which reports and
+    skips exactly those rows (or the missing columns).
+    """
+    header_line = file.readline().decode('utf-8')
+    header = next(csv.reader([header_line]), [])
+    if not header:
+        return imports.ImportReport()
+    if not set(header) <= COPY_COLUMNS or not {'student_code', 'full_name'} <= set(header):
+        return None
+    create, columns = student_stage_sql(header)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(create)
+        statement = 'COPY import_students_stage FROM STDIN WITH (FORMAT csv)'
+        if hasattr(cursor.cursor, 'copy_expert'):
+            cursor.copy_expert(statement, file)
+        else:
+            with cursor.cursor.copy(statement) as copy:
+                while chunk := file.read(64 * 1024):
+                    copy.write(chunk)
+        cursor.execute('SELECT count(*), count(*) FILTER (WHERE %s) FROM import_students_stage' % ' OR '.join(
+            f'({check})' for check in student_stage_checks(columns)))
+        staged, invalid = cursor.fetchone()
+        if invalid:
+            return None
+        # Rows whose code already exists are skipped by the insert and take no place
+        cursor.execute('SELECT %s, count(*) FROM import_students_stage WHERE %s AND NOT EXISTS '
+                       '(SELECT 1 FROM %s s WHERE s.%s = %s) GROUP BY 1' % (
+                           columns[qn('class_id')], columns[qn('is_active')], qn(Student._meta.db_table),
+                           qn('student_code'), columns[qn('student_code')]))
+        if enrollment.over_capacity({class_id: n for class_id, n in cursor.fetchall() if class_id}):
+            return None
+        # search_text is filled by the students_search_text trigger (apps.api.search)
+        cursor.execute('INSERT INTO %s (%s) SELECT %s FROM import_students_stage ON CONFLICT DO NOTHING' % (
+            qn(Student._meta.db_table), ', '.join(columns), ', '.join(columns.values())))
+        report = imports.ImportReport()
+        report.created = cursor.rowcount
+        report.skipped = staged - cursor.rowcount
+    return report
+
+
+def import_students(file, mode='insert'):
+    """Import a students upload (CSV, XLSX or JSON); returns an imports.ImportReport.
+
+    ``mode`` is one of imports.MODES. Only CSV inserts try COPY; upserts take
+    the per-row path, which compares rows with the stored ones and leaves
+    unchanged rows alone.
+
+    Raises MissingColumns (nothing imported) when the header lacks a required
+    column, UnicodeDecodeError when the file is not UTF-8 and
+    pipeline.InvalidFile when it cannot be read at all.
+    """
+    if mode == 'insert' and use_copy() and pipeline.source_class(file.name) is pipeline.CsvSource:
+        report = None
+        try:
+            with transaction.atomic():
+                report = _import_students_copy(file)
+        except DatabaseError:
+            # Rows COPY rejects (ragged rows, bad uuids): take the per-row path
+            pass
+        if report is not None:
+            if report.created:
+                versioning.touched('students')  # no post_save either way
+            return report
+        file.seek(0)
+    return imports.import_file(file, imports.StudentSink(mode))
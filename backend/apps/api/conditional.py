@@ -0,0 +1,110 @@
+import hashlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+from . import versioning
+from .expand import parse_expand
+from .principal import get_principal
+
+# Conditional GET for viewsets. The ETag is derived from the per-table version
+# counters (apps.api.versioning: one small query, shared by every worker and
+# bumped by database triggers, so writes that bypass Django count), the request (action, pk, query string, Accept)
+# and the caller's scope, so a matching If-None-Match is answered with 304
+# before the queryset is touched or anything is serialized.
+
+
+class NotModified(Exception):
+    def __init__(self, headers):
+        super().__init__('Not modified')
+        self.headers = headers
+
+
+def _matches(header, etag):
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ConditionalGetMixin:
+    """Strong ETag / Last-Modified validators for the actions in ``conditional_actions``.
+
+    ``etag_tables`` lists the tables the actions read; tables behind
+    ``?expand=`` relations are added automatically.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+    etag_tables = ()
+
+    def get_etag_tables(self):
+        tables = list(self.etag_tables)
+        pending = [(getattr(self, 'expand_relations', {}), parse_expand(self.request.query_params.get('expand')))]
+        while pending:
+            relations, tree = pending.pop()
+            for name, subtree in tree.items():
+                relation = relations.get(name)
+                if relation is not None:
+                    tables.append(relation.target.model._meta.db_table)
+                    pending.append((relation.target.relations, subtree))
+        return sorted(set(tables))
+
+    def get_table_state(self, tables):
+        """(versions, last modified) of ``tables``, read once per request."""
+        tables = tuple(tables)
+        state = getattr(self, '_table_state', None)
+        if state is None or state[0] != tables:
+            state = self._table_state = (tables, *versioning.state(*tables))
+        return state[1:]
+
+    def get_etag_variant(self):
+        """Extra input the representation depends on besides tables and request (e.g. today's date)."""
+        return ''
+
+    def get_etag(self, request, tables, versions):
+        principal = get_principal(request)
+        parts = [
+            type(self).__name__, self.action, repr(sorted(self.kwargs.items())),
+            repr(sorted(request.query_params.lists())), request.META.get('HTTP_ACCEPT', ''),
+            repr((principal.role, principal.sub, principal.email, principal.profile_id)),
+            repr(list(zip(tables, versions))), self.get_etag_variant(),
+        ]
+        return '"%s"' % hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        tables = self.get_etag_tables()
+        versions, modified = self.get_table_state(tables)
+        # Browsers keep the body and revalidate every poll (If-None-Match -> 304)
+        headers = {'ETag': self.get_etag(request, tables, versions), 'Cache-Control': 'private, no-cache'}
+        if modified is not None:
+            headers['Last-Modified'] = http_date(modified)
+        self._validators = headers
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            if _matches(if_none_match, headers['ETag']):
+                raise NotModified(headers)
+            return
+        since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+        if since is not None and modified is not None and int(modified) <= since:
+            raise NotModified(headers)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=304, headers=exc.headers)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code in (200, 304):
+            for name, value in validators.items():
+                response.setdefault(name, value)
+            patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,74 @@
+import uuid
+from collections import Counter
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Attendance, Class, Student
+
+# Per-class enrolment and attendance-of-the-day figures. Each figure is a
+# correlated COUNT subquery on an indexed (class_id[, date]) lookup, so a page
+# of classes comes back with its counts in one statement, without the row
+# blow-up of joining students and attendance at once.
+
+STATUSES = ('present', 'absent', 'late', 'excused')
+
+
+def _count(queryset):
+    grouped = queryset.order_by().values('class_fk').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(grouped, output_field=IntegerField()), 0)
+
+
+def annotate_counts(queryset, day=None, attendance=True):
+    """Annotate classes with ``student_count`` (active students) and ``<status>_today``."""
+    annotations = {'student_count': _count(Student.objects.filter(class_fk=OuterRef('pk'), is_active=True))}
+    if attendance:
+        today = Attendance.objects.filter(class_fk=OuterRef('pk'), date=day or timezone.localdate())
+        for status in STATUSES:
+            annotations[f'{status}_today'] = _count(today.filter(status=status))
+    return queryset.annotate(**annotations)
+
+
+def present(cls, day):
+    """The ``counts`` block for a class annotated by ``annotate_counts(..., day)``."""
+    counts = {
+        'students': cls.student_count,
+        'available': None if cls.max_students is None else max(cls.max_students - cls.student_count, 0),
+    }
+    if hasattr(cls, 'present_today'):
+        counts['attendance_today'] = {'date': day.isoformat(),
+                                      **{status: getattr(cls, f'{status}_today') for status in STATUSES}}
+    return counts
+
+
+def _canonical(class_id):
+    try:
+        return str(uuid.UUID(str(class_id)))
+    except ValueError:
+        return None
+
+
+def over_capacity(additions):
+    """Classes that cannot take ``additions`` ({class_id: new active students}).
+
+    Returns [{'class_id', 'max_students', 'enrolled', 'adding'}] for each class
+    whose active enrolment would exceed ``max_students``.
+    """
+    wanted = Counter()
+    for class_id, count in additions.items():
+        if count and _canonical(class_id):
+            wanted[_canonical(class_id)] += count
+    additions = wanted
+    if not additions:
+        return []
+    rows = (annotate_counts(Class.objects.filter(pk__in=list(additions), max_students__isnull=False),
+                            attendance=False)
+            .values('pk', 'max_students', 'student_count'))
+    full = []
+    for row in rows:
+        adding = additions[str(row['pk'])]
+        if row['student_count'] + adding > row['max_students']:
+            full.append({'class_id': str(row['pk']), 'max_students': row['max_students'],
+                         'enrolled': row['student_count'], 'adding': adding})
+    return full
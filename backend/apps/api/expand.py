@@ -0,0 +1,118 @@
+from apps.core_app.models import Profile
+from .models import Class, Student
+
+# ?expand= support shared by the viewsets. Relations are declared once below;
+# a request such as ?expand=student.class,class.teacher is resolved level by
+# level with at most one IN (...) query per relation, and rows already fetched
+# for another path (class vs student.class) are reused instead of re-queried.
+
+
+class Expandable:
+    """A model exposed through ``?expand=``: the columns it shows and its own relations."""
+
+    def __init__(self, model, fields, relations=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.relations = relations or {}
+
+    @property
+    def columns(self):
+        # Relation keys are always fetched so cached rows serve every nested path
+        keys = [relation.key for relation in self.relations.values()]
+        return list(dict.fromkeys(self.fields + tuple(keys)))
+
+    def fetch(self, ids, fetched):
+        """Rows for ``ids`` (str primary keys) by id, querying only ids not yet in ``fetched``."""
+        known = fetched.setdefault(self, {})
+        missing = ids - known.keys()
+        if missing:
+            for row in self.model.objects.filter(pk__in=missing).values(*self.columns):
+                known[str(row['id'])] = row
+            for pk in missing:
+                known.setdefault(pk, None)
+        return {pk: known[pk] for pk in ids if known[pk] is not None}
+
+    def present(self, row):
+        return {name: row[name] for name in self.fields}
+
+
+class Relation:
+    """To-one link: ``key`` holds the id of a ``target`` row."""
+
+    def __init__(self, key, target):
+        self.key = key
+        self.target = target
+
+
+TEACHER = Expandable(Profile, ('id', 'email', 'full_name'))
+CLASS = Expandable(Class, ('id', 'name', 'grade'), {'teacher': Relation('teacher_id', TEACHER)})
+STUDENT = Expandable(Student, ('id', 'full_name', 'student_code', 'email'),
+                     {'class': Relation('class_fk_id', CLASS)})
+
+
+def parse_expand(value):
+    """``'student.class,class'`` -> ``{'student': {'class': {}}, 'class': {}}``."""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if not name:
+                break
+            node = node.setdefault(name, {})
+    return tree
+
+
+def expand(items, relations, tree, fetched=None):
+    """Attach expanded relations to serialized ``items`` in place."""
+    _attach([(item, item) for item in items], relations, tree, {} if fetched is None else fetched)
+
+
+def _attach(pairs, relations, tree, fetched):
+    # pairs: (row holding the relation keys, dict receiving the expansion)
+    for name, subtree in tree.items():
+        relation = relations.get(name)
+        if relation is None:
+            continue
+        target = relation.target
+        ids = {str(source[relation.key]) for source, _ in pairs if source.get(relation.key)}
+        rows = target.fetch(ids, fetched) if ids else {}
+        built = {pk: target.present(row) for pk, row in rows.items()}
+        if subtree and rows:
+            _attach([(rows[pk], built[pk]) for pk in rows], target.relations, subtree, fetched)
+        for source, dest in pairs:
+            key = source.get(relation.key)
+            dest[name] = built.get(str(key)) if key else None
+
+
+class ExpandMixin:
+    """Resolve ``?expand=`` on read actions from the viewset's ``expand_relations``."""
+
+    expand_query_param = 'expand'
+    expand_relations = {}
+
+    @property
+    def expand_requires(self):
+        # Serialized fields the expansions read (kept by sparse fieldsets)
+        return {name: relation.key for name, relation in self.expand_relations.items()}
+
+    def list(self, request, *args, **kwargs):
+        return self.expand_response(super().list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.expand_response(super().retrieve(request, *args, **kwargs))
+
+    def expand_response(self, response):
+        tree = parse_expand(self.request.query_params.get(self.expand_query_param))
+        if not tree or response.status_code != 200:
+            return response
+        data = response.data
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            items = data['results']
+        elif isinstance(data, list):
+            items = data
+        elif isinstance(data, dict):
+            items = [data]
+        else:
+            return response
+        expand(items, self.expand_relations, tree)
+        return response
@@ -0,0 +1,28 @@
+import csv
+import io
+
+from django.conf import settings
+
+# Streaming CSV exports: rows come from QuerySet.iterator(chunk_size=...)
+# (a server-side cursor on PostgreSQL) and leave as CSV text one chunk at a
+# time, so worker memory does not grow with the export and the first bytes
+# are sent before the last rows are read. Lines end in "\r\n" like the csv
+# module's default (apps.api.bulkio makes COPY's output match).
+
+
+def csv_chunks(header, rows, chunk_size=None):
+    """Yield CSV text for ``header`` and ``rows``, ``chunk_size`` rows per piece."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\r\n')
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
@@ -0,0 +1,149 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Read-only fast path: serialize QuerySet.values() rows with one precompiled
+# converter per field instead of building model instances and calling every
+# DRF field's to_representation. Output matches the ModelSerializer exactly.
+
+# to_representation implementations that are the identity for values the
+# database driver returns (str, bool, int)
+_PASSTHROUGH = (
+    serializers.CharField.to_representation,
+    serializers.BooleanField.to_representation,
+    serializers.IntegerField.to_representation,
+)
+
+
+def _uuid(value):
+    return str(value)
+
+
+def _date(value):
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _datetime(field):
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def convert(value):
+        if isinstance(value, str):
+            return value
+        if tz is not None and value.tzinfo is not None:
+            value = value.astimezone(tz)
+        else:
+            # Naive input or naive output: defer to DRF (make_aware / make_naive)
+            value = field.enforce_timezone(value)
+        text = value.isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return text
+    return convert
+
+
+def _is_iso(field, default):
+    output_format = getattr(field, 'format', default)
+    return output_format is not None and output_format.lower() == ISO_8601
+
+
+def _converter(field):
+    """(kind, converter) for a serializer field, or None if it needs the full serializer."""
+    if isinstance(field, serializers.UUIDField):
+        return ('value', _uuid) if field.uuid_format == 'hex_verbose' else None
+    if isinstance(field, serializers.DateTimeField):
+        # Bound per call: the current time zone may differ between requests
+        return ('factory', _datetime) if _is_iso(field, api_settings.DATETIME_FORMAT) else None
+    if isinstance(field, serializers.DateField):
+        return ('value', _date) if _is_iso(field, api_settings.DATE_FORMAT) else None
+    if type(field).to_representation in _PASSTHROUGH:
+        return ('value', None)
+    return None
+
+
+class ValuesSerializer:
+    """Serialize ``values()`` dicts the way ``serializer_class(many=True)`` would.
+
+    Build with ``ValuesSerializer.for_serializer``, which returns None when a
+    field cannot be served from plain column values (computed or nested fields,
+    custom formats); callers then use the regular serializer.
+    """
+
+    def __init__(self, plan):
+        # [(output name, column attname, kind, converter, serializer field)]
+        self.plan = plan
+        self.columns = list(dict.fromkeys(column for _, column, _, _, _ in plan))
+
+    @classmethod
+    def for_serializer(cls, serializer_class, fields=None):
+        return _compile(serializer_class, tuple(fields) if fields is not None else None)
+
+    def values(self, queryset, extra=()):
+        """``queryset.values()`` over the columns this serializer reads plus ``extra`` attnames."""
+        return queryset.values(*dict.fromkeys(self.columns + list(extra)))
+
+    def serialize(self, rows):
+        steps = []
+        for name, column, kind, converter, field in self.plan:
+            steps.append((name, column, converter(field) if kind == 'factory' else converter))
+        out = []
+        for row in rows:
+            item = {}
+            for name, column, convert in steps:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            out.append(item)
+        return out
+
+
+@lru_cache(maxsize=None)
+def _compile(serializer_class, fields):
+    serializer = serializer_class()
+    attnames = {}
+    for field in serializer.Meta.model._meta.concrete_fields:
+        attnames[field.name] = field.attname
+        attnames[field.attname] = field.attname
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only or (fields is not None and name not in fields):
+            continue
+        compiled = _converter(field)
+        if compiled is None or field.source not in attnames:
+            return None
+        plan.append((name, attnames[field.source], compiled[0], compiled[1], field))
+    return ValuesSerializer(plan)
+
+
+def order_columns(queryset, names=()):
+    """Attnames of the ordering columns of ``queryset`` (and ``names``), which paginators read from rows."""
+    meta = queryset.model._meta
+    concrete = {field.name: field.attname for field in meta.concrete_fields}
+    concrete['pk'] = meta.pk.attname
+    terms = list(names) + list(queryset.query.order_by or meta.ordering) + ['pk']
+    return [concrete[t.lstrip('-')] for t in terms if isinstance(t, str) and t.lstrip('-') in concrete]
+
+
+class FastListMixin:
+    """Serve ``list`` from ``values()`` rows whenever the serializer allows it."""
+
+    fast_list = True
+
+    def get_values_serializer(self):
+        if not self.fast_list:
+            return None
+        fields = self.get_sparse_fields() if hasattr(self, 'get_sparse_fields') else None
+        return ValuesSerializer.for_serializer(self.get_serializer_class(), fields)
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_values_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = fast.values(queryset, order_columns(queryset, getattr(self, 'keyset_ordering', None) or ()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(rows))
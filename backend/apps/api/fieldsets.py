@@ -0,0 +1,101 @@
+from rest_framework.exceptions import ValidationError
+
+# Sparse fieldsets: ?fields=id,student_code,full_name keeps only those keys,
+# ?omit=address,notes drops keys. Read actions also narrow the SELECT with
+# .only() so unused (often TEXT) columns are never fetched.
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer accepting ``fields=[...]`` to keep only the named fields."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Apply ``?fields=`` / ``?omit=`` to read actions of a viewset.
+
+    ``expand_requires`` maps an ``?expand=`` name to the serializer field the
+    expansion reads, so it stays in the projection when expanded.
+    """
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    sparse_actions = ('list', 'retrieve')
+    expand_requires = {}
+
+    def get_sparse_fields(self, serializer_class=None):
+        """Serializer field names to emit, or None for the full representation."""
+        serializer_class = serializer_class or self.get_serializer_class()
+        cache = self.__dict__.setdefault('_sparse_fields', {})
+        if serializer_class not in cache:
+            cache[serializer_class] = self._select_fields(serializer_class)
+        return cache[serializer_class]
+
+    def _select_fields(self, serializer_class):
+        params = self.request.query_params
+        wanted = parse_field_list(params.get(self.fields_query_param))
+        omitted = parse_field_list(params.get(self.omit_query_param))
+        if not wanted and not omitted:
+            return None
+        available = list(serializer_class().fields)
+        unknown = [name for name in wanted + omitted if name not in available]
+        if unknown:
+            raise ValidationError({'fields': [f'Trường không hợp lệ: {", ".join(unknown)}']})
+        selected = set(wanted or available) - set(omitted)
+        for path in parse_field_list(params.get('expand')):
+            name = path.split('.')[0]
+            if name in self.expand_requires:
+                selected.add(self.expand_requires[name])
+        if selected == set(available):
+            return None
+        return [name for name in available if name in selected]
+
+    def sparse_queryset(self, queryset, fields, serializer_class=None):
+        """Restrict ``queryset`` to the columns behind ``fields`` (plus keys the view needs)."""
+        if fields is None:
+            return queryset
+        model = queryset.model
+        concrete = {}
+        for field in model._meta.concrete_fields:
+            concrete[field.name] = field.name
+            concrete[field.attname] = field.name
+        serializer_fields = (serializer_class or self.get_serializer_class())().fields
+        columns = {model._meta.pk.name}
+        for name in fields:
+            source = serializer_fields[name].source
+            if source not in concrete:
+                # Computed or nested source: cannot tell which columns it reads
+                return queryset
+            columns.add(concrete[source])
+        # Ordering and keyset cursors read these attributes from every row
+        ordering = list(getattr(self, 'keyset_ordering', None) or []) + list(getattr(self, 'ordering', None) or [])
+        ordering += parse_field_list(self.request.query_params.get('ordering'))
+        for term in ordering:
+            name = term.lstrip('-')
+            if name in concrete:
+                columns.add(concrete[name])
+        if isinstance(queryset.query.select_related, dict):
+            columns.update(queryset.query.select_related)
+        return queryset.only(*sorted(columns))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.sparse_actions:
+            queryset = self.sparse_queryset(queryset, self.get_sparse_fields())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            fields = self.get_sparse_fields()
+            if fields is not None:
+                kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
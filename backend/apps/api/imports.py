@@ -0,0 +1,152 @@
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import enrollment, pipeline, search, versioning
+from .models import Class, Student
+from .pipeline import MODES, ImportReport, MissingColumns  # noqa: F401 (used by views and bulkio)
+
+# Streaming imports through the ORM. The upload (CSV, XLSX or JSON, by file
+# name) is read by an apps.api.pipeline source, mapped and validated per row,
+# and valid rows are written IMPORT_BATCH_SIZE at a time, one transaction per
+# batch, so memory follows the batch and not the file. Every run returns an
+# ImportReport: rows created, rows skipped (the natural key already exists)
+# and rows failed, with the errors of each failed row by its line number in
+# the file (the header is line 1). With mode=upsert rows whose natural key
+# exists update the stored row instead of being skipped.
+
+# Tables a file may reference by name (schema Field.lookup)
+LOOKUPS = {'classes': Class}
+
+
+class ModelSink(pipeline.Sink):
+    """A pipeline sink writing ``model`` rows with bulk_create."""
+
+    model = None
+    # upsert: fields computed from the written ones, rewritten along with them
+    derived_fields = ()
+
+    def __init__(self, mode='insert'):
+        super().__init__(pipeline.SCHEMAS[self.model._meta.db_table], mode)
+        # Schema fields are table columns: class_id is the class_fk foreign key
+        fields = self.model._meta.concrete_fields
+        self.attnames = {field.column: field.attname for field in fields}
+        self.names = {field.column: field.name for field in fields}
+
+    def build(self, record):
+        return self.model(**{self.attnames[name]: value for name, value in record.items()})
+
+    def prepare(self, objs):
+        return objs
+
+    def write(self, batch):
+        with transaction.atomic():
+            super().write(batch)
+
+    def close(self):
+        if self.report.written:
+            versioning.touched(self.schema.table)  # bulk_create skips post_save
+
+    def lookup(self, table, names):
+        return dict(LOOKUPS[table].objects.filter(name__in=names).values_list('name', 'pk'))
+
+    def stored(self, records):
+        first = self.schema.natural_key[0]
+        values = {record[first] for record in records}
+        rows = (self.model.objects.filter(**{f'{self.attnames[first]}__in': values})
+                .values_list(*(self.attnames[name] for name in self.stored_fields)))
+        rows = (dict(zip(self.stored_fields, row)) for row in rows)
+        return {self.key(row): row for row in rows}
+
+    def _landed(self, objs):
+        return set(self.model.objects.filter(pk__in=[obj.pk for obj in objs]).values_list('pk', flat=True))
+
+    def insert(self, records):
+        objs = self.prepare([self.build(record) for record in records])
+        # ignore_conflicts still guards against a concurrent insert
+        self.model.objects.bulk_create(objs, ignore_conflicts=True)
+        return self._landed(objs)
+
+    def upsert(self, records, previous):
+        # Unwritten fields come from the stored row so derived ones are computed from the whole row
+        objs = self.prepare([self.build({**previous.get(record['id'], {}), **record}) for record in records])
+        if self.schema.natural_key_unique:
+            unique_fields = [self.names[name] for name in self.schema.natural_key]
+        else:
+            unique_fields = [self.model._meta.pk.name]
+        self.model.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=unique_fields,
+            update_fields=[*(self.names[name] for name in self.update_fields), *self.derived_fields])
+        return self._landed(objs)
+
+
+class StudentSink(ModelSink):
+    """Fields: apps.api.pipeline.STUDENTS (student_code, full_name, email, class_id, ...)."""
+
+    model = Student
+    extra_fields = ('full_name', 'email', 'class_id', 'is_active')
+    derived_fields = ('search_text',)
+
+    def check(self, batch, previous):
+        class_ids = {record['class_id'] for _, record in batch if record.get('class_id')}
+        existing = set(Class.objects.filter(pk__in=class_ids).values_list('pk', flat=True)) if class_ids else set()
+        kept = []
+        for line, record in batch:
+            if record.get('class_id') and record['class_id'] not in existing:
+                self.report.fail(line, {'class_id': ['Lớp không tồn tại.']})
+            else:
+                kept.append((line, record))
+
+        def joining(record):
+            # The class the record takes a place in, unless the stored row already holds it
+            row = previous.get(record['id'])
+            merged = {**(row or {}), **record}
+            class_id = merged.get('class_id')
+            if not class_id or not merged.get('is_active', True):
+                return None
+            if row and row['is_active'] and row['class_id'] == class_id:
+                return None
+            return class_id
+
+        # Rows past a class's remaining places fail; earlier rows of the file win
+        adding = Counter(filter(None, (joining(record) for _, record in kept)))
+        available = {uuid.UUID(full['class_id']): max(full['max_students'] - full['enrolled'], 0)
+                     for full in enrollment.over_capacity(adding)}
+        if not available:
+            return kept
+        accepted = []
+        for line, record in kept:
+            class_id = joining(record)
+            if class_id in available:
+                if not available[class_id]:
+                    self.report.fail(line, {'class_id': ['Lớp đã đủ sĩ số tối đa.']})
+                    continue
+                available[class_id] -= 1
+            accepted.append((line, record))
+        return accepted
+
+    def prepare(self, objs):
+        return search.prepare(objs)
+
+
+class ClassSink(ModelSink):
+    """Fields: apps.api.pipeline.CLASSES.
+
+    Nothing stops two classes sharing name and grade, so inserts are not
+    deduplicated and upserts target the stored row's id.
+    """
+
+    model = Class
+
+
+def import_file(file, sink, name=None):
+    """Import an upload into ``sink``; the format comes from ``name`` (default: the file's name)."""
+    return pipeline.run(pipeline.open_source(file, name), sink, batch_size=settings.IMPORT_BATCH_SIZE,
+                        max_errors=settings.IMPORT_MAX_ERRORS)
+
+
+def import_classes(file, mode='insert'):
+    """Import a classes upload (CSV, XLSX or JSON); returns an ImportReport."""
+    return import_file(file, ClassSink(mode))
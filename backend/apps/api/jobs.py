@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from . import bulkio, versioning
+from .models import ExportJob
+
+# Export jobs: POST /api/exports/ records an ExportJob and a local thread pool
+# writes the CSV to EXPORT_ROOT/<job id>.csv (via a .part file, renamed when
+# complete). A heartbeat thread refreshes rows_written and updated_at while the
+# export runs, so a chunk that takes long to arrive does not get the job marked
+# stale; status changes are conditional on the status the worker expects, so a
+# job given up as stale stays failed. The job fingerprint covers kind, filters,
+# the caller's scope and the versions of the tables read (kept in the database
+# and bumped by triggers, apps.api.versioning), so an identical request within
+# EXPORT_JOB_REUSE_SECONDS gets the existing job as long as none of that data
+# changed, whoever changed it.
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress (and heartbeat) updates
+PROGRESS_INTERVAL = 0.5
+
+STALE_ERROR = 'Export worker stopped before finishing.'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix='export')
+        return _executor
+
+
+def artifact_path(job):
+    return Path(settings.EXPORT_ROOT) / f'{job.pk}.csv'
+
+
+def fingerprint(kind, params, scope, tables):
+    parts = [kind, json.dumps(params, sort_keys=True), scope, repr(list(zip(tables, versioning.get_versions(*tables))))]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def is_stale(job):
+    """A pending/running job whose worker stopped reporting (e.g. the process restarted)."""
+    limit = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+    return job.status in ('pending', 'running') and job.updated_at < limit
+
+
+def mark_if_stale(job):
+    """Record a stale job as failed so pollers stop waiting; returns ``job``."""
+    if is_stale(job):
+        now = timezone.now()
+        # Unless the worker reported (or finished) since the job was read
+        stale = ExportJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at)
+        if stale.update(status='failed', error=STALE_ERROR, finished_at=now, updated_at=now):
+            job.status, job.error, job.finished_at, job.updated_at = 'failed', STALE_ERROR, now, now
+        else:
+            job.refresh_from_db()
+    return job
+
+
+def find_reusable(fingerprint_value):
+    since = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_REUSE_SECONDS)
+    candidates = ExportJob.objects.filter(fingerprint=fingerprint_value, created_at__gte=since,
+                                          status__in=('pending', 'running', 'done'))
+    for job in candidates:
+        if job.status == 'done' and not artifact_path(job).exists():
+            continue
+        if is_stale(job):
+            continue
+        return job
+    return None
+
+
+def submit(job, header, queryset, fields):
+    """Run the export for ``job`` on the pool (inline when EXPORT_JOBS_EAGER)."""
+    if settings.EXPORT_JOBS_EAGER:
+        run(job.pk, header, queryset, fields)
+    else:
+        # The worker's connection must see the job row
+        transaction.on_commit(lambda: executor().submit(_run_in_worker, job.pk, header, queryset, fields))
+
+
+def _run_in_worker(*args):
+    # Worker threads get their own connections; drop them like a request would
+    close_old_connections()
+    try:
+        run(*args)
+    finally:
+        close_old_connections()
+
+
+class _Heartbeat(threading.Thread):
+    """Reports a running job's progress every PROGRESS_INTERVAL, whatever the export loop is doing.
+
+    The loop sets ``written``; a single chunk can take longer than
+    EXPORT_JOB_STALE_SECONDS to arrive (a slow query, a COPY that sends
+    nothing until it completes), so the updates cannot ride on the chunks.
+    """
+
+    def __init__(self, job):
+        super().__init__(name=f'export-heartbeat-{job.pk}', daemon=True)
+        self.job = job
+        self.written = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(PROGRESS_INTERVAL):
+                try:
+                    ExportJob.objects.filter(pk=self.job.pk, status='running').update(
+                        rows_written=min(self.written, self.job.rows_total), updated_at=timezone.now())
+                except Exception:
+                    logger.exception('Export job %s heartbeat failed', self.job.pk)
+        finally:
+            connections.close_all()  # this thread's connections
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run(job_id, header, queryset, fields):
+    job = ExportJob.objects.get(pk=job_id)
+    path = artifact_path(job)
+    part = path.with_suffix('.part')
+    heartbeat = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        job.rows_total = queryset.count()
+        if not ExportJob.objects.filter(pk=job_id, status='pending').update(
+                status='running', rows_total=job.rows_total, updated_at=timezone.now()):
+            return  # given up as stale before it started
+        heartbeat = _Heartbeat(job)
+        heartbeat.start()
+        written = -1  # header line
+        with open(part, 'wb') as out:
+            for chunk in bulkio.csv_stream(header, queryset, fields):
+                out.write(chunk)
+                # Lines, not rows: a quoted newline inside a cell counts twice
+                written += chunk.count(b'\n')
+                heartbeat.written = max(written, 0)
+        heartbeat.stop()
+        os.replace(part, path)
+        result = {'status': 'done', 'rows_written': job.rows_total, 'file_size': path.stat().st_size}
+    except Exception as exc:
+        logger.exception('Export job %s failed', job_id)
+        if heartbeat is not None:
+            heartbeat.stop()
+        part.unlink(missing_ok=True)
+        result = {'status': 'failed', 'error': str(exc)}
+    now = timezone.now()
+    # A job marked failed as stale meanwhile stays failed: pollers were already told
+    if not ExportJob.objects.filter(pk=job_id, status__in=('pending', 'running')).update(
+            finished_at=now, updated_at=now, **result):
+        logger.warning('Export job %s finished after it was marked failed', job_id)
+
+
+def cleanup(max_age):
+    """Delete jobs (and artifacts) created more than ``max_age`` seconds ago; returns the count."""
+    old = ExportJob.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=max_age))
+    count = 0
+    for job in old.iterator():
+        artifact_path(job).unlink(missing_ok=True)
+        artifact_path(job).with_suffix('.part').unlink(missing_ok=True)
+        job.delete()
+        count += 1
+    return count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.api import jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete old export jobs and their CSV artifacts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['cleanup'])
+        parser.add_argument('--older-than', type=int, default=7 * 24 * 3600,
+                            help='Age in seconds (default: 7 days)')
+
+    def handle(self, *args, **options):
+        removed = jobs.cleanup(options['older_than'])
+        self.stdout.write(f'Removed {removed} export job(s).')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.api import response_cache, versioning
+
+
+class Command(BaseCommand):
+    help = 'Show server-side response cache statistics or invalidate cached responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'invalidate'])
+        parser.add_argument('--table', action='append', choices=versioning.TABLES,
+                            help='Invalidate responses built on this table (repeatable; default: all)')
+        parser.add_argument('--reset-stats', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        if options['action'] == 'stats':
+            for endpoint, row in response_cache.stats().items():
+                values = ' '.join(f'{name}={value}' for name, value in row.items())
+                self.stdout.write(f'{endpoint}: {values}')
+            if options['reset_stats']:
+                response_cache.reset_stats()
+            return
+        tables = options['table'] or versioning.TABLES
+        response_cache.invalidate(*tables)
+        self.stdout.write(f'Invalidated cached responses for: {", ".join(tables)}.')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.api import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized student search column and its database index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'install'])
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['action'] == 'rebuild':
+            updated = search.rebuild_search_text(batch_size=options['batch_size'])
+            self.stdout.write(f'Updated search_text on {updated} student(s).')
+        # Re-running install also restores SQLite triggers dropped by a table rebuild
+        if search.install_index():
+            self.stdout.write('Search index installed.')
+        else:
+            self.stdout.write('No index for this database; using LIKE over search_text.')
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_class_academic_year_id_class_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='attendance_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('created_at__isnull', True)), fields=['-date', '-id'], name='attendance_keyset_null_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-created_at', '-id'], name='students_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('created_at__isnull', True)), fields=['-id'], name='students_keyset_null_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+from apps.api import search
+
+
+def fill_search_text(apps, schema_editor):
+    Student = apps.get_model('api', 'Student')
+    batch = []
+    for student in Student.objects.only('id', *search.SOURCE_FIELDS).iterator(chunk_size=2000):
+        student.search_text = search.search_document(student.student_code, student.full_name, student.email)
+        batch.append(student)
+        if len(batch) >= 2000:
+            Student.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, ['search_text'])
+
+
+def install_index(apps, schema_editor):
+    search.install_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(install_index, drop_index),
+    ]
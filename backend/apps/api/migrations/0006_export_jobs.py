@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_enrollment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('students', 'students'), ('classes', 'classes'), ('attendance', 'attendance')], max_length=16)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('scope', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(db_index=True, max_length=40)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=16)),
+                ('rows_total', models.IntegerField(blank=True, null=True)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('file_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_by', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'export_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['scope', '-created_at'], name='export_jobs_scope_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+from apps.api import versioning
+
+
+def install_triggers(apps, schema_editor):
+    versioning.install_triggers(schema_editor.connection)
+
+
+def drop_triggers(apps, schema_editor):
+    versioning.drop_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('table', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+                ('modified', models.FloatField()),
+            ],
+            options={
+                'db_table': 'table_versions',
+            },
+        ),
+        migrations.RunPython(install_triggers, drop_triggers),
+    ]
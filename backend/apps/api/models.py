@@ -1,6 +1,8 @@
 from django.db import models
 import uuid
 
+from .search import SOURCE_FIELDS, search_document
+
 class Student(models.Model):
     """Student table managed by Django, mapped to Supabase Postgres.
     Uses ForeignKey to Class for better querying.
@@ -20,10 +22,26 @@ class Student(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(null=True, blank=True)
+    # Unaccented, lowercased code/name/email; indexed for ?search= (see apps.api.search)
+    search_text = models.TextField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'students'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key (see apps.api.pagination.KeysetPagination)
+            models.Index(fields=['-created_at', '-id'], name='students_keyset_idx'),
+            models.Index(fields=['-id'], name='students_keyset_null_idx', condition=models.Q(created_at__isnull=True)),
+            # Active enrolment per class (apps.api.enrollment), answered from the index
+            models.Index(fields=['class_fk', 'is_active'], name='students_class_active_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_text = search_document(self.student_code, self.full_name, self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(SOURCE_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {'search_text'}
+        super().save(*args, **kwargs)
 
 class Class(models.Model):
     """Model mapping to Supabase 'classes' table (includes optional fields used by FE)."""
@@ -61,3 +79,49 @@ class Attendance(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['student_fk', 'class_fk', 'date'], name='uniq_attendance_student_class_date')
         ]
+        indexes = [
+            # Keyset pagination key; NULL created_at rows are matched by their own condition
+            models.Index(fields=['-date', '-created_at', '-id'], name='attendance_keyset_idx'),
+            models.Index(fields=['-date', '-id'], name='attendance_keyset_null_idx', condition=models.Q(created_at__isnull=True)),
+            # Per-class attendance of a day by status (apps.api.enrollment, reports)
+            models.Index(fields=['class_fk', 'date', 'status'], name='attendance_class_day_idx'),
+        ]
+
+class TableVersion(models.Model):
+    """Write counter of a table (apps.api.versioning), bumped by triggers on the table."""
+    table = models.CharField(max_length=64, primary_key=True)
+    version = models.BigIntegerField()
+    # Unix time of the latest write
+    modified = models.FloatField()
+
+    class Meta:
+        db_table = 'table_versions'
+
+class ExportJob(models.Model):
+    """Background CSV export (apps.api.jobs); the artifact lives under EXPORT_ROOT."""
+    KINDS = ('students', 'classes', 'attendance')
+    STATUSES = ('pending', 'running', 'done', 'failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=16, choices=[(k, k) for k in KINDS])
+    params = models.JSONField(default=dict, blank=True)
+    # Principal.scope_key: callers with the same scope share (and reuse) jobs
+    scope = models.CharField(max_length=255)
+    # Hash of kind, params, scope and table versions; equal means same file
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    status = models.CharField(max_length=16, choices=[(s, s) for s in STATUSES], default='pending')
+    rows_total = models.IntegerField(null=True, blank=True)
+    rows_written = models.IntegerField(default=0)
+    file_name = models.CharField(max_length=255, null=True, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_by = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Worker heartbeat: refreshed with every progress update
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['scope', '-created_at'], name='export_jobs_scope_idx')]
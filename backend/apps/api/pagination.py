@@ -0,0 +1,271 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as InvalidValue
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class StandardPagination(PageNumberPagination):
+    """Page-number pagination; ``?count=false`` skips the COUNT(*) query.
+
+    Without a count the page is fetched with one extra row to know whether a
+    next page exists, and the response omits ``count``.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = request.query_params.get(self.count_query_param, 'true').lower() not in FALSE_VALUES
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+            if self.number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.with_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.with_count:
+            return super().get_previous_link()
+        if self.number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        if self.with_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a composite key, e.g. (-date, -created_at, -id).
+
+    The cursor carries the key values of the boundary row, so every page is a
+    ``WHERE key after boundary ORDER BY key LIMIT n`` range scan with no COUNT
+    or OFFSET. Honours ``?ordering=`` (an ``id`` tie-breaker is always
+    appended); NULLs sort as the smallest value in both directions.
+
+    Search ranked by relevance has no key to resume from: a cursor with such
+    a ``?search=`` needs an explicit ``?ordering=`` and is rejected otherwise.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+    ranked_search_message = 'Cursor pagination cannot follow search relevance: add ?ordering=.'
+
+    @classmethod
+    def requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.check_ranked_search(request, view)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(request, queryset, view)
+        model = queryset.model
+        self.fields = [model._meta.pk if name == 'pk' else model._meta.get_field(name) for name, _ in self.keys]
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        rows = self.fetch(queryset, cursor, reverse)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def check_ranked_search(self, request, view):
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'ranks') and backend().ranks(request):
+                raise ValidationError({self.cursor_query_param: [self.ranked_search_message]})
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_keys(self, request, queryset, view):
+        ordering = None
+        explicit = OrderingFilter.ordering_param in request.query_params
+        if view is not None:
+            if not explicit and getattr(view, 'keyset_ordering', None):
+                ordering = list(view.keyset_ordering)
+            else:
+                for backend in getattr(view, 'filter_backends', []):
+                    if issubclass(backend, OrderingFilter):
+                        ordering = backend().get_ordering(request, queryset, view)
+                        break
+        ordering = list(ordering or ['-pk'])
+        keys = []
+        for term in ordering:
+            name = term.lstrip('-')
+            keys.append(('pk' if name in ('id', 'pk') else name, term.startswith('-')))
+        if not any(name == 'pk' for name, _ in keys):
+            keys.append(('pk', keys[-1][1]))
+        return keys
+
+    def fetch(self, queryset, cursor, reverse):
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor['values'], reverse))
+        return list(queryset[:self.page_size + 1])
+
+    def order_by(self, reverse):
+        exprs = []
+        for (name, desc), field in zip(self.keys, self.fields):
+            descending = desc != reverse
+            if not field.null:
+                exprs.append(F(name).desc() if descending else F(name).asc())
+            elif descending:
+                exprs.append(F(name).desc(nulls_last=True))
+            else:
+                exprs.append(F(name).asc(nulls_first=True))
+        return exprs
+
+    def after(self, values, reverse):
+        """Q matching the rows strictly after ``values`` in the (possibly reversed) key order."""
+        condition = None
+        keyed = list(zip(self.keys, self.fields, values))
+        for (name, desc), field, value in reversed(keyed):
+            descending = desc != reverse
+            if value is None:
+                # NULL is the smallest value: nothing lies below it, everything non-null above
+                beyond = None if descending else Q(**{f'{name}__isnull': False})
+                tie = Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if descending and field.null:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                tie = Q(**{name: value})
+            if condition is None:
+                # Last key (the primary key) is unique: strictly beyond only
+                condition = beyond if beyond is not None else Q(pk__in=[])
+            elif beyond is None:
+                condition = tie & condition
+            else:
+                condition = beyond | (tie & condition)
+        (name, desc), field, value = keyed[0]
+        if value is not None and not field.null:
+            # Redundant bound on the leading key so the index is used as a range scan
+            condition &= Q(**{f'{name}__{"lte" if desc != reverse else "gte"}': value})
+        return condition
+
+    def row_values(self, row):
+        values = []
+        for field in self.fields:
+            value = row[field.attname] if isinstance(row, dict) else getattr(row, field.attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else None if value is None else str(value))
+        return values
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps({'v': self.row_values(row), 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            raw = payload['v']
+            if len(raw) != len(self.keys):
+                raise ValueError
+            values = [None if v is None else field.to_python(v) for field, v in zip(self.fields, raw)]
+            return {'values': values, 'reverse': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, InvalidValue):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_row is None:
+            return None
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOptInMixin:
+    """Switch a viewset to KeysetPagination when ``?cursor=`` or ``?pagination=cursor`` is given."""
+
+    pagination_class = StandardPagination
+    keyset_pagination_class = KeysetPagination
+    keyset_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if self.keyset_pagination_class is not None and request is not None \
+                    and self.keyset_pagination_class.requested(request):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = None if self.pagination_class is None else self.pagination_class()
+        return self._paginator
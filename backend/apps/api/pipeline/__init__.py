@@ -0,0 +1,17 @@
+# Import pipeline: source (CSV, XLSX, JSON) -> schema mapping -> sink. Free of
+# Django so the command-line scripts use it with SupabaseSink; the API's ORM
+# sinks live in apps.api.imports.
+
+from .core import BATCH_SIZE, MODES, ImportReport, Metrics, import_path, run
+from .schema import CLASSES, SCHEMAS, STUDENTS, Field, Invalid, Mapping, MissingColumns, Schema
+from .sinks import Sink, SupabaseSink
+from .sources import (CsvSource, InvalidFile, JsonSource, Source, UnsupportedFormat, XlsxSource, open_source,
+                      source_class)
+
+__all__ = [
+    'BATCH_SIZE', 'MODES', 'ImportReport', 'Metrics', 'import_path', 'run',
+    'CLASSES', 'SCHEMAS', 'STUDENTS', 'Field', 'Invalid', 'Mapping', 'MissingColumns', 'Schema',
+    'Sink', 'SupabaseSink',
+    'CsvSource', 'InvalidFile', 'JsonSource', 'Source', 'UnsupportedFormat', 'XlsxSource', 'open_source',
+    'source_class',
+]
@@ -0,0 +1,176 @@
+import itertools
+import queue
+import threading
+import time
+
+from .sources import open_source
+
+# The import loop shared by every source and sink: rows are read from the
+# source, mapped and validated BATCH_SIZE at a time (Mapping.map_batch) and the
+# valid ones handed to the sink. With max_pending > 0 the sink writes on its own
+# thread, fed through a queue of at most max_pending batches: reading and
+# mapping the next batch overlaps the network round trip of the current one,
+# and a slow sink blocks the reader instead of letting batches pile up in memory.
+
+MODES = ('insert', 'upsert')
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 1000
+
+
+class Metrics:
+    """Where an import spent its time; ``backpressure_waits``: batches that waited for a full queue."""
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.read_seconds = 0.0
+        self.map_seconds = 0.0
+        self.write_seconds = 0.0
+        self.backpressure_waits = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'batches': self.batches,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds) if self.seconds else None,
+            'read_seconds': round(self.read_seconds, 3),
+            'map_seconds': round(self.map_seconds, 3),
+            'write_seconds': round(self.write_seconds, 3),
+            'backpressure_waits': self.backpressure_waits,
+        }
+
+
+class ImportReport:
+    """Row counts of an import. insert: created/skipped; upsert: inserted/updated/unchanged."""
+
+    def __init__(self, mode='insert', max_errors=None):
+        self.mode = mode
+        self.created = 0
+        self.skipped = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = MAX_ERRORS if max_errors is None else max_errors
+        self.metrics = Metrics()
+        # Rows fail on the reading side and, past a sink's own checks, on the writer thread
+        self._lock = threading.Lock()
+
+    @property
+    def written(self):
+        return self.created + self.updated
+
+    def fail(self, line, errors):
+        with self._lock:
+            self.failed += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append({'row': line, 'errors': errors})
+
+    def as_dict(self):
+        if self.mode == 'upsert':
+            counts = {'inserted': self.created, 'updated': self.updated, 'unchanged': self.unchanged}
+        else:
+            counts = {'created': self.created, 'skipped': self.skipped}
+        return {**counts, 'failed': self.failed, 'errors': sorted(self.errors, key=lambda error: error['row']),
+                'errors_truncated': self.failed > len(self.errors), 'metrics': self.metrics.as_dict()}
+
+
+class _Writer:
+    """Hands batches to ``sink.write``: inline, or on a thread behind a bounded queue."""
+
+    def __init__(self, sink, metrics, max_pending):
+        self.sink = sink
+        self.metrics = metrics
+        self.error = None
+        self.queue = queue.Queue(max_pending) if max_pending else None
+        if self.queue is not None:
+            self.thread = threading.Thread(target=self._drain, name='import-writer', daemon=True)
+            self.thread.start()
+
+    def put(self, batch):
+        if self.queue is None:
+            self._write(batch)
+            return
+        self.check()
+        if self.queue.full():
+            self.metrics.backpressure_waits += 1
+        self.queue.put(batch)  # blocks until the writer catches up
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        self.sink.write(batch)
+        self.metrics.write_seconds += time.perf_counter() - started
+        self.metrics.batches += 1
+
+    def _drain(self):
+        while (batch := self.queue.get()) is not None:
+            if self.error is None:  # after a failure, drain so the reader never blocks
+                try:
+                    self._write(batch)
+                except BaseException as exc:
+                    self.error = exc
+
+    def close(self):
+        if self.queue is not None:
+            self.queue.put(None)
+            self.thread.join()
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+
+def run(source, sink, batch_size=None, max_pending=0, defaults=None, max_errors=None):
+    """Import the rows of ``source`` into ``sink``; returns an ImportReport.
+
+    ``defaults``: {field: value} for fields the file leaves out or empty.
+    Raises MissingColumns (nothing imported) when the header lacks a
+    required field.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    mapping = sink.schema.bind(source.columns, defaults)
+    report = ImportReport(sink.mode, max_errors)
+    metrics = report.metrics
+    started = time.perf_counter()
+    sink.open(mapping, report)
+    writer = _Writer(sink, metrics, max_pending)
+    try:
+        rows = iter(source)
+        while True:
+            mark = time.perf_counter()
+            read, taken = [], 0
+            for line, row, error in itertools.islice(rows, batch_size):
+                taken += 1
+                if error is None:
+                    read.append((line, row))
+                else:
+                    report.fail(line, {'row': [error]})
+            now = time.perf_counter()
+            metrics.read_seconds += now - mark
+            metrics.rows += taken
+            if not taken:
+                break
+            valid = []
+            for line, record, errors in mapping.map_batch(read, sink.lookup):
+                if errors:
+                    report.fail(line, errors)
+                else:
+                    valid.append((line, record))
+            metrics.map_seconds += time.perf_counter() - now
+            if valid:
+                writer.put(valid)
+    finally:
+        writer.close()
+        sink.close()
+        metrics.seconds = time.perf_counter() - started
+    writer.check()
+    return report
+
+
+def import_path(path, sink, **options):
+    """run() over the file at ``path``; its format comes from the extension."""
+    with open(path, 'rb') as file:
+        return run(open_source(file, path), sink, **options)
@@ -0,0 +1,253 @@
+import uuid
+from datetime import date, datetime
+
+# Column mapping and validation. A Schema lists the fields of a record, the
+# headers each may come from (API names first, then the Excel templates'
+# Vietnamese headers) and how its cells are parsed. Headers are resolved once
+# per file (Schema.bind); after that a batch is mapped one column at a time.
+
+REQUIRED = 'Bắt buộc.'
+
+
+class Invalid(ValueError):
+    """A cell that cannot be parsed; the message is shown to the user."""
+
+
+class MissingColumns(ValueError):
+    """The header lacks required columns; nothing was imported."""
+
+    def __init__(self, columns):
+        super().__init__('missing columns: %s' % ', '.join(columns))
+        self.columns = columns
+
+
+# -- cell parsers: cell as read (str, number, datetime, bool or None) -> value
+
+def text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # codes typed as numbers in Excel
+    value = str(value).strip()
+    return value or None
+
+
+def uuid_value(value):
+    value = text(value)
+    if value is None:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise Invalid('UUID không hợp lệ.')
+
+
+def integer(value):
+    if isinstance(value, bool):
+        raise Invalid('Phải là số nguyên.')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    value = text(value)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise Invalid('Phải là số nguyên.')
+
+
+def flag(value):
+    # A present but empty cell is false; an absent column leaves the model default
+    if isinstance(value, bool):
+        return value
+    return (text(value) or '').lower() == 'true'
+
+
+GENDERS = {'nam': 'male', 'nữ': 'female', 'male': 'male', 'female': 'female', 'other': 'other'}
+
+
+def gender(value):
+    value = text(value)
+    if value is None:
+        return None
+    return GENDERS.get(value.lower(), 'other')
+
+
+def day(value):
+    """dd/mm/yyyy or yyyy-mm-dd text, or a date cell."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = text(value)
+    if value is None:
+        return None
+    for pattern in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, pattern).date()
+        except ValueError:
+            pass
+    raise Invalid('Ngày không hợp lệ (dd/mm/yyyy).')
+
+
+class Field:
+    """A record field read from the first of ``columns`` in the header.
+
+    ``parts``: alternative column groups joined with spaces when none of
+    ``columns`` is present (a name split over several columns).
+    ``lookup``: (table, name columns) when the file may name the referenced
+    row instead of giving its id; names are resolved per batch by the sink.
+    """
+
+    def __init__(self, name, columns, parse=text, required=False, max_length=None, parts=(), lookup=None):
+        self.name = name
+        self.columns = columns
+        self.parse = parse
+        self.required = required
+        self.max_length = max_length
+        self.parts = parts
+        self.lookup = lookup
+
+
+def _first(header, columns):
+    return next((column for column in columns if column in header), None)
+
+
+class Schema:
+    """Fields of one table; ``natural_key`` identifies a row across imports.
+
+    ``natural_key_unique``: the table enforces the key. When it does not,
+    inserts are not deduplicated and upserts target the stored row's id.
+    """
+
+    def __init__(self, table, fields, natural_key, natural_key_unique=True):
+        self.table = table
+        self.fields = fields
+        self.natural_key = natural_key
+        self.natural_key_unique = natural_key_unique
+
+    def bind(self, header, defaults=None):
+        return Mapping(self, header, defaults or {})
+
+
+class Mapping:
+    """A Schema bound to a file's header: which column feeds each field."""
+
+    def __init__(self, schema, header, defaults):
+        self.schema = schema
+        header = set(header)
+        self.plan = []
+        missing = []
+        for field in schema.fields:
+            column = _first(header, field.columns)
+            parts = None
+            names = None
+            if column is None and field.parts:
+                parts = [found for found in (_first(header, group) for group in field.parts) if found]
+            if column is None and field.lookup:
+                names = _first(header, field.lookup[1])
+            if column is None and not parts and names is None:
+                if field.name in defaults:
+                    self.plan.append((field, None, None, None, defaults[field.name]))
+                elif field.required:
+                    missing.append(field.columns[0])
+                continue
+            self.plan.append((field, column, parts, names, defaults.get(field.name)))
+        if missing:
+            raise MissingColumns(missing)
+        # Fields this import sets; the others keep their stored (or model default) values
+        self.fields = [field.name for field, *_ in self.plan]
+        self.lookups = {field.name: (field.lookup[0], names) for field, _, _, names, _ in self.plan if names}
+
+    def map_batch(self, rows, lookup):
+        """[(line, record, errors)] for [(line, row)], computed a field (column) at a time.
+
+        Each field's cells are taken from the whole batch, split name columns
+        are joined column by column, and a parser sees each distinct cell once
+        (dates, genders and class names repeat down a sheet). Names are
+        resolved with one ``lookup`` per table.
+        """
+        lines = [line for line, _ in rows]
+        rows = [row for _, row in rows]
+        records = [{} for _ in rows]
+        errors = [{} for _ in rows]
+        for field, column, parts, names, default in self.plan:
+            name = field.name
+            if names is not None:
+                wanted = parse_column(text, [row.get(names) for row in rows])
+                found = {value for value in wanted if value is not None}
+                ids = lookup(field.lookup[0], found) if found else {}
+                for record, error, value in zip(records, errors, wanted):
+                    record[name] = ids.get(value)
+                    if value is not None and value not in ids:
+                        error[name] = [f'Không tìm thấy "{value}".']
+                continue
+            if column is not None:
+                cells = [row.get(column) for row in rows]
+            elif parts:
+                words = [parse_column(text, [row.get(part) for row in rows]) for part in parts]
+                cells = [' '.join(filter(None, group)) or None for group in zip(*words)]
+            else:
+                cells = [None] * len(rows)
+            for record, error, value in zip(records, errors, parse_column(field.parse, cells)):
+                if isinstance(value, Invalid):
+                    error[name] = [str(value)]
+                    continue
+                if value is None and default is not None:
+                    value = default
+                if value is None and field.required:
+                    error[name] = [REQUIRED]
+                elif field.max_length and isinstance(value, str) and len(value) > field.max_length:
+                    error[name] = [f'Tối đa {field.max_length} ký tự.']
+                record[name] = value
+        return list(zip(lines, records, errors))
+
+
+def parse_column(parse, cells):
+    """[parse(cell)] with each distinct cell parsed once; a cell that fails gives its Invalid."""
+    if parse is text:  # cheap, cannot fail, and mostly distinct cells (codes, names)
+        return [text(cell) for cell in cells]
+    parsed = {}
+    values = []
+    for cell in cells:
+        key = (type(cell), cell)  # 1, 1.0 and True are equal keys but not equal cells
+        try:
+            value = parsed[key]
+        except KeyError:
+            try:
+                value = parse(cell)
+            except Invalid as exc:
+                value = exc
+            parsed[key] = value
+        except TypeError:  # unhashable (a JSON list or object)
+            try:
+                value = parse(cell)
+            except Invalid as exc:
+                value = exc
+        values.append(value)
+    return values
+
+
+STUDENTS = Schema('students', [
+    Field('student_code', ('student_code', 'Mã sinh viên', 'Mã học sinh'), required=True, max_length=64),
+    Field('full_name', ('full_name', 'Họ và tên'), required=True, max_length=255,
+          parts=(('Họ đệm', 'Họ và tên đệm'), ('Tên',))),
+    Field('email', ('email', 'Email'), max_length=254),
+    Field('phone', ('phone', 'Số điện thoại'), max_length=32),
+    Field('gender', ('gender', 'Giới tính'), parse=gender),
+    Field('date_of_birth', ('date_of_birth', 'Ngày sinh'), parse=day),
+    Field('class_id', ('class_id',), parse=uuid_value, lookup=('classes', ('class_name', 'Lớp học', 'Lớp'))),
+    Field('is_active', ('is_active',), parse=flag),
+], natural_key=('student_code',))
+
+CLASSES = Schema('classes', [
+    Field('name', ('name', 'Tên lớp'), required=True, max_length=255),
+    Field('grade', ('grade', 'Khối lớp'), max_length=64),
+    Field('description', ('description', 'Mô tả')),
+    Field('max_students', ('max_students', 'Số học sinh tối đa'), parse=integer),
+    Field('teacher_id', ('teacher_id',), parse=uuid_value),
+    Field('academic_year_id', ('academic_year_id',), parse=uuid_value),
+    Field('is_active', ('is_active',), parse=flag),
+], natural_key=('name', 'grade'), natural_key_unique=False)
+
+SCHEMAS = {schema.table: schema for schema in (STUDENTS, CLASSES)}
@@ -0,0 +1,201 @@
+import uuid
+from datetime import date
+
+from .core import MODES
+
+# Sinks write mapped records (dicts keyed by Schema field names) to a store.
+# The insert/upsert bookkeeping lives in Sink: in insert mode a record whose
+# natural key is taken is skipped; in upsert mode it updates the stored row,
+# records equal to the stored one are left alone, and a key repeated within a
+# batch is applied in file order. Subclasses provide the storage calls
+# (stored, insert, upsert, lookup) and may fail records that only fail
+# against stored data (check). Only the fields the file sets are written.
+
+
+class Sink:
+    # Stored fields read along with the compared ones (for check and derived values)
+    extra_fields = ()
+
+    def __init__(self, schema, mode='insert'):
+        if mode not in MODES:
+            raise ValueError(f'unknown import mode: {mode}')
+        self.schema = schema
+        self.mode = mode
+        self.mapping = None
+        self.report = None
+
+    def open(self, mapping, report):
+        self.mapping = mapping
+        self.report = report
+        key = self.schema.natural_key
+        # upsert: fields compared with the stored row and rewritten when one differs
+        self.update_fields = [name for name in mapping.fields if name not in key]
+        self.stored_fields = list(dict.fromkeys(('id', *key, *mapping.fields, *self.extra_fields)))
+
+    def close(self):
+        pass
+
+    # -- storage ---------------------------------------------------------------
+
+    def lookup(self, table, names):
+        """{name: id} for the rows of ``table`` named in ``names``."""
+        raise NotImplementedError
+
+    def stored(self, records):
+        """Rows sharing a natural key with ``records``: {key: {stored_fields}}."""
+        raise NotImplementedError
+
+    def insert(self, records):
+        """Insert ``records`` (ids set), skipping conflicts on a unique key; the ids that landed."""
+        raise NotImplementedError
+
+    def upsert(self, records, previous):
+        """Insert ``records`` or update the stored rows they conflict with; the ids now stored.
+
+        ``previous`` maps the id of each record that updates a row to that row.
+        """
+        raise NotImplementedError
+
+    def check(self, batch, previous):
+        """The (line, record) pairs of ``batch`` that can be written; fail the others."""
+        return batch
+
+    def new_id(self):
+        return uuid.uuid4()
+
+    def same(self, record, row):
+        """The record would leave the stored ``row`` as it is."""
+        return all(record[name] == row[name] for name in self.update_fields)
+
+    # -- bookkeeping -------------------------------------------------------------
+
+    def key(self, record):
+        return tuple(record.get(name) for name in self.schema.natural_key)
+
+    def write(self, batch):
+        if self.mode == 'upsert':
+            for part in self._rounds(batch):
+                self._upsert(part)
+        else:
+            self._insert(batch)
+
+    def _insert(self, batch):
+        if self.schema.natural_key_unique:
+            # Records whose key is taken, in the store or earlier in the file, are skipped
+            taken = set(self.stored([record for _, record in batch]))
+            new = []
+            for line, record in batch:
+                if self.key(record) in taken:
+                    self.report.skipped += 1
+                else:
+                    taken.add(self.key(record))
+                    new.append((line, record))
+            batch = new
+        for _, record in batch:
+            record['id'] = self.new_id()
+        records = [record for _, record in self.check(batch, {})]
+        if not records:
+            return
+        # Conflicts are still skipped (a concurrent insert); count what landed
+        created = len(self.insert(records))
+        self.report.created += created
+        self.report.skipped += len(records) - created
+
+    def _rounds(self, batch):
+        # One statement may not touch a row twice: a key seen again starts a new
+        # part, so repeated keys apply in file order
+        part, keys = [], set()
+        for line, record in batch:
+            if self.key(record) in keys:
+                yield part
+                part, keys = [], set()
+            part.append((line, record))
+            keys.add(self.key(record))
+        if part:
+            yield part
+
+    def _upsert(self, batch):
+        stored = self.stored([record for _, record in batch])
+        changed, previous = [], {}
+        for line, record in batch:
+            row = stored.get(self.key(record))
+            if row is None:
+                record['id'] = self.new_id()
+            elif self.same(record, row):
+                self.report.unchanged += 1
+                continue
+            else:
+                record['id'] = row['id']
+                previous[row['id']] = row
+            changed.append((line, record))
+        records = [record for _, record in self.check(changed, previous)]
+        if not records:
+            return
+        # Without fields to update every stored key is unchanged: only new rows are left
+        landed = self.upsert(records, previous) if self.update_fields else self.insert(records)
+        # A key inserted concurrently since the lookup was updated, not inserted
+        inserted = len(set(landed) - set(previous))
+        self.report.created += inserted
+        self.report.updated += len(records) - inserted
+
+
+def json_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class SupabaseSink(Sink):
+    """Writes through the Supabase REST API with a supabase-py ``client``.
+
+    Referenced rows are looked up by their ``name`` column. Database checks
+    (foreign keys, class capacity) are left to the database: a batch it
+    rejects fails the import.
+    """
+
+    def __init__(self, client, schema, mode='insert'):
+        super().__init__(schema, mode)
+        self.client = client
+
+    def table(self, name=None):
+        return self.client.table(name or self.schema.table)
+
+    def new_id(self):
+        return str(uuid.uuid4())
+
+    def same(self, record, row):
+        # The API returns JSON: compare records in the same form
+        return all(json_value(record[name]) == row[name] for name in self.update_fields)
+
+    def key(self, record):
+        return tuple(json_value(record.get(name)) for name in self.schema.natural_key)
+
+    def lookup(self, table, names):
+        rows = self.table(table).select('id, name').in_('name', sorted(names)).execute().data
+        return {row['name']: row['id'] for row in rows}
+
+    def stored(self, records):
+        first = self.schema.natural_key[0]
+        values = sorted({json_value(record[first]) for record in records if record.get(first) is not None})
+        if not values:
+            return {}
+        rows = self.table().select(','.join(self.stored_fields)).in_(first, values).execute().data
+        return {tuple(row[name] for name in self.schema.natural_key): row for row in rows}
+
+    def _payload(self, records):
+        return [{name: json_value(value) for name, value in record.items()} for record in records]
+
+    def insert(self, records):
+        if self.schema.natural_key_unique:
+            query = self.table().upsert(self._payload(records), on_conflict=','.join(self.schema.natural_key),
+                                        ignore_duplicates=True)
+        else:
+            query = self.table().insert(self._payload(records))
+        return {row['id'] for row in query.execute().data}
+
+    def upsert(self, records, previous):
+        on_conflict = ','.join(self.schema.natural_key) if self.schema.natural_key_unique else 'id'
+        rows = self.table().upsert(self._payload(records), on_conflict=on_conflict).execute().data
+        return {row['id'] for row in rows}
@@ -0,0 +1,199 @@
+import codecs
+import csv
+import itertools
+import json
+import os
+
+# Sources turn an upload into rows. Each has ``columns`` (the header, known
+# once it is constructed) and yields (line, row dict, error) where ``error``
+# is None or why the row could not be read. ``line`` is what a person would
+# look up in the file: the CSV/XLSX line or row number (header = 1), or the
+# position of the object in a JSON document.
+
+UNDECODABLE = 'Dòng không phải UTF-8.'
+INVALID_JSON = 'JSON không hợp lệ.'
+NOT_AN_OBJECT = 'Phải là một object JSON.'
+INVALID_XLSX = 'File XLSX không hợp lệ.'
+
+# Bytes checked up front: a file that does not start as UTF-8 is rejected whole
+SNIFF_SIZE = 64 * 1024
+
+
+class InvalidFile(ValueError):
+    """The upload cannot be read at all; nothing was imported."""
+
+
+class UnsupportedFormat(InvalidFile):
+    """The upload's format needs a library that is not installed."""
+
+
+def check_encoding(file):
+    """Raise UnicodeDecodeError unless the first SNIFF_SIZE bytes of ``file`` are UTF-8."""
+    # Not final: a character split by the cut is fine
+    codecs.getincrementaldecoder('utf-8')().decode(file.read(SNIFF_SIZE))
+    file.seek(0)
+
+
+class Source:
+    columns = ()
+
+    def __iter__(self):
+        raise NotImplementedError
+
+
+class CsvSource(Source):
+    """A CSV file (binary) read and decoded one line at a time."""
+
+    def __init__(self, file):
+        check_encoding(file)
+        self.undecodable = set()
+        self.reader = csv.DictReader(self._lines(file))
+        self.columns = list(self.reader.fieldnames or ())
+
+    def _lines(self, file):
+        for number, line in enumerate(file, 1):
+            try:
+                yield line.decode('utf-8')
+            except UnicodeDecodeError:
+                self.undecodable.add(number)
+                yield line.decode('utf-8', 'replace')
+
+    def __iter__(self):
+        reader = self.reader
+        start = reader.line_num
+        for row in reader:
+            # A quoted field may span lines: the row covers (start, line_num]
+            error = None
+            if self.undecodable:
+                lines = range(start + 1, reader.line_num + 1)
+                if any(number in self.undecodable for number in lines):
+                    error = UNDECODABLE
+                self.undecodable.difference_update(lines)
+            yield reader.line_num, row, error
+            start = reader.line_num
+
+
+class XlsxSource(Source):
+    """The first sheet of an .xlsx workbook; the first row is the header.
+
+    The workbook parts (shared strings, styles for date cells) are read with
+    openpyxl, the sheet itself one row at a time from its XML. openpyxl's
+    read-only mode would keep ~80 bytes a row: it leaves every parsed row
+    element in the tree, and scans the whole sheet up front when the file
+    records no dimensions. Here each row is dropped once parsed, so what stays
+    in memory is the shared strings table and the current batch, whatever the
+    number of rows.
+    """
+
+    def __init__(self, file):
+        try:
+            from openpyxl.reader.excel import ExcelReader
+            from openpyxl.styles.stylesheet import apply_stylesheet
+        except ImportError:
+            raise UnsupportedFormat('Máy chủ chưa hỗ trợ file XLSX (cần openpyxl).')
+        try:
+            reader = ExcelReader(file, read_only=True, data_only=True)
+            reader.read_manifest()
+            reader.read_strings()
+            reader.read_workbook()
+            apply_stylesheet(reader.archive, reader.wb)
+            path = next(rel.target for _, rel in reader.parser.find_sheets()
+                        if 'chartsheet' not in rel.Type and rel.target in reader.valid_files)
+        except Exception:  # not a zip, a zip without a workbook in it, or a workbook without sheets
+            raise InvalidFile(INVALID_XLSX)
+        self.archive = reader.archive
+        self.rows = self._rows(reader, path)
+        line, header = next(self.rows, (1, ()))
+        if line != 1:  # no header row: the first row read is data
+            self.rows = itertools.chain([(line, header)], self.rows)
+            header = ()
+        self.columns = ['' if cell is None else str(cell).strip() for cell in header]
+
+    def _rows(self, reader, path):
+        """(row number, values) of each row stored in the sheet at ``path``."""
+        from openpyxl.worksheet._reader import DATA_TAG, ROW_TAG, WorkSheetParser
+        from openpyxl.xml.functions import iterparse
+
+        workbook = reader.wb
+        with self.archive.open(path) as xml:
+            parser = WorkSheetParser(xml, reader.shared_strings, data_only=True, epoch=workbook.epoch,
+                                     date_formats=workbook._date_formats,
+                                     timedelta_formats=workbook._timedelta_formats)
+            data = None
+            for event, element in iterparse(xml, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == DATA_TAG:
+                        data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+                line, cells = parser.parse_row(element)
+                data.clear()  # the rows parsed so far: only this one
+                parser.row_dimensions.clear()
+                values = [None] * max((cell['column'] for cell in cells), default=0)
+                for cell in cells:
+                    values[cell['column'] - 1] = cell['value']
+                yield line, values
+
+    def __iter__(self):
+        columns = self.columns
+        try:
+            for line, values in self.rows:
+                if any(value is not None for value in values):  # blank rows are skipped
+                    yield line, dict(zip(columns, values)), None
+        finally:
+            self.archive.close()
+
+
+class JsonSource(Source):
+    """A JSON array of objects (parsed whole) or JSON Lines (one object per line, streamed).
+
+    ``columns`` are the keys of the first object.
+    """
+
+    def __init__(self, file):
+        check_encoding(file)
+        head = file.read(SNIFF_SIZE).lstrip()
+        file.seek(0)
+        if head.startswith(b'['):
+            try:
+                items = json.load(file)
+            except ValueError:
+                raise InvalidFile(INVALID_JSON)
+            self.items = ((position, item, None) for position, item in enumerate(items, 1))
+        else:
+            self.items = self._lines(file)
+        self.first = next(self.items, None)
+        first = self.first[1] if self.first else None
+        self.columns = list(first) if isinstance(first, dict) else []
+
+    def _lines(self, file):
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line), None
+            except ValueError:
+                yield number, None, INVALID_JSON
+
+    def __iter__(self):
+        if self.first is None:
+            return
+        for line, item, error in itertools.chain([self.first], self.items):
+            if error is None and not isinstance(item, dict):
+                error = NOT_AN_OBJECT
+            yield line, item if error is None else {}, error
+
+
+FORMATS = {'.csv': CsvSource, '.xlsx': XlsxSource, '.xlsm': XlsxSource, '.json': JsonSource,
+           '.jsonl': JsonSource, '.ndjson': JsonSource}
+
+
+def source_class(name):
+    """The Source for a file name (by extension; CSV when unknown)."""
+    return FORMATS.get(os.path.splitext(name or '')[1].lower(), CsvSource)
+
+
+def open_source(file, name=None):
+    """A Source over ``file``, chosen from ``name`` (default: the file's own name)."""
+    return source_class(name if name is not None else getattr(file, 'name', ''))(file)
@@ -0,0 +1,93 @@
+from django.utils.functional import cached_property
+
+from apps.core_app.profile_cache import lookup_profile
+from . import scope
+
+MANAGER_ROLES = ('admin', 'manager')
+STAFF_ROLES = ('teacher', 'admin', 'manager')
+
+
+class Principal:
+    """The caller of one API request, resolved lazily and at most once.
+
+    Permissions and every viewset share the same instance (see ``get_principal``),
+    so the ``profiles`` lookup runs once per request instead of once per check.
+    """
+
+    def __init__(self, claims=None):
+        self.claims = claims or {}
+        self.sub = self.claims.get('sub')
+        self.email = self.claims.get('email') or self.claims.get('user_metadata', {}).get('email')
+
+    @cached_property
+    def profile(self):
+        # (id, email, role) from the shared profile cache; one query on a miss
+        return lookup_profile(self.sub, self.email)
+
+    @cached_property
+    def role(self):
+        if self.profile and self.profile.role:
+            return self.profile.role
+        if not self.claims:
+            return None
+        return self.claims.get('role') or self.claims.get('user_metadata', {}).get('role')
+
+    @property
+    def profile_id(self):
+        return self.profile.id if self.profile else None
+
+    @property
+    def is_manager(self):
+        return self.role in MANAGER_ROLES
+
+    @property
+    def is_staff(self):
+        return self.role in STAFF_ROLES
+
+    @cached_property
+    def student_lookup(self):
+        """Filter kwargs selecting the caller's own Student rows (None if unknown)."""
+        if self.sub:
+            return {'user_id': self.sub}
+        email = self.profile.email if self.profile else self.email
+        if email:
+            return {'email': email}
+        return None
+
+    @cached_property
+    def teacher_class_ids(self):
+        """Ids of the classes taught by the caller (cached scope set)."""
+        return scope.teacher_class_ids(self.profile_id)
+
+    @cached_property
+    def _student_scope(self):
+        return scope.student_scope(self.student_lookup)
+
+    @property
+    def student_ids(self):
+        return self._student_scope['student_ids']
+
+    @property
+    def student_class_ids(self):
+        return self._student_scope['class_ids']
+
+    @cached_property
+    def scope_key(self):
+        """Identifies the rows the caller may see; callers with equal keys see the same data."""
+        if self.is_manager:
+            return 'all'
+        if self.role == 'teacher' and self.profile:
+            return f'teacher:{self.profile_id}'
+        if self.role == 'student' and self.student_lookup:
+            return 'student:' + repr(sorted(self.student_lookup.items()))
+        return None
+
+
+def get_principal(request):
+    """Return the request's Principal, creating it on first use."""
+    principal = getattr(request, '_principal', None)
+    if principal is None:
+        claims = request.auth.get('claims') if isinstance(request.auth, dict) else None
+        principal = Principal(claims)
+        request._principal = principal
+    return principal
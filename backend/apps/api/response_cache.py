@@ -0,0 +1,96 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import versioning
+from .principal import get_principal
+
+# Server-side cache of read responses (serialized data, not rendered bytes).
+# Keys combine the endpoint, the normalized query string, the caller's scope
+# and the version of every table the endpoint reads: a write bumps the table
+# version (signals, import_csv, bulk_create paths), which retires all entries
+# in that table's namespace at once. Entries also expire after a per-endpoint
+# TTL (settings.RESPONSE_CACHE_TTLS).
+#
+# The versions are read from the database (apps.api.versioning) and bumped by
+# triggers, so an entry is never served after a write, whichever worker or
+# client made it. With CACHE_BACKEND=locmem each worker holds its own entries
+# and hit/miss counts; use a shared backend (file) to share them.
+
+_STAT_NAMES = ('hits', 'misses')
+
+
+def ttl(endpoint) -> int:
+    return getattr(settings, 'RESPONSE_CACHE_TTLS', {}).get(endpoint, 0)
+
+
+def _count(endpoint, name):
+    key = f'respcache:stats:{endpoint}:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_key(endpoint, view, request, tables):
+    scope = get_principal(request).scope_key
+    if scope is None:
+        return None
+    params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+    parts = [endpoint, repr(sorted(view.kwargs.items())), repr(params), request.META.get('HTTP_ACCEPT', ''),
+             scope, repr(list(zip(tables, view.get_table_state(tables)[0]))), view.get_etag_variant()]
+    return f'respcache:{endpoint}:' + hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def cache_response(endpoint):
+    """Cache successful responses of a viewset action under ``endpoint``.
+
+    The tables come from the view's ``get_etag_tables()`` (expand-aware).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            timeout = ttl(endpoint)
+            key = cache_key(endpoint, self, request, self.get_etag_tables()) if timeout > 0 else None
+            if key is None:
+                return method(self, request, *args, **kwargs)
+            data = cache.get(key)
+            if data is not None:
+                _count(endpoint, 'hits')
+                return Response(data, headers={'X-Cache': 'HIT'})
+            _count(endpoint, 'misses')
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate(*tables):
+    """Drop every cached response built on ``tables`` (bumps their versions)."""
+    versioning.bump(*(tables or versioning.TABLES))
+
+
+def stats() -> dict:
+    endpoints = sorted(getattr(settings, 'RESPONSE_CACHE_TTLS', {}))
+    keys = [f'respcache:stats:{e}:{n}' for e in endpoints for n in _STAT_NAMES]
+    values = cache.get_many(keys)
+    result = {}
+    for endpoint in endpoints:
+        row = {n: values.get(f'respcache:stats:{endpoint}:{n}', 0) for n in _STAT_NAMES}
+        total = row['hits'] + row['misses']
+        row['hit_ratio'] = round(row['hits'] / total, 4) if total else 0.0
+        row['ttl'] = ttl(endpoint)
+        result[endpoint] = row
+    return result
+
+
+def reset_stats() -> None:
+    endpoints = getattr(settings, 'RESPONSE_CACHE_TTLS', {})
+    cache.delete_many([f'respcache:stats:{e}:{n}' for e in endpoints for n in _STAT_NAMES])
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import versioning
+from .models import Class, Student
+
+# Row-level scope sets, materialised once and shared through Django's cache.
+# Keys embed the table version, so any write to classes/students rebuilds them.
+# The versions are read from the database (apps.api.versioning), not from the
+# cache: with a per-process cache every worker still sees writes made by the
+# others, or made outside Django, on its next request.
+
+
+def _timeout():
+    return getattr(settings, 'SCOPE_CACHE_TIMEOUT', 600)
+
+
+def teacher_class_ids(profile_id) -> list:
+    """Ids of the classes taught by ``profile_id``."""
+    if not profile_id:
+        return []
+    key = f'scope:teacher:{profile_id}:{versioning.get_version("classes")}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(Class.objects.filter(teacher_id=profile_id).values_list('id', flat=True))
+        cache.set(key, ids, _timeout())
+    return ids
+
+
+def student_scope(lookup) -> dict:
+    """Student ids and class ids owned by a student user (``lookup`` = Student filter kwargs)."""
+    if not lookup:
+        return {'student_ids': [], 'class_ids': []}
+    field, value = next(iter(lookup.items()))
+    digest = hashlib.sha1(str(value).encode('utf-8')).hexdigest()
+    key = f'scope:student:{field}:{digest}:{versioning.get_version("students")}'
+    scope = cache.get(key)
+    if scope is None:
+        rows = list(Student.objects.filter(**lookup).values_list('id', 'class_fk_id'))
+        scope = {
+            'student_ids': [r[0] for r in rows],
+            'class_ids': sorted({r[1] for r in rows if r[1] is not None}),
+        }
+        cache.set(key, scope, _timeout())
+    return scope
@@ -0,0 +1,262 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
+
+# Student search over a normalized column, ``students.search_text``:
+# "<student_code> <full_name> <email>" lowercased with diacritics removed, so
+# "nguyen" matches "Nguyễn". It is indexed per database:
+#   - PostgreSQL: pg_trgm GIN index; a trigger (unaccent) keeps the column in
+#     sync for every writer, including the Supabase import scripts.
+#   - SQLite: FTS5 external-content table kept in sync by triggers; Django
+#     fills the column in Student.save() and search.prepare() for bulk_create.
+# Other databases fall back to a scan of the same column.
+# Every backend matches the same way: each query word must be the start of a
+# word of the document (FTS5 token prefixes; elsewhere a regex anchored at the
+# start or after a non-alphanumeric character, which pg_trgm indexes), so
+# "nguy" finds "Nguyễn" but "guyen" finds nothing on any database.
+
+SOURCE_FIELDS = ('student_code', 'full_name', 'email')
+
+
+def normalize(text) -> str:
+    """Lowercase ``text`` and strip diacritics (Vietnamese đ included)."""
+    if not text:
+        return ''
+    text = str(text).lower().replace('đ', 'd')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def search_document(student_code=None, full_name=None, email=None) -> str:
+    return ' '.join(normalize(part) for part in (student_code, full_name, email) if part)
+
+
+def prepare(students):
+    """Fill ``search_text`` on unsaved Student instances (bulk_create skips save())."""
+    for student in students:
+        student.search_text = search_document(student.student_code, student.full_name, student.email)
+    return students
+
+
+def terms(query):
+    return normalize(query).split()
+
+
+# -- index maintenance ------------------------------------------------------
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5("
+    "search_text, content='students', content_rowid='rowid')",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN "
+    "INSERT INTO students_fts(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF search_text ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); "
+    "INSERT INTO students_fts(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+    "INSERT INTO students_fts(students_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS students_fts_ai',
+    'DROP TRIGGER IF EXISTS students_fts_ad',
+    'DROP TRIGGER IF EXISTS students_fts_au',
+    'DROP TABLE IF EXISTS students_fts',
+]
+
+POSTGRES_INSTALL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    "CREATE OR REPLACE FUNCTION students_search_text() RETURNS trigger AS $$ BEGIN "
+    "NEW.search_text := lower(unaccent(concat_ws(' ', NEW.student_code, NEW.full_name, NEW.email))); "
+    "RETURN NEW; END $$ LANGUAGE plpgsql",
+    'DROP TRIGGER IF EXISTS students_search_text ON students',
+    'CREATE TRIGGER students_search_text BEFORE INSERT OR UPDATE OF student_code, full_name, email '
+    'ON students FOR EACH ROW EXECUTE FUNCTION students_search_text()',
+    'CREATE INDEX IF NOT EXISTS students_search_trgm ON students USING gin (search_text gin_trgm_ops)',
+]
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS students_search_trgm',
+    'DROP TRIGGER IF EXISTS students_search_text ON students',
+    'DROP FUNCTION IF EXISTS students_search_text()',
+]
+
+
+def _fts5_available(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+            return True
+        except Exception:
+            return False
+
+
+def install_index(conn=None):
+    """Create (or re-create after a table rebuild) the search index for ``conn``."""
+    conn = conn or connection
+    if conn.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    elif conn.vendor == 'sqlite' and _fts5_available(conn):
+        statements = SQLITE_INSTALL
+    else:
+        return False
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _index_state.pop(conn.alias, None)
+    return True
+
+
+def drop_index(conn=None):
+    conn = conn or connection
+    statements = {'postgresql': POSTGRES_DROP, 'sqlite': SQLITE_DROP}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _index_state.pop(conn.alias, None)
+
+
+def rebuild_search_text(batch_size=2000):
+    """Recompute ``search_text`` for every student; returns the number of rows updated."""
+    from .models import Student
+
+    updated = 0
+    last = None
+    while True:
+        qs = Student.objects.order_by('pk').only('pk', *SOURCE_FIELDS, 'search_text')
+        if last is not None:
+            qs = qs.filter(pk__gt=last)
+        batch = list(qs[:batch_size])
+        if not batch:
+            return updated
+        changed = []
+        for student in batch:
+            text = search_document(student.student_code, student.full_name, student.email)
+            if student.search_text != text:
+                student.search_text = text
+                changed.append(student)
+        if changed:
+            Student.objects.bulk_update(changed, ['search_text'])
+            updated += len(changed)
+        last = batch[-1].pk
+
+
+# -- querying ---------------------------------------------------------------
+
+_index_state = {}
+
+
+def _has_fts(conn):
+    if conn.alias not in _index_state:
+        _index_state[conn.alias] = 'students_fts' in conn.introspection.table_names()
+    return _index_state[conn.alias]
+
+
+def _word_prefix(word):
+    # Same tokens as FTS5's unicode61 tokenizer on normalized text: runs of letters and digits
+    return Q(search_text__regex=r'(^|[^a-z0-9])' + re.escape(word))
+
+
+def _fts_query(words):
+    # Every word must appear as a token prefix: "nguyen"* "van"*
+    return ' '.join('"%s"*' % word.replace('"', '""') for word in words)
+
+
+def search(queryset, query):
+    """Filter ``queryset`` (students) to ``query`` and annotate ``search_rank`` (higher is better)."""
+    words = terms(query)
+    if not words:
+        return queryset
+    conn = connection
+    table = queryset.model._meta.db_table
+    if conn.vendor == 'sqlite' and _has_fts(conn):
+        # Join the FTS5 table on rowid: one full-text scan yields both the
+        # matching rows and their bm25 rank (lower is better, so negate)
+        return queryset.extra(
+            tables=['students_fts'],
+            where=[f'students_fts.rowid = "{table}".rowid', 'students_fts MATCH %s'],
+            params=[_fts_query(words)],
+            select={'search_rank': '-students_fts.rank'},
+        )
+    condition = Q()
+    for word in words:
+        condition &= _word_prefix(word)
+    queryset = queryset.filter(condition)
+    if conn.vendor == 'postgresql':
+        return queryset.annotate(search_rank=Func(
+            F('search_text'), Value(' '.join(words)), function='similarity', output_field=FloatField()))
+    # Fallback rank: documents starting with the query first
+    return queryset.annotate(search_rank=RawSQL(
+        f'CASE WHEN "{table}"."search_text" LIKE %s THEN 1.0 ELSE 0.0 END',
+        [' '.join(words) + '%'], output_field=FloatField()))
+
+
+def _prefix_range(prefix):
+    # "SV00" -> ("SV00", "SV01"): a plain B-tree range scan, unlike LIKE on SQLite
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def suggest(queryset, query, limit=10):
+    """Up to ``limit`` (id, student_code, full_name) rows whose code or name words start with ``query``.
+
+    Code prefixes come from the unique ``student_code`` index, name prefixes
+    from the search index. Name matches are taken in index order (no global
+    ranking, so the scan stops after ``limit`` rows) and then sorted: code
+    matches first (by code), then names starting with the query, then the
+    rest alphabetically.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    rows = {}
+    for prefix in dict.fromkeys([query, query.upper()]):
+        low, high = _prefix_range(prefix)
+        code_matches = queryset.filter(student_code__gte=low, student_code__lt=high).order_by('student_code')
+        for row in code_matches.values('id', 'student_code', 'full_name')[:limit]:
+            rows.setdefault(row['id'], row)
+    if len(rows) < limit and terms(query):
+        name_matches = search(queryset, query).order_by()
+        for row in name_matches.values('id', 'student_code', 'full_name')[:limit]:
+            rows.setdefault(row['id'], row)
+    needle = normalize(query)
+
+    def sort_key(row):
+        if row['student_code'].lower().startswith(needle):
+            return (0, row['student_code'].lower())
+        name = normalize(row['full_name'])
+        return (1 if name.startswith(needle) else 2, name)
+
+    return [{'id': str(r['id']), 'student_code': r['student_code'], 'full_name': r['full_name']}
+            for r in sorted(rows.values(), key=sort_key)[:limit]]
+
+
+class StudentSearchFilter(BaseFilterBackend):
+    """``?search=`` over the normalized search index, ranked by relevance.
+
+    List it after OrderingFilter: without an explicit ``?ordering=`` the
+    results are ordered by ``search_rank``.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def ranks(self, request):
+        """Whether the results are ordered by relevance (KeysetPagination cannot resume those)."""
+        return (OrderingFilter.ordering_param not in request.query_params
+                and bool(terms(request.query_params.get(self.search_param, ''))))
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not terms(query):
+            return queryset
+        queryset = search(queryset, query)
+        if self.ranks(request):
+            queryset = queryset.order_by('-search_rank', '-pk')
+        return queryset
@@ -1,18 +1,28 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Student, Class, Attendance
+from . import enrollment
+from .fieldsets import SparseFieldsetSerializerMixin
+from .models import Student, Class, Attendance, ExportJob
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class_id = serializers.UUIDField(source='class_fk_id', allow_null=True, required=False)
 
     class Meta:
         model = Student
         fields = ['id','user_id','student_code','full_name','date_of_birth','gender','phone','email','address','emergency_contact','emergency_phone','class_id','is_active','created_at','updated_at']
 
-class ClassSerializer(serializers.ModelSerializer):
+class ClassSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Class
         fields = '__all__'
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # ?with=counts: figures annotated by enrollment.annotate_counts (today, outside ClassViewSet)
+        if hasattr(instance, 'student_count'):
+            data['counts'] = enrollment.present(instance, self.context.get('counts_day') or timezone.localdate())
+        return data
+
     def validate_max_students(self, value):
         if value is None:
             return value
@@ -20,10 +30,33 @@ class ClassSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('max_students phải nằm trong khoảng 1..100')
         return value
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     student_id = serializers.UUIDField(source='student_fk_id')
     class_id = serializers.UUIDField(source='class_fk_id')
 
     class Meta:
         model = Attendance
         fields = ['id','student_id','class_id','subject_id','date','status','notes','teacher_id','created_at','updated_at']
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = ['id','kind','params','status','rows_total','rows_written','progress','file_name','file_size','error','created_at','finished_at','download_url']
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if obj.status == 'done':
+            return 100.0
+        if not obj.rows_total:
+            return 0.0
+        return round(obj.rows_written * 100.0 / obj.rows_total, 1)
+
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        url = f'/api/exports/{obj.pk}/download/'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
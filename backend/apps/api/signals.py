@@ -0,0 +1,38 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from apps.core_app.models import Profile
+from . import versioning
+from .models import Attendance, Class, Student
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def bump_students_version(sender, **kwargs):
+    versioning.touched('students')
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def bump_classes_version(sender, **kwargs):
+    versioning.touched('classes')
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def bump_attendance_version(sender, **kwargs):
+    versioning.touched('attendance')
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def bump_profiles_version(sender, **kwargs):
+    versioning.touched('profiles')
+
+
+@receiver(post_migrate)
+def install_version_triggers(sender, using, **kwargs):
+    # Again after every migrate: profiles belongs to core_app, whose tables may come later
+    if sender.name == 'apps.api':
+        versioning.install_triggers(connections[using])
@@ -0,0 +1,20 @@
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Requests for the API tests, authenticated the way SupabaseAuthentication
+# leaves them: a user object and the token's claims (an admin by default).
+
+factory = APIRequestFactory()
+
+
+def api_request(method, url, data=None, claims=None, staff=True, **extra):
+    """``factory.<method>(url, data, **extra)`` carrying ``claims``."""
+    request = getattr(factory, method)(url, data, **extra)
+    user = type('U', (), {'is_authenticated': True, 'is_staff': staff})()
+    force_authenticate(request, user=user, token={'claims': claims or {'role': 'admin'}})
+    return request
+
+
+def call_view(viewset, action, request, **kwargs):
+    """Run ``action`` of ``viewset`` on ``request``, with the action's own @action options."""
+    view = viewset.as_view({request.method.lower(): action}, **getattr(getattr(viewset, action), 'kwargs', {}))
+    return view(request, **kwargs)
@@ -0,0 +1,166 @@
+import contextlib
+import csv
+import io
+import types
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+
+from apps.api import bulkio
+from apps.api.models import Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import StudentViewSet
+
+
+class FakeCopyCursor:
+    """Records SQL; plays COPY TO (psycopg 3) / FROM (psycopg2) and scripted fetch results."""
+
+    def __init__(self, copy_out=b'', results=()):
+        self.cursor = self
+        self.statements = []
+        self.copy_out = copy_out
+        self.copied = None
+        self.results = list(results)
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith('INSERT'):
+            self.rowcount = self.results.pop(0)
+
+    def copy_expert(self, sql, file):
+        self.statements.append(sql)
+        self.copied = file.read()
+
+    def copy(self, sql):
+        self.statements.append(sql)
+        # Blocks as they arrive from the server
+        return contextlib.nullcontext(memoryview(self.copy_out[i:i + 8]) for i in range(0, len(self.copy_out), 8))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+
+def postgres(cursor, driver='psycopg'):
+    pg = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, alias='pg')
+    pg.Database = types.SimpleNamespace(__name__=driver)
+    pg.cursor = lambda: cursor
+    pg.ops.compose_sql = lambda sql, params: sql % tuple(repr(str(p)) for p in params)
+    return pg
+
+
+class BulkIOTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1', max_students=2)
+        Student.objects.create(student_code='S1', full_name='A', class_fk=self.cls, email='', is_active=False)
+
+    def test_csv_values_render_cells(self):
+        rows = list(bulkio.csv_values(Student.objects.all(), ['student_code', 'email', 'class_fk_id', 'is_active']))
+        self.assertEqual(rows, [('S1', None, self.cls.id, 'False')])
+
+    def test_python_import_and_capacity(self):
+        body = f'student_code,full_name,class_id\nS2,B,{self.cls.id}\nS3,C,\n'.encode()
+        self.assertEqual(bulkio.import_students(SimpleUploadedFile('s.csv', body)).created, 2)
+        self.assertEqual(Student.objects.get(student_code='S2').class_fk_id, self.cls.id)
+        body = f'student_code,full_name,class_id\nS4,D,{self.cls.id}\nS5,E,{self.cls.id}\n'.encode()
+        report = bulkio.import_students(SimpleUploadedFile('s.csv', body))
+        # One place left: the first row takes it, the second fails
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.assertEqual(report.errors, [{'row': 3, 'errors': {'class_id': ['Lớp đã đủ sĩ số tối đa.']}}])
+        self.assertFalse(Student.objects.filter(student_code='S5').exists())
+
+    def test_import_rejects_non_utf8(self):
+        request = api_request('post', '/api/students/import/', {
+            'file': SimpleUploadedFile('s.csv', b'student_code,full_name\nS9,L\xea \xd0\xecnh\n')},  # cp1258
+            format='multipart')
+        self.assertEqual(call_view(StudentViewSet, 'import_csv', request).status_code, 400)
+
+    def test_stage_sql_mirrors_python_defaults(self):
+        _, columns = bulkio.student_stage_sql(['full_name', 'student_code', 'class_id'])
+        self.assertEqual(columns['"student_code"'], "btrim(COALESCE(c1, ''))")
+        self.assertEqual(columns['"email"'], 'NULL')
+        self.assertEqual(columns['"class_id"'], "NULLIF(btrim(c2), '')::uuid")
+        self.assertEqual(columns['"is_active"'], 'TRUE')
+        _, columns = bulkio.student_stage_sql(['student_code', 'is_active'])
+        self.assertEqual(columns['"is_active"'], "lower(btrim(COALESCE(c1, ''))) = 'true'")
+
+    @override_settings(BULK_COPY=True)
+    def test_copy_export(self):
+        cursor = FakeCopyCursor(copy_out=f'S1,,{self.cls.id},False\n'.encode())
+        with mock.patch.object(bulkio, 'connection', postgres(cursor)):
+            response = bulkio.export_csv('s.csv', ['student_code', 'email', 'class_id', 'is_active'],
+                                         Student.objects.all(), ['student_code', 'email', 'class_fk_id', 'is_active'])
+            body = b''.join(response.streaming_content)
+        self.assertEqual(cursor.statements[0], "SET LOCAL datestyle TO 'ISO, YMD'")
+        self.assertTrue(cursor.statements[1].startswith('COPY (SELECT'))
+        self.assertIn('NULLIF', cursor.statements[1])
+        # Same bytes as the Python path
+        python = b''.join(bulkio.export_csv('s.csv', ['student_code', 'email', 'class_id', 'is_active'],
+                                            Student.objects.all(),
+                                            ['student_code', 'email', 'class_fk_id', 'is_active']).streaming_content)
+        self.assertEqual(body, python)
+        self.assertEqual(list(csv.reader(io.StringIO(body.decode())))[1], ['S1', '', str(self.cls.id), 'False'])
+
+    def test_copy_line_ends(self):
+        # A quoted cell spans the blocks and holds a newline and an escaped quote
+        blocks = [b'S1,"line 1\n', b'""x""', b'\nline 2"\nS2,', b'B\n']
+        self.assertEqual(b''.join(bulkio.crlf_lines(blocks)), b'S1,"line 1\n""x""\nline 2"\r\nS2,B\r\n')
+
+    @override_settings(BULK_COPY=True)
+    def test_psycopg2_export_streams_rows(self):
+        # copy_expert returns only once the whole COPY is done: rows stream from a cursor instead
+        cursor = FakeCopyCursor(copy_out=b'unused\n')
+        fields = ['student_code', 'email', 'class_fk_id', 'is_active']
+        with mock.patch.object(bulkio, 'connection', postgres(cursor, 'psycopg2')):
+            body = b''.join(bulkio.csv_stream(['student_code', 'email', 'class_id', 'is_active'],
+                                              Student.objects.all(), fields))
+        self.assertEqual(cursor.statements, [])
+        self.assertEqual(body.decode().splitlines()[1], f'S1,,{self.cls.id},False')
+
+    @override_settings(BULK_COPY=True)
+    def test_copy_import(self):
+        body = f'student_code,full_name,class_id\nS1,A,{self.cls.id}\nS2,B,{self.cls.id}\n'.encode()
+        cursor = FakeCopyCursor(results=[(2, 0), [(str(self.cls.id), 1)], 1])
+        with mock.patch.object(bulkio, 'connection', postgres(cursor)):
+            report = bulkio.import_students(SimpleUploadedFile('s.csv', body))
+        self.assertEqual((report.created, report.skipped, report.failed), (1, 1, 0))
+        create, copy, check, capacity, insert = cursor.statements
+        self.assertTrue(create.startswith('CREATE TEMPORARY TABLE import_students_stage (c0 text, c1 text, c2 text)'))
+        self.assertEqual(copy, 'COPY import_students_stage FROM STDIN WITH (FORMAT csv)')
+        self.assertEqual(cursor.copied, f'S1,A,{self.cls.id}\nS2,B,{self.cls.id}\n'.encode())
+        self.assertIn("btrim(COALESCE(c0, '')) = ''", check)
+        self.assertIn('NOT EXISTS', capacity)
+        self.assertIn('ON CONFLICT DO NOTHING', insert)
+
+    @override_settings(BULK_COPY=True)
+    def test_copy_import_hands_rejected_rows_to_python(self):
+        body = (f'student_code,full_name,class_id\nS2,B,{self.cls.id}\nS3,C,{self.cls.id}\n'
+                f'S4,D,{self.cls.id}\n,E,\n').encode()
+        # An invalid row: nothing inserted through COPY, every row rerun one by one
+        cursor = FakeCopyCursor(results=[(4, 1)])
+        with mock.patch.object(bulkio, 'connection', postgres(cursor)):
+            report = bulkio.import_students(SimpleUploadedFile('s.csv', body))
+        self.assertFalse(any(s.startswith('INSERT') for s in cursor.statements))
+        self.assertEqual((report.created, report.failed), (2, 2))
+        self.assertEqual([error['row'] for error in report.as_dict()['errors']], [4, 5])
+        # A class that would overflow: same
+        cursor = FakeCopyCursor(results=[(1, 0), [(str(self.cls.id), 1)]])
+        with mock.patch.object(bulkio, 'connection', postgres(cursor)):
+            body = f'student_code,full_name,class_id\nS5,E,{self.cls.id}\n'.encode()
+            report = bulkio.import_students(SimpleUploadedFile('s.csv', body))
+        self.assertFalse(any(s.startswith('INSERT') for s in cursor.statements))
+        self.assertEqual((report.created, report.failed), (0, 1))
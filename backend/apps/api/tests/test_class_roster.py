@@ -0,0 +1,70 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.models import Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import ClassViewSet
+from apps.core_app.models import Profile
+
+
+class ClassRosterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher.id, max_students=40)
+        self.other = Class.objects.create(name='10A2', teacher_id=uuid.uuid4())
+        names = ['Trần Bình', 'Nguyễn An', 'Lê Cường', 'Phạm Dũng', 'Nguyễn Hùng']
+        for i, name in enumerate(names):
+            Student.objects.create(student_code=f'S{i}', full_name=name, class_fk=self.cls)
+        Student.objects.create(student_code='S9', full_name='Nghỉ học', class_fk=self.cls, is_active=False)
+        Student.objects.create(student_code='X1', full_name='Lớp khác', class_fk=self.other)
+
+    def get(self, query='', claims=None, pk=None):
+        pk = str(pk or self.cls.id)
+        request = api_request('get', f'/api/classes/{pk}/students/{query}', claims=claims)
+        with CaptureQueriesContext(connection) as ctx:
+            response = call_view(ClassViewSet, 'students', request, pk=pk)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_paginated_with_meta(self):
+        response, queries = self.get('?page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([s['full_name'] for s in response.data['results']], ['Lê Cường', 'Nghỉ học'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(response.data['meta'], {'enrolled': 5, 'max_students': 40, 'available': 35})
+        # table versions, class + meta, count, page
+        self.assertEqual(len(queries), 4)
+
+    def test_whole_class_without_page(self):
+        Student.objects.bulk_create(Student(student_code=f'B{i:03}', full_name=f'Bổ sung {i}', class_fk=self.cls)
+                                    for i in range(250))
+        response, queries = self.get('?fields=id,student_code')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 256)
+        # table versions, class + meta (scope check), the roster
+        self.assertEqual(len(queries), 3)
+
+    def test_search_ordering_and_fields(self):
+        response, _ = self.get('?search=nguyen&ordering=-student_code&fields=student_code,full_name')
+        self.assertEqual(response.data, [
+            {'student_code': 'S4', 'full_name': 'Nguyễn Hùng'},
+            {'student_code': 'S1', 'full_name': 'Nguyễn An'},
+        ])
+        response, _ = self.get('?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_scope(self):
+        teacher = {'sub': str(self.teacher.id)}
+        response, _ = self.get(claims=teacher)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        response, _ = self.get(claims=teacher, pk=self.other.id)
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.get('?page=1', pk=self.other.id)
+        self.assertEqual(response.data['meta'], {'enrolled': 1, 'max_students': None, 'available': None})
@@ -0,0 +1,108 @@
+import uuid
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from apps.api import versioning
+from apps.api.models import Attendance, Class, Student
+from apps.api.serializers import ClassSerializer
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+from apps.core_app.models import Profile
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher.id)
+        st = Student.objects.create(student_code='S1', full_name='HS 1', class_fk=self.cls)
+        Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, 1), status='present')
+
+    def get(self, viewset, url, action='list', claims=None, headers=None, **kwargs):
+        return call_view(viewset, action, api_request('get', url, claims=claims, **(headers or {})), **kwargs)
+
+    def test_matching_etag_gets_304_without_queries(self):
+        first = self.get(ClassViewSet, '/api/classes/?expand=teacher')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', first)
+        # Only the version counters are read
+        with self.assertNumQueries(1), mock.patch.object(ClassSerializer, 'to_representation') as serialize:
+            again = self.get(ClassViewSet, '/api/classes/?expand=teacher', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], etag)
+        serialize.assert_not_called()
+
+    def test_write_changes_etag(self):
+        etag = self.get(StudentViewSet, '/api/students/')['ETag']
+        Student.objects.create(student_code='S2', full_name='HS 2', class_fk=self.cls)
+        response = self.get(StudentViewSet, '/api/students/', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_expanded_profile_change_changes_etag(self):
+        url = '/api/classes/?expand=teacher'
+        etag = self.get(ClassViewSet, url)['ETag']
+        self.teacher.full_name = 'GV mới'
+        self.teacher.save()
+        self.assertEqual(self.get(ClassViewSet, url, headers={'HTTP_IF_NONE_MATCH': etag}).status_code, 200)
+        # Without expand=teacher, profile edits do not matter
+        etag = self.get(ClassViewSet, '/api/classes/')['ETag']
+        self.teacher.save()
+        self.assertEqual(self.get(ClassViewSet, '/api/classes/', headers={'HTTP_IF_NONE_MATCH': etag}).status_code, 304)
+
+    def test_etag_depends_on_caller_and_params(self):
+        admin = self.get(AttendanceViewSet, '/api/attendance/')['ETag']
+        teacher = self.get(AttendanceViewSet, '/api/attendance/', claims={'sub': str(self.teacher.id)})['ETag']
+        filtered = self.get(AttendanceViewSet, '/api/attendance/?status=late')['ETag']
+        self.assertEqual(len({admin, teacher, filtered}), 3)
+
+    def test_reports_and_if_modified_since(self):
+        first = self.get(AttendanceViewSet, '/api/attendance/reports/', action='reports')
+        self.assertEqual(first.status_code, 200)
+        again = self.get(AttendanceViewSet, '/api/attendance/reports/', action='reports',
+                         headers={'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']})
+        self.assertEqual(again.status_code, 304)
+        Attendance.objects.all().update(status='late')
+        Attendance.objects.first().save()
+        response = self.get(AttendanceViewSet, '/api/attendance/reports/', action='reports',
+                            headers={'HTTP_IF_NONE_MATCH': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['late'], 1)
+
+    def test_write_outside_django_changes_etag(self):
+        # Supabase clients and other workers write to the table directly: the triggers bump the version
+        etag = self.get(StudentViewSet, '/api/students/')['ETag']
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE students SET full_name = 'Đổi tên' WHERE student_code = 'S1'")
+        response = self.get(StudentViewSet, '/api/students/', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['full_name'], 'Đổi tên')
+
+
+class VersionBumpTests(TestCase):
+    def setUp(self):
+        self.cls = Class.objects.create(name='10A1')
+        self.student = Student.objects.create(student_code='S1', full_name='HS 1', class_fk=self.cls)
+
+    def test_save_bumps_once(self):
+        before = versioning.get_version('students')
+        self.student.save()
+        self.assertEqual(versioning.get_version('students'), before + 1)
+
+    def test_untriggered_table_bumped_once_on_commit(self):
+        versioning.drop_triggers(connection, ['students'])
+        self.addCleanup(versioning.install_triggers, connection)
+        self.assertNotIn('students', versioning.triggered_tables(connection))
+        before = versioning.get_version('students')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.student.save()
+            Student.objects.create(student_code='S2', full_name='HS 2', class_fk=self.cls)
+            self.assertEqual(versioning.get_version('students'), before)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(versioning.get_version('students'), before + 1)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.api import enrollment
+from apps.api.models import Attendance, Class, Student
+from apps.api.serializers import ClassSerializer
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import ClassViewSet, StudentViewSet
+
+
+class EnrollmentCountsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.a = Class.objects.create(name='10A1', max_students=3)
+        self.b = Class.objects.create(name='10A2')
+        students = [Student.objects.create(student_code=f'A{i}', full_name=f'HS {i}', class_fk=self.a) for i in range(3)]
+        Student.objects.create(student_code='A9', full_name='Nghỉ', class_fk=self.a, is_active=False)
+        Student.objects.create(student_code='B1', full_name='HS B', class_fk=self.b)
+        for st, status in zip(students, ['present', 'late', 'absent']):
+            Attendance.objects.create(student_fk=st, class_fk=self.a, date=self.today, status=status)
+        Attendance.objects.create(student_fk=students[0], class_fk=self.a, date=self.today - timedelta(days=1),
+                                  status='absent')
+
+    def call(self, viewset, url, action='list', method='get', **extra):
+        return call_view(viewset, action, api_request(method, url, **extra))
+
+    def test_list_with_counts_in_one_query(self):
+        with self.assertNumQueries(3):  # table versions + COUNT(*) + the annotated page
+            response = self.call(ClassViewSet, '/api/classes/?with=counts')
+        by_name = {c['name']: c['counts'] for c in response.data['results']}
+        self.assertEqual(by_name['10A1'], {
+            'students': 3, 'available': 0,
+            'attendance_today': {'date': self.today.isoformat(), 'present': 1, 'absent': 1, 'late': 1, 'excused': 0},
+        })
+        self.assertEqual(by_name['10A2']['students'], 1)
+        self.assertIsNone(by_name['10A2']['available'])
+        self.assertNotIn('counts', self.call(ClassViewSet, '/api/classes/').data['results'][0])
+
+    def test_serializer_without_view_context_counts_today(self):
+        cls = enrollment.annotate_counts(Class.objects.filter(pk=self.a.pk)).get()
+        counts = ClassSerializer(cls).data['counts']
+        self.assertEqual(counts['students'], 3)
+        self.assertEqual((counts['attendance_today']['date'], counts['attendance_today']['late']),
+                         (self.today.isoformat(), 1))
+
+    def test_attendance_write_invalidates_counts(self):
+        url = '/api/classes/?with=counts&fields=name'
+        etag = self.call(ClassViewSet, url)['ETag']
+        record = Attendance.objects.get(status='absent', date=self.today)
+        record.status = 'excused'
+        record.save()
+        response = self.call(ClassViewSet, url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['counts']['attendance_today']['excused'], 1)
+
+    def test_over_capacity(self):
+        self.assertEqual(enrollment.over_capacity({self.a.id: 1}),
+                         [{'class_id': str(self.a.id), 'max_students': 3, 'enrolled': 3, 'adding': 1}])
+        self.assertEqual(enrollment.over_capacity({self.b.id: 100, 'not-a-uuid': 1, None: 2}), [])
+
+    def test_create_rejected_when_class_full(self):
+        data = {'student_code': 'A5', 'full_name': 'HS 5', 'class_id': str(self.a.id)}
+        response = self.call(StudentViewSet, '/api/students/', 'create', 'post', data=data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('class_id', response.data)
+        response = self.call(StudentViewSet, '/api/students/', 'create', 'post',
+                             data={**data, 'is_active': False}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_import_fails_rows_when_class_full(self):
+        body = f'student_code,full_name,class_id\nB2,HS,{self.b.id}\nA7,HS,{self.a.id}\n'.encode()
+        upload = SimpleUploadedFile('s.csv', body, content_type='text/csv')
+        response = self.call(StudentViewSet, '/api/students/import/', 'import_csv', 'post',
+                             data={'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'], [{'row': 3, 'errors': {'class_id': ['Lớp đã đủ sĩ số tối đa.']}}])
+        self.assertTrue(Student.objects.filter(student_code='B2').exists())
+        self.assertFalse(Student.objects.filter(student_code='A7').exists())
@@ -0,0 +1,60 @@
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.expand import parse_expand
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+from apps.core_app.models import Profile
+
+
+class ExpandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.cls = Class.objects.create(name='10A1', grade='10', teacher_id=self.teacher.id)
+        other = Class.objects.create(name='10A2', grade='10')
+        for i in range(4):
+            st = Student.objects.create(student_code=f'S{i}', full_name=f'HS {i}', class_fk=other if i == 3 else self.cls)
+            for d in (1, 2):
+                Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, d), status='present')
+
+    def get(self, viewset, url, action='list', **kwargs):
+        request = api_request('get', url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = call_view(viewset, action, request, **kwargs)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_parse_expand(self):
+        self.assertEqual(parse_expand('student.class, class.teacher,'),
+                         {'student': {'class': {}}, 'class': {'teacher': {}}})
+
+    def test_nested_expand_costs_one_query_per_relation(self):
+        response, queries = self.get(AttendanceViewSet, '/api/attendance/?expand=student.class,class.teacher')
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertEqual(row['class']['teacher']['email'], 'gv@example.com')
+        self.assertIn(row['student']['class']['name'], ('10A1', '10A2'))
+        by_table = {table: sum(f'FROM "{table}"' in sql for sql in queries) for table in ('students', 'classes', 'profiles')}
+        # class rows loaded for student.class are reused for class: no second classes query
+        self.assertEqual(by_table, {'students': 1, 'classes': 1, 'profiles': 1})
+        self.assertFalse(any('JOIN' in sql for sql in queries if 'FROM "attendance"' in sql))
+
+    def test_ids_are_deduplicated(self):
+        _, queries = self.get(AttendanceViewSet, '/api/attendance/?expand=class')
+        class_queries = [sql for sql in queries if 'FROM "classes"' in sql]
+        self.assertEqual(len(class_queries), 1)
+        self.assertEqual(class_queries[0].count(str(self.cls.id).replace('-', '')), 1)
+
+    def test_student_and_class_expansion(self):
+        response, _ = self.get(StudentViewSet, '/api/students/?expand=class.teacher&ordering=student_code')
+        self.assertEqual(response.data['results'][0]['class']['teacher']['full_name'], 'GV')
+        self.assertIsNone(response.data['results'][3]['class']['teacher'])
+        response, _ = self.get(ClassViewSet, f'/api/classes/{self.cls.id}/?expand=teacher', action='retrieve',
+                               pk=str(self.cls.id))
+        self.assertEqual(response.data['teacher']['id'], self.teacher.id)
@@ -0,0 +1,145 @@
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.api import jobs
+from apps.api.models import Attendance, Class, ExportJob, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import ExportJobViewSet
+from apps.core_app.models import Profile
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        overrides = override_settings(EXPORT_ROOT=self.root, EXPORT_JOBS_EAGER=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher.id)
+        other = Class.objects.create(name='10A2')
+        for i, cls in enumerate([self.cls, self.cls, other]):
+            st = Student.objects.create(student_code=f'S{i}', full_name=f'HS {i}', class_fk=cls)
+            Attendance.objects.create(student_fk=st, class_fk=cls, date=date(2025, 9, 1 + i), status='present')
+
+    def call(self, method, action, data=None, claims=None, **kwargs):
+        request = api_request(method, '/api/exports/', data, claims=claims, format='json')
+        return call_view(ExportJobViewSet, action, request, **kwargs)
+
+    def download(self, job_id, claims=None):
+        response = self.call('get', 'download', claims=claims, pk=job_id)
+        return response, b''.join(response.streaming_content).decode() if response.status_code == 200 else None
+
+    def test_job_writes_artifact(self):
+        response = self.call('post', 'create', {'kind': 'attendance', 'start_date': '2025-09-02', 'ignored': 'x'})
+        self.assertEqual(response.status_code, 202)
+        job = response.data
+        self.assertEqual(job['params'], {'start_date': '2025-09-02'})
+        self.assertEqual((job['status'], job['rows_total'], job['rows_written'], job['progress']), ('done', 2, 2, 100.0))
+        status = self.call('get', 'retrieve', pk=job['id'])
+        self.assertTrue(status.data['download_url'].endswith(f'/api/exports/{job["id"]}/download/'))
+        response, body = self.download(job['id'])
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="attendance_export.csv"')
+        self.assertEqual(body.splitlines()[0], 'date,class_id,student_id,status,notes')
+        self.assertEqual(len(body.splitlines()), 3)
+
+    def test_identical_request_reuses_job_until_data_changes(self):
+        first = self.call('post', 'create', {'kind': 'students'}).data
+        again = self.call('post', 'create', {'kind': 'students'})
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], first['id'])
+        self.assertNotEqual(self.call('post', 'create', {'kind': 'students', 'class_id': str(self.cls.id)}).data['id'],
+                            first['id'])
+        Student.objects.create(student_code='S9', full_name='HS 9', class_fk=self.cls)
+        fresh = self.call('post', 'create', {'kind': 'students'})
+        self.assertEqual(fresh.status_code, 202)
+        self.assertEqual(fresh.data['rows_total'], 4)
+        # Writes that bypass Django (another worker, Supabase clients) count too
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE students SET full_name = 'Đổi tên' WHERE student_code = 'S9'")
+        self.assertNotEqual(self.call('post', 'create', {'kind': 'students'}).data['id'], fresh.data['id'])
+
+    def test_scope(self):
+        teacher = {'sub': str(self.teacher.id)}
+        job = self.call('post', 'create', {'kind': 'students'}, claims=teacher).data
+        self.assertEqual(job['rows_total'], 2)
+        self.assertEqual(self.call('get', 'retrieve', claims={'role': 'admin'}, pk=job['id']).status_code, 404)
+        self.assertEqual(self.call('post', 'create', {'kind': 'students'}).data['rows_total'], 3)
+        self.assertEqual(self.call('post', 'create', {'kind': 'grades'}).status_code, 400)
+
+    def test_pending_download_and_stale_job(self):
+        with override_settings(EXPORT_JOBS_EAGER=False), mock.patch.object(jobs, 'executor') as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            job = self.call('post', 'create', {'kind': 'classes'}).data
+        executor.return_value.submit.assert_called_once()
+        self.assertEqual(job['status'], 'pending')
+        response, _ = self.download(job['id'])
+        self.assertEqual(response.status_code, 409)
+        ExportJob.objects.filter(pk=job['id']).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.call('get', 'retrieve', pk=job['id']).data['status'], 'failed')
+        # A dead job is not reused
+        self.assertNotEqual(self.call('post', 'create', {'kind': 'classes'}).data['id'], job['id'])
+
+    def test_failed_job_and_cleanup(self):
+        with mock.patch('apps.api.bulkio.csv_stream', side_effect=RuntimeError('disk full')):
+            job = self.call('post', 'create', {'kind': 'classes'}).data
+        self.assertEqual((job['status'], job['error']), ('failed', 'disk full'))
+        done = self.call('post', 'create', {'kind': 'classes'}).data
+        ExportJob.objects.update(created_at=timezone.now() - timedelta(days=30))
+        call_command('export_jobs', 'cleanup', stdout=StringIO())
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(jobs.artifact_path(ExportJob(pk=done['id'])).exists())
+
+
+class ExportWorkerTests(TransactionTestCase):
+    """The worker against a committed job row, as on the export pool."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        overrides = override_settings(EXPORT_ROOT=self.root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        Class.objects.create(name='10A1')
+        self.job = ExportJob.objects.create(kind='classes', scope='admin', fingerprint='x')
+        self.old = timezone.now() - timedelta(hours=1)
+
+    def export(self, during):
+        def stream(*args):
+            yield b'name\n'
+            during()  # the export blocks on its next chunk
+            yield b'10A1\n'
+
+        with mock.patch.object(jobs, 'PROGRESS_INTERVAL', 0.05), mock.patch('apps.api.bulkio.csv_stream', stream):
+            jobs.run(self.job.pk, ['name'], Class.objects.all(), ['name'])
+        return ExportJob.objects.get(pk=self.job.pk)
+
+    def test_heartbeat_while_a_chunk_blocks(self):
+        def during():
+            ExportJob.objects.filter(pk=self.job.pk).update(updated_at=self.old)
+            time.sleep(0.3)
+            self.assertFalse(jobs.is_stale(ExportJob.objects.get(pk=self.job.pk)))
+
+        job = self.export(during)
+        self.assertEqual((job.status, job.rows_written), ('done', 1))
+
+    def test_job_marked_stale_stays_failed(self):
+        def during():
+            ExportJob.objects.filter(pk=self.job.pk).update(updated_at=self.old)
+            with override_settings(EXPORT_JOB_STALE_SECONDS=0):
+                jobs.mark_if_stale(ExportJob.objects.get(pk=self.job.pk))
+
+        job = self.export(during)
+        self.assertEqual((job.status, job.error), ('failed', jobs.STALE_ERROR))
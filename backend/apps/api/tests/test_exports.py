@@ -0,0 +1,77 @@
+import csv
+import io
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+
+from apps.api import exports
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1', grade='10')
+        self.students = [Student.objects.create(student_code=f'S{i}', full_name=f'Nguyễn {i}', class_fk=self.cls,
+                                                email=f's{i}@example.com') for i in range(5)]
+        for i, st in enumerate(self.students):
+            Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, 1) + timedelta(days=i),
+                                      status='present', notes='ghi chú, "có dấu"' if i == 0 else None)
+
+    def export(self, viewset, url, action):
+        response = call_view(viewset, action, api_request('get', url))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response, list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+    def test_exports_stream_csv(self):
+        response, rows = self.export(StudentViewSet, '/api/students/export', 'export')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="students_export.csv"')
+        self.assertEqual(rows[0], ['student_code', 'full_name', 'email', 'class_id', 'phone', 'is_active'])
+        self.assertEqual(sorted(r[0] for r in rows[1:]), [f'S{i}' for i in range(5)])
+        self.assertEqual(rows[1][3:], [str(self.cls.id), '', 'True'])
+
+        _, rows = self.export(ClassViewSet, '/api/classes/export', 'export')
+        self.assertEqual(rows[1][:3], [str(self.cls.id), '10A1', '10'])
+
+        _, rows = self.export(AttendanceViewSet, '/api/attendance/reports/export?start_date=2025-09-01&end_date=2025-09-02',
+                              'reports_export')
+        self.assertEqual(rows[1:], [
+            ['2025-09-02', str(self.cls.id), str(self.students[1].id), 'present', ''],
+            ['2025-09-01', str(self.cls.id), str(self.students[0].id), 'present', 'ghi chú, "có dấu"'],
+        ])
+
+    def test_chunks(self):
+        chunks = list(exports.csv_chunks(['a'], ([i] for i in range(5)), chunk_size=2))
+        self.assertEqual(chunks, ['a\r\n0\r\n1\r\n', '2\r\n3\r\n', '4\r\n'])
+
+    @override_settings(EXPORT_CHUNK_SIZE=500)
+    def test_export_memory_bounded(self):
+        # The attendance export endpoint over 50k stored rows
+        students = Student.objects.bulk_create(
+            Student(student_code=f'M{i}', full_name=f'HS {i}', class_fk=self.cls) for i in range(250))
+        start = date(2024, 1, 1)
+        Attendance.objects.bulk_create(
+            (Attendance(student_fk=st, class_fk=self.cls, date=start + timedelta(days=day), status='present')
+             for st in students for day in range(200)), batch_size=5000)
+
+        request = api_request('get', '/api/attendance/reports/export?start_date=2024-01-01&end_date=2024-12-31')
+        tracemalloc.start()
+        try:
+            response = call_view(AttendanceViewSet, 'reports_export', request)
+            total = lines = 0
+            for chunk in response.streaming_content:
+                total += len(chunk)
+                lines += chunk.count(b'\r\n')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, 50_001)
+        self.assertGreater(total, 4_500_000)
+        # The rows alone, fetched whole, would take several times ``total``; a
+        # stream holds one EXPORT_CHUNK_SIZE batch of them and its CSV text
+        self.assertLess(peak, total / 4)
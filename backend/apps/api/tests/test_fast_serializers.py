@@ -0,0 +1,78 @@
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.api import views
+from apps.api.fast_serializers import ValuesSerializer
+from apps.api.models import Attendance, Class, Student
+from apps.api.serializers import AttendanceSerializer, ClassSerializer, StudentSerializer
+from apps.api.tests.helpers import api_request, call_view
+
+
+class ValuesSerializerParityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1', grade='10', max_students=40, teacher_id=uuid.uuid4(),
+                                        created_at=datetime(2025, 8, 1, 0, 0, tzinfo=dt_timezone.utc))
+        Class.objects.create(name='10A2', is_active=False)
+        stamps = [None, datetime(2025, 9, 1, 7, 0, tzinfo=dt_timezone.utc),
+                  datetime(2025, 9, 1, 23, 59, 59, 123456, tzinfo=dt_timezone.utc)]
+        for i, stamp in enumerate(stamps):
+            st = Student.objects.create(
+                student_code=f'S{i}', full_name=f'Nguyễn Văn {i}', class_fk=self.cls if i else None,
+                user_id=uuid.uuid4() if i % 2 else None, date_of_birth=date(2010, 1, i + 1) if i else None,
+                email=f's{i}@example.com' if i else None, address='Số 1 "Tràng Tiền"\nHà Nội',
+                is_active=bool(i), created_at=stamp, updated_at=stamp)
+            if i:
+                Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, i), status='late',
+                                          notes=None if i == 1 else 'Đi muộn', created_at=stamp)
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def assert_parity(self, serializer_class, queryset, fields=None):
+        fast = ValuesSerializer.for_serializer(serializer_class, fields)
+        self.assertIsNotNone(fast)
+        slow = serializer_class(queryset, many=True, fields=fields).data
+        self.assertEqual(self.render(fast.serialize(fast.values(queryset))), self.render(slow))
+
+    def test_serializers_match_byte_for_byte(self):
+        self.assert_parity(StudentSerializer, Student.objects.all())
+        self.assert_parity(AttendanceSerializer, Attendance.objects.all())
+        self.assert_parity(ClassSerializer, Class.objects.all())
+        self.assert_parity(StudentSerializer, Student.objects.all(), fields=['id', 'full_name', 'created_at'])
+
+    def test_parity_in_another_time_zone(self):
+        with timezone.override('Asia/Ho_Chi_Minh'):
+            self.assert_parity(StudentSerializer, Student.objects.all())
+
+    def get(self, viewset, url, action='list', **kwargs):
+        return call_view(viewset, action, api_request('get', url), **kwargs).data
+
+    def test_endpoints_match_regular_serializers(self):
+        urls = [
+            (views.StudentViewSet, '/api/students/?expand=class'),
+            (views.StudentViewSet, '/api/students/?pagination=cursor&page_size=2&fields=full_name'),
+            (views.AttendanceViewSet, '/api/attendance/?ordering=date'),
+        ]
+        for viewset, url in urls:
+            fast = self.get(viewset, url)
+            with mock.patch.object(viewset, 'fast_list', False):
+                slow = self.get(viewset, url)
+            self.assertEqual(self.render(fast), self.render(slow), url)
+
+        url = f'/api/classes/{self.cls.id}/students/'
+        fast = self.get(views.ClassViewSet, url, action='students', pk=str(self.cls.id))
+        with mock.patch.object(views.ValuesSerializer, 'for_serializer', return_value=None):
+            slow = self.get(views.ClassViewSet, url, action='students', pk=str(self.cls.id))
+        self.assertEqual(self.render(fast), self.render(slow))
+
+    def test_list_skips_model_instances(self):
+        with mock.patch.object(Student, '__init__', side_effect=AssertionError('model instance built')):
+            data = self.get(views.StudentViewSet, '/api/students/')
+        self.assertEqual(len(data['results']), 3)
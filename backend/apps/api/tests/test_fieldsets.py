@@ -0,0 +1,66 @@
+from datetime import date, datetime, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1', grade='10', description='Lớp chọn')
+        stamp = datetime(2025, 9, 1, 7, 0, tzinfo=timezone.utc)
+        for i in range(3):
+            st = Student.objects.create(student_code=f'S{i}', full_name=f'HS {i}', class_fk=self.cls,
+                                        address='Hà Nội', created_at=stamp)
+            Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, 1),
+                                      status='present', notes='ok', created_at=stamp)
+
+    def get(self, viewset, url, action='list', **kwargs):
+        request = api_request('get', url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = call_view(viewset, action, request, **kwargs)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_fields_trims_output_and_select(self):
+        response, queries = self.get(StudentViewSet, '/api/students/?fields=id,student_code,full_name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'student_code', 'full_name'})
+        select = next(sql for sql in queries if 'FROM "students"' in sql and 'COUNT' not in sql)
+        self.assertNotIn('"address"', select)
+        self.assertNotIn('"emergency_contact"', select)
+
+    def test_omit_drops_fields(self):
+        response, queries = self.get(AttendanceViewSet, '/api/attendance/?omit=notes,subject_id')
+        row = response.data['results'][0]
+        self.assertNotIn('notes', row)
+        self.assertIn('student_id', row)
+        select = next(sql for sql in queries if 'FROM "attendance"' in sql and 'COUNT' not in sql)
+        self.assertNotIn('"notes"', select)
+
+    def test_unknown_field_is_400(self):
+        response, _ = self.get(ClassViewSet, '/api/classes/?fields=id,bogus')
+        self.assertEqual(response.status_code, 400)
+
+    def test_expand_keeps_the_id_it_reads(self):
+        response, _ = self.get(StudentViewSet, '/api/students/?fields=full_name&expand=class')
+        row = response.data['results'][0]
+        self.assertEqual(row['class']['name'], '10A1')
+        self.assertEqual(set(row), {'full_name', 'class_id', 'class'})
+
+    def test_cursor_page_does_not_load_deferred_keys(self):
+        response, queries = self.get(AttendanceViewSet, '/api/attendance/?pagination=cursor&fields=id,status&page_size=2')
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(queries), 2)  # table versions + the page
+
+    def test_class_students_roster(self):
+        response, queries = self.get(ClassViewSet, f'/api/classes/{self.cls.id}/students/?fields=id,student_code,full_name',
+                                     action='students', pk=str(self.cls.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([set(row) for row in response.data], [{'id', 'student_code', 'full_name'}] * 3)
+        self.assertNotIn('"address"', queries[-1])
@@ -0,0 +1,152 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from apps.api import imports, pipeline
+from apps.api.models import Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import ClassViewSet, StudentViewSet
+
+
+def upload(body):
+    return SimpleUploadedFile('import.csv', body.encode() if isinstance(body, str) else body)
+
+
+def post(viewset, url, data):
+    return call_view(viewset, 'import_csv', api_request('post', url, data, format='multipart'))
+
+
+@override_settings(BULK_COPY=False)
+class StreamingImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1')
+        Student.objects.create(student_code='S1', full_name='A', class_fk=self.cls)
+
+    def test_report_counts_and_row_errors(self):
+        body = ('student_code,full_name,email,class_id\n'
+                f'S1,Trùng,,{self.cls.id}\n'           # already in the table
+                'S2,Lê Văn B,b@example.com,\n'
+                ',Thiếu mã,,\n'
+                f'S3,"Tên\nhai dòng",,{self.cls.id}\n'
+                'S4,D,,not-a-uuid\n'
+                'S2,Lặp lại,,\n'                          # earlier in the file
+                'S5,E,,00000000-0000-0000-0000-000000000001\n')
+        with self.settings(IMPORT_BATCH_SIZE=2):
+            report = imports.import_file(upload(body), imports.StudentSink())
+        self.assertEqual((report.created, report.skipped, report.failed), (2, 2, 3))
+        self.assertEqual(report.as_dict()['errors'], [
+            {'row': 4, 'errors': {'student_code': ['Bắt buộc.']}},
+            {'row': 7, 'errors': {'class_id': ['UUID không hợp lệ.']}},
+            {'row': 9, 'errors': {'class_id': ['Lớp không tồn tại.']}},
+        ])
+        self.assertEqual(Student.objects.get(student_code='S3').full_name, 'Tên\nhai dòng')
+        self.assertEqual(Student.objects.get(student_code='S2').search_text, 's2 le van b b@example.com')
+
+    def test_created_counts_rows_dropped_by_conflicts(self):
+        # A row inserted concurrently after the duplicate check is skipped, not counted as created
+        with mock.patch.object(imports.StudentSink, 'stored', return_value={}):
+            report = imports.import_file(upload('student_code,full_name\nS1,A\nS9,B\n'), imports.StudentSink())
+        self.assertEqual((report.created, report.skipped), (1, 1))
+
+    def test_each_batch_commits_on_its_own(self):
+        body = 'student_code,full_name\n' + ''.join(f'B{i},HS {i}\n' for i in range(5))
+        with mock.patch.object(imports.StudentSink, 'write', autospec=True,
+                               side_effect=imports.StudentSink.write) as write, self.settings(IMPORT_BATCH_SIZE=2):
+            report = imports.import_file(upload(body), imports.StudentSink())
+        self.assertEqual([len(call.args[1]) for call in write.call_args_list], [2, 2, 1])
+        self.assertEqual(report.created, 5)
+
+    def test_undecodable_lines_fail_after_the_sniffed_start(self):
+        body = 'student_code,full_name\nS2,Bình\n'.encode() + b'S3,L\xea \xd0\xecnh\n'  # cp1258
+        with mock.patch.object(pipeline.sources, 'SNIFF_SIZE', 16):
+            report = imports.import_file(upload(body), imports.StudentSink())
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.assertEqual(report.errors, [{'row': 3, 'errors': {'row': ['Dòng không phải UTF-8.']}}])
+
+    def test_errors_listed_up_to_the_limit(self):
+        body = 'student_code,full_name\n' + ',x\n' * 3
+        with self.settings(IMPORT_MAX_ERRORS=2):
+            report = imports.import_file(upload(body), imports.StudentSink()).as_dict()
+        self.assertEqual((report['failed'], len(report['errors']), report['errors_truncated']), (3, 2, True))
+
+    def test_missing_columns_rejected(self):
+        response = post(StudentViewSet, '/api/students/import/', {'file': upload('student_code,name\nS2,B\n')})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['columns'], ['full_name'])
+        self.assertFalse(Student.objects.filter(student_code='S2').exists())
+
+    def test_class_import(self):
+        body = ('name,grade,max_students,teacher_id\n'
+                ' 11B1 ,11,40,\n'
+                'Thiếu sĩ số,11,bốn mươi,\n'
+                ',12,,\n')
+        response = post(ClassViewSet, '/api/classes/import/', {'file': upload(body)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([error['errors'] for error in response.data['errors']],
+                         [{'max_students': ['Phải là số nguyên.']}, {'name': ['Bắt buộc.']}])
+        self.assertEqual(Class.objects.get(name='11B1').max_students, 40)
+
+
+@override_settings(BULK_COPY=False)
+class UpsertImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.a = Class.objects.create(name='10A1', grade='10', max_students=1)
+        self.b = Class.objects.create(name='10A2', grade='10')
+        Student.objects.create(student_code='S1', full_name='Nguyen Van A', class_fk=self.b)
+        Student.objects.create(student_code='S2', full_name='Tran Thi B', class_fk=self.b, email='b@example.com')
+
+    def test_student_upsert_counts(self):
+        body = ('student_code,full_name,email,class_id\n'
+                f'S1,Nguyễn Văn A,,{self.b.id}\n'           # corrected name
+                f'S2,Tran Thi B,b@example.com,{self.b.id}\n'  # as stored
+                f'S3,Le Van C,,{self.b.id}\n'
+                'S3,Lê Văn C,,\n')                         # same file, later row wins
+        with mock.patch.object(Student.objects, 'bulk_create', wraps=Student.objects.bulk_create) as bulk_create:
+            report = imports.import_file(upload(body), imports.StudentSink('upsert')).as_dict()
+        self.assertEqual((report['inserted'], report['updated'], report['unchanged']), (1, 2, 1))
+        self.assertNotIn('S2', [obj.student_code for call in bulk_create.call_args_list for obj in call.args[0]])
+        self.assertEqual(bulk_create.call_args.kwargs['unique_fields'], ['student_code'])
+        s1 = Student.objects.get(student_code='S1')
+        self.assertEqual((s1.full_name, s1.search_text), ('Nguyễn Văn A', 's1 nguyen van a'))
+        s3 = Student.objects.get(student_code='S3')
+        self.assertEqual((s3.full_name, s3.class_fk_id), ('Lê Văn C', None))
+        self.assertEqual(Student.objects.count(), 3)
+
+    def test_upsert_keeps_columns_missing_from_the_file(self):
+        Student.objects.filter(student_code='S2').update(is_active=False)
+        body = 'student_code,full_name\nS2,Trần Thị B\n'
+        report = imports.import_file(upload(body), imports.StudentSink('upsert'))
+        self.assertEqual(report.updated, 1)
+        s2 = Student.objects.get(student_code='S2')
+        self.assertEqual((s2.full_name, s2.email, s2.class_fk_id, s2.is_active),
+                         ('Trần Thị B', 'b@example.com', self.b.id, False))
+        self.assertEqual(s2.search_text, 's2 tran thi b b@example.com')
+
+    def test_moving_into_a_full_class_fails(self):
+        Student.objects.create(student_code='S9', full_name='X', class_fk=self.a)
+        body = f'student_code,full_name,class_id\nS9,Y,{self.a.id}\nS1,Nguyen Van A,{self.a.id}\n'
+        report = imports.import_file(upload(body), imports.StudentSink('upsert'))
+        # S9 already holds its place; S1 would need a new one
+        self.assertEqual((report.updated, report.failed), (1, 1))
+        self.assertEqual(Student.objects.get(student_code='S1').class_fk_id, self.b.id)
+
+    def test_class_upsert_by_name_and_grade(self):
+        body = ('name,grade,max_students\n'
+                '10A1,10,35\n'
+                '10A2,10,\n'
+                '10A2,11,30\n')
+        response = post(ClassViewSet, '/api/classes/import/?mode=upsert', {'file': upload(body)})
+        self.assertEqual({k: response.data[k] for k in ('inserted', 'updated', 'unchanged')},
+                         {'inserted': 1, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(Class.objects.get(pk=self.a.pk).max_students, 35)
+        self.assertEqual(Class.objects.filter(name='10A2').count(), 2)
+
+    def test_unknown_mode_rejected(self):
+        response = post(StudentViewSet, '/api/students/import/',
+                        {'file': upload('student_code,full_name\n'), 'mode': 'replace'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, StudentViewSet
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cls = Class.objects.create(name='10A1')
+        stamp = datetime(2025, 9, 1, 7, 0, tzinfo=timezone.utc)
+        students = [Student.objects.create(student_code=f'S{i:02d}', full_name=f'HS {i}', class_fk=cls,
+                                           created_at=stamp if i % 3 else None) for i in range(9)]
+        # Many ties on date and created_at, some NULL created_at
+        for d in range(3):
+            for i, st in enumerate(students):
+                Attendance.objects.create(student_fk=st, class_fk=cls, date=date(2025, 9, 1) + timedelta(days=d),
+                                          status='present', created_at=stamp if i % 2 else None)
+
+    def get(self, viewset, url):
+        return call_view(viewset, 'list', api_request('get', url))
+
+    def walk(self, viewset, url):
+        ids, pages = [], 0
+        while url:
+            response = self.get(viewset, url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_attendance_cursor_visits_every_row_once_in_key_order(self):
+        expected = [str(pk) for pk in Attendance.objects.order_by('-date', '-created_at', '-id').values_list('id', flat=True)]
+        ids, pages = self.walk(AttendanceViewSet, '/api/attendance/?pagination=cursor&page_size=4')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 7)
+
+    def test_student_cursor_honours_ordering_param(self):
+        expected = [str(pk) for pk in Student.objects.order_by('full_name', 'id').values_list('id', flat=True)]
+        ids, _ = self.walk(StudentViewSet, '/api/students/?pagination=cursor&ordering=full_name&page_size=2')
+        self.assertEqual(ids, expected)
+
+    def test_student_cursor_default_key_with_null_created_at(self):
+        expected = [str(pk) for pk in Student.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        ids, _ = self.walk(StudentViewSet, '/api/students/?pagination=cursor&page_size=2')
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_the_preceding_page(self):
+        first = self.get(AttendanceViewSet, '/api/attendance/?pagination=cursor&page_size=5')
+        second = self.get(AttendanceViewSet, first.data['next'])
+        back = self.get(AttendanceViewSet, second.data['previous'])
+        self.assertEqual([r['id'] for r in back.data['results']], [r['id'] for r in first.data['results']])
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.get(AttendanceViewSet, '/api/attendance/?cursor=bogus').status_code, 404)
+
+    def test_page_number_without_count(self):
+        response = self.get(StudentViewSet, '/api/students/?count=false&page_size=4&page=2')
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(parse_qs(urlparse(response.data['next']).query)['page'], ['3'])
+        self.assertIsNotNone(response.data['previous'])
+        response = self.get(StudentViewSet, '/api/students/?count=false&page_size=4&page=3')
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,57 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.api.models import Class, Student
+from apps.api.principal import Principal
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+from apps.core_app.models import Profile
+
+
+class PrincipalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher.id)
+        other = Class.objects.create(name='10A2', teacher_id=uuid.uuid4())
+        Student.objects.create(student_code='S1', full_name='Nguyễn Văn A', class_fk=self.cls)
+        Student.objects.create(student_code='S2', full_name='Trần Thị B', class_fk=other)
+
+    def get(self, viewset, action, url, claims, **kwargs):
+        request = api_request('get', url, claims=claims, staff=False)
+        with CaptureQueriesContext(connection) as ctx:
+            response = call_view(viewset, action, request, **kwargs)
+        profile_queries = [q for q in ctx.captured_queries if '"profiles"' in q['sql']]
+        return response, profile_queries
+
+    def test_profile_prefers_sub_over_email(self):
+        Profile.objects.create(id=uuid.uuid4(), email='shared@example.com', full_name='X', role='student')
+        principal = Principal({'sub': str(self.teacher.id), 'email': 'shared@example.com'})
+        self.assertEqual(principal.profile.id, self.teacher.id)
+        self.assertEqual(principal.role, 'teacher')
+
+    def test_role_falls_back_to_claims(self):
+        self.assertEqual(Principal({'role': 'admin'}).role, 'admin')
+        self.assertEqual(Principal({'sub': 'not-a-uuid', 'user_metadata': {'role': 'student'}}).role, 'student')
+
+    def test_student_list_resolves_profile_once(self):
+        claims = {'sub': str(self.teacher.id), 'email': self.teacher.email}
+        response, profile_queries = self.get(StudentViewSet, 'list', '/api/students/', claims)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['student_code'] for s in response.data['results']], ['S1'])
+        self.assertEqual(len(profile_queries), 1)
+
+    def test_class_students_and_attendance_resolve_profile_once(self):
+        claims = {'sub': str(self.teacher.id)}
+        response, profile_queries = self.get(ClassViewSet, 'students', f'/api/classes/{self.cls.id}/students/',
+                                             claims, pk=str(self.cls.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(profile_queries), 1)
+        # Later requests reuse the shared profile cache
+        response, profile_queries = self.get(AttendanceViewSet, 'list', '/api/attendance/', claims)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(profile_queries), 0)
@@ -0,0 +1,78 @@
+import json
+import unittest
+import uuid
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from apps.api import renderers
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, StudentViewSet
+
+SAMPLE = {
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'date': date(2025, 9, 1),
+    'score': Decimal('8.50'),
+    'detail': gettext_lazy('Not found.'),
+    'name': 'Nguyễn Văn A',
+    'items': [1, 2.5, None, True],
+}
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cls = Class.objects.create(name='10A1')
+        st = Student.objects.create(student_code='S1', full_name='Nguyễn Văn A', class_fk=cls)
+        Attendance.objects.create(student_fk=st, class_fk=cls, date=date(2025, 9, 1), status='present')
+
+    def get(self, viewset, url, accept):
+        response = call_view(viewset, 'list', api_request('get', url, HTTP_ACCEPT=accept))
+        response.render()
+        return response
+
+    def test_orjson_matches_drf_json(self):
+        expected = JSONRenderer().render(SAMPLE)
+        self.assertEqual(json.loads(renderers.ORJSONRenderer().render(SAMPLE)), json.loads(expected))
+
+    def test_orjson_datetimes_match_drf_json(self):
+        Student.objects.update(created_at=datetime(2025, 9, 1, 7, 30, 15, 123456, tzinfo=timezone.utc))
+        data = {'students': list(Student.objects.values('student_code', 'created_at')), 'at': time(7, 30, 15, 123456)}
+        rendered = renderers.ORJSONRenderer().render(data)
+        self.assertEqual(rendered, JSONRenderer().render(data))
+        self.assertIn(b'"2025-09-01T07:30:15.123456Z"', rendered)
+
+    def test_json_list_payload(self):
+        response = self.get(AttendanceViewSet, '/api/attendance/?expand=student', 'application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        body = json.loads(response.content)
+        self.assertEqual(body['results'][0]['student']['full_name'], 'Nguyễn Văn A')
+        self.assertEqual(body['results'][0]['date'], '2025-09-01')
+
+    @unittest.skipIf(renderers.msgpack is None, 'msgpack not installed')
+    def test_msgpack_negotiated_and_round_trips(self):
+        json_response = self.get(StudentViewSet, '/api/students/', 'application/json')
+        response = self.get(StudentViewSet, '/api/students/', 'application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content), json.loads(json_response.content))
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+    @unittest.skipIf(renderers.msgpack is None, 'msgpack not installed')
+    def test_msgpack_bulk_write(self):
+        cls = Class.objects.get()
+        payload = {'student_code': 'S2', 'full_name': 'HS 2', 'class_id': str(cls.id)}
+        request = api_request('post', '/api/students/', renderers.msgpack.packb(payload),
+                              content_type='application/msgpack', HTTP_ACCEPT='application/msgpack')
+        response = call_view(StudentViewSet, 'create', request)
+        response.render()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(renderers.msgpack.unpackb(response.content)['student_code'], 'S2')
+
+    def test_malformed_body_is_400(self):
+        request = api_request('post', '/api/students/', b'{"student_code": ', content_type='application/json')
+        self.assertEqual(call_view(StudentViewSet, 'create', request).status_code, 400)
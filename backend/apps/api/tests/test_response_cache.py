@@ -0,0 +1,114 @@
+import uuid
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from apps.api import response_cache
+from apps.api.models import Attendance, Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+from apps.core_app.models import Profile
+
+TTLS = {'classes.list': 60, 'attendance.reports': 60, 'attendance.reports_timeseries': 60}
+
+
+@override_settings(RESPONSE_CACHE_TTLS=TTLS)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+        self.other = Profile.objects.create(id=uuid.uuid4(), email='gv2@example.com', full_name='GV2', role='teacher')
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher.id)
+        Class.objects.create(name='10A2', teacher_id=self.other.id)
+        st = Student.objects.create(student_code='S1', full_name='HS 1', class_fk=self.cls)
+        Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, 1), status='present')
+
+    def call(self, viewset, url, action='list', claims=None, method='get', **extra):
+        return call_view(viewset, action, api_request(method, url, claims=claims, **extra))
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.call(ClassViewSet, '/api/classes/?expand=teacher')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):  # the table versions, shared with the ETag
+            again = self.call(ClassViewSet, '/api/classes/?expand=teacher')
+        self.assertEqual(again['X-Cache'], 'HIT')
+        self.assertEqual(again.data, first.data)
+        self.assertEqual(again.data['results'][0]['teacher']['full_name'], 'GV')
+
+    def test_write_outside_django_invalidates(self):
+        self.call(ClassViewSet, '/api/classes/')
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE classes SET name = '10B1' WHERE name = '10A1'")
+        response = self.call(ClassViewSet, '/api/classes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('10B1', [row['name'] for row in response.data['results']])
+
+    def test_reports_cached_per_params(self):
+        url = '/api/attendance/reports/?class_id=%s' % self.cls.id
+        self.assertEqual(self.call(AttendanceViewSet, url, 'reports')['X-Cache'], 'MISS')
+        self.assertEqual(self.call(AttendanceViewSet, url, 'reports')['X-Cache'], 'HIT')
+        self.assertEqual(self.call(AttendanceViewSet, url + '&status=late', 'reports')['X-Cache'], 'MISS')
+
+    def test_writes_invalidate(self):
+        self.call(ClassViewSet, '/api/classes/')
+        Class.objects.create(name='10A3')
+        response = self.call(ClassViewSet, '/api/classes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 3)
+
+        url = '/api/attendance/reports/'
+        self.assertEqual(self.call(AttendanceViewSet, url, 'reports').data['total'], 1)
+        st = Student.objects.create(student_code='S2', full_name='HS 2', class_fk=self.cls)
+        Attendance.objects.create(student_fk=st, class_fk=self.cls, date=date(2025, 9, 1), status='absent')
+        self.assertEqual(self.call(AttendanceViewSet, url, 'reports').data['total'], 2)
+
+    def test_import_invalidates(self):
+        self.call(ClassViewSet, '/api/classes/')
+        upload = SimpleUploadedFile('c.csv', b'name,grade\n11B1,11\n', content_type='text/csv')
+        self.call(ClassViewSet, '/api/classes/import/', 'import_csv', method='post',
+                  data={'file': upload}, format='multipart')
+        response = self.call(ClassViewSet, '/api/classes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 3)
+
+        self.call(StudentViewSet, '/api/students/')  # students are not behind classes.list
+        self.call(ClassViewSet, '/api/classes/')
+        upload = SimpleUploadedFile('s.csv', b'student_code,full_name\nS9,HS 9\n', content_type='text/csv')
+        self.call(StudentViewSet, '/api/students/import/', 'import_csv', method='post',
+                  data={'file': upload}, format='multipart')
+        self.assertEqual(self.call(ClassViewSet, '/api/classes/')['X-Cache'], 'MISS')
+
+    def test_scopes_do_not_share_entries(self):
+        teacher = {'sub': str(self.teacher.id)}
+        self.call(ClassViewSet, '/api/classes/')
+        mine = self.call(ClassViewSet, '/api/classes/', claims=teacher)
+        self.assertEqual(mine['X-Cache'], 'MISS')
+        self.assertEqual([c['name'] for c in mine.data['results']], ['10A1'])
+        other = self.call(ClassViewSet, '/api/classes/', claims={'sub': str(self.other.id)})
+        self.assertEqual([c['name'] for c in other.data['results']], ['10A2'])
+        # Managers see the same rows, so they share the admin's entry
+        self.assertEqual(self.call(ClassViewSet, '/api/classes/', claims={'role': 'manager'})['X-Cache'], 'HIT')
+
+    def test_unknown_caller_and_zero_ttl_bypass(self):
+        response = self.call(ClassViewSet, '/api/classes/', claims={'sub': str(uuid.uuid4())})
+        self.assertNotIn('X-Cache', response)
+        with override_settings(RESPONSE_CACHE_TTLS={**TTLS, 'classes.list': 0}):
+            self.call(ClassViewSet, '/api/classes/')
+            self.assertNotIn('X-Cache', self.call(ClassViewSet, '/api/classes/'))
+
+    def test_stats_and_command(self):
+        for _ in range(3):
+            self.call(ClassViewSet, '/api/classes/')
+        row = response_cache.stats()['classes.list']
+        self.assertEqual((row['hits'], row['misses'], row['ttl']), (2, 1, 60))
+        out = StringIO()
+        call_command('response_cache', 'stats', '--reset-stats', stdout=out)
+        self.assertIn('classes.list: hits=2 misses=1', out.getvalue())
+        self.assertEqual(response_cache.stats()['classes.list']['hits'], 0)
+        call_command('response_cache', 'invalidate', '--table', 'classes', stdout=StringIO())
+        self.assertEqual(self.call(ClassViewSet, '/api/classes/')['X-Cache'], 'MISS')
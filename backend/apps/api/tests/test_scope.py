@@ -0,0 +1,41 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from apps.api import scope
+from apps.api.models import Class, Student
+
+
+class ScopeSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_id = uuid.uuid4()
+        self.cls = Class.objects.create(name='10A1', teacher_id=self.teacher_id)
+
+    def test_teacher_scope_is_cached_until_classes_change(self):
+        self.assertEqual(scope.teacher_class_ids(self.teacher_id), [self.cls.id])
+        with self.assertNumQueries(1):  # the classes version
+            self.assertEqual(scope.teacher_class_ids(self.teacher_id), [self.cls.id])
+        other = Class.objects.create(name='10A2', teacher_id=uuid.uuid4())
+        other.teacher_id = self.teacher_id
+        other.save()
+        self.assertCountEqual(scope.teacher_class_ids(self.teacher_id), [self.cls.id, other.id])
+
+    def test_write_outside_django_rebuilds_the_scope(self):
+        # Another worker, or a client writing to Supabase directly
+        self.assertEqual(scope.teacher_class_ids(self.teacher_id), [self.cls.id])
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE classes SET teacher_id = NULL')
+        self.assertEqual(scope.teacher_class_ids(self.teacher_id), [])
+
+    def test_student_scope_follows_class_transfer(self):
+        user_id = uuid.uuid4()
+        student = Student.objects.create(student_code='S1', full_name='A', user_id=user_id, class_fk=self.cls)
+        lookup = {'user_id': user_id}
+        self.assertEqual(scope.student_scope(lookup), {'student_ids': [student.id], 'class_ids': [self.cls.id]})
+        new_cls = Class.objects.create(name='11A1')
+        student.class_fk = new_cls
+        student.save()
+        self.assertEqual(scope.student_scope(lookup)['class_ids'], [new_cls.id])
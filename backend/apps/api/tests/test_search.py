@@ -0,0 +1,134 @@
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.api import search
+from apps.api.models import Class, Student
+from apps.api.tests.helpers import api_request, call_view
+from apps.api.views import StudentViewSet
+from apps.core_app.models import Profile
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cls = Class.objects.create(name='10A1')
+        for code, name, email in [
+            ('HS001', 'Nguyễn Văn Hùng', 'hung@example.com'),
+            ('HS002', 'Trần Thị Ngọc Ánh', None),
+            ('HS003', 'Đặng Hùng Dũng', None),
+            ('HS004', 'Lê Nguyên', None),
+        ]:
+            Student.objects.create(student_code=code, full_name=name, email=email, class_fk=self.cls)
+
+    def call(self, method, url, action, data=None, **extra):
+        return call_view(StudentViewSet, action, api_request(method, url, data, **extra))
+
+    def names(self, query):
+        response = self.call('get', '/api/students/', 'list', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['full_name'] for row in response.data['results']]
+
+    def test_normalize(self):
+        self.assertEqual(search.normalize('Đặng Thị Ánh'), 'dang thi anh')
+        self.assertEqual(Student.objects.get(student_code='HS001').search_text, 'hs001 nguyen van hung hung@example.com')
+
+    def test_search_ignores_diacritics_and_case(self):
+        self.assertEqual(self.names('nguyen van'), ['Nguyễn Văn Hùng'])
+        self.assertEqual(self.names('ANH'), ['Trần Thị Ngọc Ánh'])
+        self.assertEqual(self.names('dang'), ['Đặng Hùng Dũng'])
+        self.assertEqual(len(self.names('hs00')), 4)
+
+    def test_results_ranked_by_relevance(self):
+        # "hung" appears twice in HS001 (name and email), once in HS003
+        self.assertEqual(self.names('hung'), ['Nguyễn Văn Hùng', 'Đặng Hùng Dũng'])
+        response = self.call('get', '/api/students/', 'list', {'search': 'hung', 'ordering': 'student_code'})
+        self.assertEqual([r['student_code'] for r in response.data['results']], ['HS001', 'HS003'])
+
+    def test_index_follows_updates_and_deletes(self):
+        student = Student.objects.get(student_code='HS004')
+        student.full_name = 'Lê Thị Hoa'
+        student.save(update_fields=['full_name'])
+        self.assertEqual(self.names('hoa'), ['Lê Thị Hoa'])
+        self.assertEqual(self.names('nguyen'), ['Nguyễn Văn Hùng'])
+        student.delete()
+        self.assertEqual(self.names('hoa'), [])
+
+    def test_csv_import_is_searchable(self):
+        upload = SimpleUploadedFile('students.csv', 'student_code,full_name\nHS100,Phạm Quỳnh Như\n'.encode('utf-8'))
+        response = self.call('post', '/api/students/import/', 'import_csv', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(self.names('quynh nhu'), ['Phạm Quỳnh Như'])
+
+    def test_rebuild_command_restores_column(self):
+        Student.objects.update(search_text=None)
+        self.assertEqual(self.names('nguyen'), [])
+        call_command('search_index', 'rebuild', stdout=StringIO())
+        self.assertEqual(set(self.names('nguyen')), {'Nguyễn Văn Hùng', 'Lê Nguyên'})
+
+    def test_fallback_without_fts(self):
+        with mock.patch.dict(search._index_state, {'default': False}):
+            self.assertEqual(self.names('nguyen van'), ['Nguyễn Văn Hùng'])
+            self.assertEqual(set(self.names('hung')), {'Nguyễn Văn Hùng', 'Đặng Hùng Dũng'})
+
+    def test_same_matches_with_and_without_fts(self):
+        # Word prefixes on every backend: FTS5 on SQLite, the regex on PostgreSQL and the fallback
+        Student.objects.create(student_code='SV-7', full_name='Phạm An', email='an.pham@truong.edu.vn', class_fk=self.cls)
+        queries = ['nguy', 'guyen', 'hung', 'ung', 'hs00', 's00', 'example', 'xample', 'van hung', 'hung van',
+                   'truong edu', 'pham', 'sv 7', 'an.pham', 'n.pham', 'ngoc anh', 'zzz']
+        with_fts = {query: sorted(self.names(query)) for query in queries}
+        with mock.patch.dict(search._index_state, {'default': False}):
+            without = {query: sorted(self.names(query)) for query in queries}
+        self.assertEqual(with_fts, without)
+        self.assertEqual(with_fts['guyen'], [])
+        self.assertEqual(with_fts['nguy'], ['Lê Nguyên', 'Nguyễn Văn Hùng'])
+        self.assertEqual(with_fts['example'], ['Nguyễn Văn Hùng'])
+
+    def test_search_with_cursor_pagination(self):
+        # Relevance has no key a cursor could resume from
+        response = self.call('get', '/api/students/', 'list', {'search': 'hs00', 'pagination': 'cursor', 'page_size': 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+        response = self.call('get', '/api/students/', 'list',
+                             {'search': 'hs00', 'ordering': 'student_code', 'pagination': 'cursor', 'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+
+
+class StudentSuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_id = uuid.uuid4()
+        mine = Class.objects.create(name='10A1', teacher_id=self.teacher_id)
+        other = Class.objects.create(name='10A2')
+        Profile.objects.create(id=self.teacher_id, email='gv@example.com', full_name='GV', role='teacher')
+        Student.objects.create(student_code='HS010', full_name='Nguyễn Văn Hùng', class_fk=mine)
+        Student.objects.create(student_code='HS011', full_name='Hứa Thị Lan', class_fk=mine)
+        Student.objects.create(student_code='HS020', full_name='Hùng Mạnh', class_fk=other)
+
+    def suggest(self, params, claims=None):
+        request = api_request('get', '/api/students/suggest/', params, claims=claims, staff=False)
+        response = call_view(StudentViewSet, 'suggest', request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_code_prefix_comes_first_and_is_case_insensitive(self):
+        data = self.suggest({'q': 'hs01'})
+        self.assertEqual([r['student_code'] for r in data], ['HS010', 'HS011'])
+        self.assertEqual(set(data[0]), {'id', 'student_code', 'full_name'})
+
+    def test_name_prefix_without_diacritics(self):
+        self.assertEqual({r['student_code'] for r in self.suggest({'q': 'hun'})}, {'HS010', 'HS020'})
+        self.assertEqual(len(self.suggest({'q': 'hung', 'limit': 1})), 1)
+
+    def test_limited_to_callers_scope(self):
+        data = self.suggest({'q': 'hung'}, claims={'sub': str(self.teacher_id)})
+        self.assertEqual([r['student_code'] for r in data], ['HS010'])
+
+    def test_empty_query(self):
+        self.assertEqual(self.suggest({'q': ' '}), [])
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StudentViewSet, ClassViewSet, AttendanceViewSet
+from .views import StudentViewSet, ClassViewSet, AttendanceViewSet, ExportJobViewSet
 
 router = DefaultRouter()
 router.register(r'students', StudentViewSet, basename='student')
 router.register(r'classes', ClassViewSet, basename='class')
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
+router.register(r'exports', ExportJobViewSet, basename='export')
 
 urlpatterns = [
     path('', include(router.urls)),
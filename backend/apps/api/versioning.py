@@ -0,0 +1,190 @@
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+
+from .models import TableVersion
+
+# Per-table version counters kept in the database (table_versions). Any write to
+# a table bumps its version, which retires every cache entry (scope sets, ETags,
+# responses) built on it. The counters are bumped by triggers on the tables
+# themselves, so writes from other workers and hosts, raw SQL, and clients that
+# write to Supabase directly (the import scripts, the frontend) retire them too;
+# a per-process cache would miss all of those. touched() covers the tables a
+# trigger could not be installed on.
+TABLES = ('students', 'classes', 'attendance', 'profiles')
+
+# PostgreSQL: the UPDATE holds the counter row until the writing transaction
+# commits, so it is deferred to commit time and done once per table and
+# transaction (the transaction id is remembered in a transaction-local setting).
+# Writers to one table then queue only for the commit itself, not for the whole
+# of a long transaction such as an import batch. Constraint triggers are row
+# triggers; TRUNCATE gets a statement trigger.
+POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('table_versions.' || TG_TABLE_NAME, true) IS DISTINCT FROM txid_current()::text THEN
+        PERFORM set_config('table_versions.' || TG_TABLE_NAME, txid_current()::text, true);
+        UPDATE table_versions SET version = version + 1, modified = extract(epoch FROM clock_timestamp())
+        WHERE "table" = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+POSTGRES_TRIGGERS = ("""
+CREATE CONSTRAINT TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table}
+DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION bump_table_version()
+""", """
+CREATE TRIGGER {table}_version_truncate AFTER TRUNCATE ON {table}
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+""")
+POSTGRES_TRIGGER_NAMES = ('{table}_version', '{table}_version_truncate')
+# SQLite has row triggers only (and a single writer anyway)
+SQLITE_TRIGGER = """
+CREATE TRIGGER {table}_version_{event} AFTER {event} ON {table} BEGIN
+    UPDATE table_versions SET version = version + 1, modified = (julianday('now') - 2440587.5) * 86400.0
+    WHERE "table" = '{table}';
+END
+"""
+SQLITE_EVENTS = ('insert', 'update', 'delete')
+
+# alias -> tables that carry triggers, read once per process
+_triggered = {}
+
+
+def install_triggers(connection, tables=TABLES):
+    """Create the version triggers on those of ``tables`` that exist; returns them."""
+    _triggered.pop(connection.alias, None)
+    existing = set(connection.introspection.table_names())
+    if TableVersion._meta.db_table not in existing:
+        return []
+    tables = [table for table in tables if table in existing]
+    with connection.cursor() as cursor:
+        # The triggers only update counters: seed them (as _rows does) first
+        for table in tables:
+            cursor.execute('INSERT INTO table_versions ("table", version, modified) SELECT %s, %s, %s '
+                           'WHERE NOT EXISTS (SELECT 1 FROM table_versions WHERE "table" = %s)',
+                           [table, time.time_ns(), time.time(), table])
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRES_FUNCTION)
+            for table in tables:
+                for name, trigger in zip(POSTGRES_TRIGGER_NAMES, POSTGRES_TRIGGERS):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {name.format(table=table)} ON {table}')
+                    cursor.execute(trigger.format(table=table))
+        elif connection.vendor == 'sqlite':
+            for table in tables:
+                for event in SQLITE_EVENTS:
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {table}_version_{event}')
+                    cursor.execute(SQLITE_TRIGGER.format(table=table, event=event))
+        else:
+            return []
+    return tables
+
+
+def drop_triggers(connection, tables=TABLES):
+    _triggered.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            existing = set(connection.introspection.table_names())
+            for table in tables:
+                if table in existing:
+                    for name in POSTGRES_TRIGGER_NAMES:
+                        cursor.execute(f'DROP TRIGGER IF EXISTS {name.format(table=table)} ON {table}')
+            cursor.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+        elif connection.vendor == 'sqlite':
+            for table in tables:
+                for event in SQLITE_EVENTS:
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {table}_version_{event}')
+
+
+def triggered_tables(connection) -> frozenset:
+    """Tables whose writes bump their version in the database."""
+    tables = _triggered.get(connection.alias)
+    if tables is None:
+        if connection.vendor == 'postgresql':
+            sql = ("SELECT c.relname FROM pg_trigger t JOIN pg_class c ON c.oid = t.tgrelid "
+                   "WHERE t.tgname = c.relname || '_version'")
+        elif connection.vendor == 'sqlite':
+            sql = "SELECT tbl_name FROM sqlite_master WHERE type = 'trigger' AND name = tbl_name || '_version_insert'"
+        else:
+            sql = None
+        tables = frozenset()
+        if sql:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                tables = frozenset(row[0] for row in cursor.fetchall())
+        _triggered[connection.alias] = tables
+    return tables
+
+
+def _rows(tables):
+    rows = {table: (version, modified) for table, version, modified
+            in TableVersion.objects.filter(table__in=tables).values_list('table', 'version', 'modified')}
+    missing = [table for table in tables if table not in rows]
+    if missing:
+        # Seed from the clock so a recreated counter never reuses an old version number
+        TableVersion.objects.bulk_create(
+            [TableVersion(table=table, version=time.time_ns(), modified=time.time()) for table in missing],
+            ignore_conflicts=True)
+        rows.update((table, (version, modified)) for table, version, modified
+                    in TableVersion.objects.filter(table__in=missing).values_list('table', 'version', 'modified'))
+    return rows
+
+
+def state(*tables):
+    """(versions, last modified) of ``tables``: get_versions and last_modified in one query."""
+    rows = _rows(tables)
+    modified = max(modified for _, modified in rows.values()) if rows else None
+    return tuple(rows[table][0] for table in tables), modified
+
+
+def get_versions(*tables) -> tuple:
+    """Current version of each table, in the order given (one query)."""
+    rows = _rows(tables)
+    return tuple(rows[table][0] for table in tables)
+
+
+def get_version(table: str) -> int:
+    return get_versions(table)[0]
+
+
+def last_modified(*tables):
+    """Unix time of the latest write among ``tables`` (None without tables)."""
+    return state(*tables)[1]
+
+
+def bump(*tables) -> None:
+    updated = TableVersion.objects.filter(table__in=tables).update(version=F('version') + 1, modified=time.time())
+    if updated < len(set(tables)):
+        _rows(tables)  # seeded counters are new versions already
+
+
+class _Bump:
+    """on_commit callback bumping every table touched in the transaction once."""
+
+    def __init__(self):
+        self.tables = set()
+
+    def __call__(self):
+        bump(*sorted(self.tables))
+
+
+def touched(*tables, using=DEFAULT_DB_ALIAS) -> None:
+    """Record a write to ``tables`` from Django.
+
+    Tables with triggers are bumped by the database already. The others are
+    bumped once per transaction, after it commits, so no writer holds the
+    counter row for the length of its transaction.
+    """
+    connection = connections[using]
+    tables = set(tables) - triggered_tables(connection)
+    if not tables:
+        return
+    pending = next((func for _, func, _ in connection.run_on_commit if isinstance(func, _Bump)), None)
+    if pending is None:
+        pending = _Bump()
+        pending.tables.update(tables)
+        transaction.on_commit(pending, using=using)
+    else:
+        pending.tables.update(tables)
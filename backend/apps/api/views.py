@@ -1,117 +1,114 @@
-from rest_framework import viewsets, filters
+from rest_framework import filters, mixins, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.http import HttpResponse
-import csv
-import uuid
-from django.db.models import Subquery, Count
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.db import IntegrityError, transaction
-from .models import Student, Class
-from .serializers import StudentSerializer, ClassSerializer, AttendanceSerializer
-from .permissions import IsTeacherOrReadOnly, IsTeacher, get_role_from_request
-from apps.core_app.models import Profile
+from django.http import FileResponse
+from .models import Student, Class, ExportJob
+from .serializers import StudentSerializer, ClassSerializer, AttendanceSerializer, ExportJobSerializer
+from .permissions import IsTeacherOrReadOnly, IsTeacher
+from .conditional import ConditionalGetMixin
+from .expand import CLASS, STUDENT, TEACHER, ExpandMixin, Relation
+from .fast_serializers import FastListMixin, ValuesSerializer, order_columns
+from .fieldsets import SparseFieldsetMixin, parse_field_list
+from .bulkio import CsvExportMixin
+from .pagination import KeysetOptInMixin, StandardPagination
+from .principal import get_principal
+from .response_cache import cache_response
+from . import bulkio, enrollment, imports, jobs, pipeline, search
+from .search import StudentSearchFilter
 from .models import Attendance
 
-class StudentViewSet(viewsets.ModelViewSet):
+
+def import_response(request, run):
+    """Run ``run(file, mode)`` on the upload (CSV, XLSX or JSON): the row report, or 400 when it is unusable."""
+    file = request.FILES.get('file')
+    if not file:
+        return Response({'detail': 'Thiếu file CSV/XLSX/JSON (multipart/form-data, field name: file).'}, status=400)
+    # mode=insert (default: existing keys are skipped) or mode=upsert (they are updated)
+    mode = request.query_params.get('mode') or request.data.get('mode') or 'insert'
+    if mode not in imports.MODES:
+        return Response({'detail': 'mode phải là insert hoặc upsert.'}, status=400)
+    try:
+        report = run(file, mode)
+    except UnicodeDecodeError:
+        return Response({'detail': 'File CSV/JSON phải dùng encoding UTF-8.'}, status=400)
+    except imports.MissingColumns as exc:
+        return Response({'detail': 'Thiếu cột bắt buộc.', 'columns': exc.columns}, status=400)
+    except pipeline.InvalidFile as exc:
+        return Response({'detail': str(exc)}, status=400)
+    return Response(report.as_dict())
+
+
+class StudentViewSet(ConditionalGetMixin, ExpandMixin, FastListMixin, SparseFieldsetMixin, KeysetOptInMixin,
+                     CsvExportMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsTeacherOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['full_name', 'student_code', 'email']
+    # Search runs last so it can order by relevance when no ?ordering= is given
+    filter_backends = [filters.OrderingFilter, StudentSearchFilter]
     ordering_fields = ['created_at', 'full_name', 'student_code']
     ordering = ['-created_at']
+    # ?cursor= / ?pagination=cursor switches to keyset pagination on this key
+    keyset_ordering = ['-created_at', '-id']
+    expand_relations = {'class': Relation('class_id', CLASS)}
+    # Teacher scope comes from classes, hence both tables
+    conditional_actions = ('list', 'retrieve', 'suggest')
+    etag_tables = ('students', 'classes')
+    export_filename = 'students_export.csv'
+    export_columns = [('student_code', 'student_code'), ('full_name', 'full_name'), ('email', 'email'),
+                      ('class_id', 'class_fk_id'), ('phone', 'phone'), ('is_active', 'is_active')]
+    export_filters = ('class_id',)
+
+    def perform_create(self, serializer):
+        class_id = serializer.validated_data.get('class_fk_id')
+        if class_id and serializer.validated_data.get('is_active', True) and enrollment.over_capacity({class_id: 1}):
+            raise ValidationError({'class_id': ['Lớp đã đủ sĩ số tối đa.']})
+        super().perform_create(serializer)
 
     @action(detail=False, methods=['get'], url_path='export')
     def export(self, request):
+        return self.export_response(request.query_params)
+
+    def export_queryset(self, params):
         qs = self.get_queryset()
-        class_id = request.query_params.get('class_id')
+        class_id = params.get('class_id')
         if class_id:
             qs = qs.filter(class_fk_id=class_id)
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="students_export.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['student_code','full_name','email','class_id','phone','is_active'])
-        for row in qs.values_list('student_code','full_name','email','class_fk_id','phone','is_active'):
-            writer.writerow(row)
-        return response
+        return qs
+
+    @action(detail=False, methods=['get'], url_path='suggest')
+    def suggest(self, request):
+        # Type-ahead: top-k {id, student_code, full_name} by code or name prefix, within the caller's scope
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return Response(search.suggest(self.get_queryset(), request.query_params.get('q'), limit))
 
     @action(detail=False, methods=['post'], url_path='import')
     def import_csv(self, request):
-        file = request.FILES.get('file')
-        if not file:
-            return Response({'detail': 'Thiếu file CSV (multipart/form-data, field name: file).'}, status=400)
-        decoded = file.read().decode('utf-8').splitlines()
-        reader = csv.DictReader(decoded)
-        created = 0
-        rows = []
-        for r in reader:
-            try:
-                rows.append(Student(
-                    id=uuid.uuid4(),
-                    student_code=r.get('student_code'),
-                    full_name=r.get('full_name'),
-                    email=r.get('email') or None,
-                    class_fk_id=r.get('class_id') or None,
-                    phone=r.get('phone') or None,
-                    is_active=(r.get('is_active','true').lower() == 'true')
-                ))
-            except Exception:
-                continue
-        if rows:
-            # Ignore conflicts on unique student_code
-            Student.objects.bulk_create(rows, ignore_conflicts=True)
-            created = len(rows)
-        return Response({'created': created})
-
-    def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        expand_param = request.query_params.get('expand') or ''
-        expand = set([e.strip() for e in expand_param.split(',') if e.strip()])
-        if not expand:
-            return response
-        data = response.data
-        items = data['results'] if isinstance(data, dict) and 'results' in data else data
-        if not isinstance(items, list):
-            return response
-        if 'class' in expand:
-            class_ids = {str(it.get('class_id')) for it in items if it.get('class_id')}
-            c_map = {str(c['id']): c for c in Class.objects.filter(id__in=class_ids).values('id','name','grade')}
-            for it in items:
-                it['class'] = c_map.get(str(it.get('class_id')))
-        response.data = data
-        return response
+        # COPY into a staging table on PostgreSQL, streamed batches elsewhere
+        return import_response(request, bulkio.import_students)
 
     def get_queryset(self):
         qs = super().get_queryset()
-        # Optimize when expand class
-        expand_param = self.request.query_params.get('expand') or ''
-        if 'class' in expand_param:
-            qs = qs.select_related('class_fk')
-        role = get_role_from_request(self.request)
-        if role in ('admin', 'manager'):
+        principal = get_principal(self.request)
+        if principal.is_manager:
             return qs
-        # Try resolve profile for id/email
-        claims = (self.request.auth or {}).get('claims') if isinstance(self.request.auth, dict) else None
-        sub = claims.get('sub') if claims else None
-        email = (claims.get('email') or (claims.get('user_metadata', {}) if claims else {}).get('email')) if claims else None
-        profile = None
-        if sub:
-            profile = Profile.objects.filter(id=sub).only('id', 'email', 'role').first()
-        if not profile and email:
-            profile = Profile.objects.filter(email=email).only('id', 'email', 'role').first()
-        if role == 'teacher' and profile:
-            teacher_class_ids = Class.objects.filter(teacher_id=profile.id).values_list('id', flat=True)
-            return qs.filter(class_fk_id__in=Subquery(teacher_class_ids))
-        if role == 'student' and (profile or email or sub):
+        if principal.role == 'teacher' and principal.profile:
+            return qs.filter(class_fk_id__in=principal.teacher_class_ids)
+        if principal.role == 'student' and principal.student_lookup:
             # Prefer user_id match; fallback to email
-            if sub:
-                return qs.filter(user_id=sub)
-            student_email = profile.email if profile else email
-            return qs.filter(email=student_email)
+            return qs.filter(**principal.student_lookup)
         # Unknown role: deny by default
         return qs.none()
 
-class ClassViewSet(viewsets.ModelViewSet):
+
+class ClassViewSet(ConditionalGetMixin, ExpandMixin, SparseFieldsetMixin, CsvExportMixin, viewsets.ModelViewSet):
     queryset = Class.objects.filter(is_active=True)
     serializer_class = ClassSerializer
     permission_classes = [IsTeacherOrReadOnly]
@@ -119,131 +116,103 @@ class ClassViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'grade']
     ordering_fields = ['name', 'grade', 'created_at']
     ordering = ['name']
+    expand_relations = {'teacher': Relation('teacher_id', TEACHER)}
+    conditional_actions = ('list', 'retrieve', 'students')
+    etag_tables = ('classes', 'students')
+    export_filename = 'classes_export.csv'
+    export_columns = [(name, name) for name in
+                      ('id', 'name', 'grade', 'description', 'max_students', 'teacher_id', 'academic_year_id',
+                       'is_active')]
 
+    @cache_response('classes.list')
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        expand_param = request.query_params.get('expand') or ''
-        expand = set([e.strip() for e in expand_param.split(',') if e.strip()])
-        if not expand:
-            return response
-        data = response.data
-        items = data['results'] if isinstance(data, dict) and 'results' in data else data
-        if not isinstance(items, list):
-            return response
-        if 'teacher' in expand:
-            teacher_ids = {str(it.get('teacher_id')) for it in items if it.get('teacher_id')}
-            t_map = {str(p['id']): p for p in Profile.objects.filter(id__in=teacher_ids).values('id','email','full_name')}
-            for it in items:
-                it['teacher'] = t_map.get(str(it.get('teacher_id')))
-        response.data = data
-        return response
+        return super().list(request, *args, **kwargs)
+
+    @cached_property
+    def with_counts(self):
+        # ?with=counts on list/retrieve: enrolment and today's attendance per class
+        return (self.action in ('list', 'retrieve')
+                and 'counts' in parse_field_list(self.request.query_params.get('with')))
+
+    @cached_property
+    def counts_day(self):
+        return timezone.localdate()
+
+    def get_etag_tables(self):
+        tables = super().get_etag_tables()
+        return sorted(set(tables) | {'attendance'}) if self.with_counts else tables
+
+    def get_etag_variant(self):
+        # Today's counts roll over at midnight without any write
+        return self.counts_day.isoformat() if self.with_counts else ''
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['counts_day'] = self.counts_day
+        return context
 
     @action(detail=False, methods=['get'], url_path='export')
     def export(self, request):
-        qs = self.get_queryset()
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="classes_export.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['id','name','grade','description','max_students','teacher_id','academic_year_id','is_active'])
-        for row in qs.values_list('id','name','grade','description','max_students','teacher_id','academic_year_id','is_active'):
-            writer.writerow(row)
-        return response
+        return self.export_response(request.query_params)
 
     @action(detail=False, methods=['post'], url_path='import')
     def import_csv(self, request):
-        file = request.FILES.get('file')
-        if not file:
-            return Response({'detail': 'Thiếu file CSV (multipart/form-data, field name: file).'}, status=400)
-        try:
-            decoded_lines = file.read().decode('utf-8').splitlines()
-        except UnicodeDecodeError:
-            return Response({'detail': 'File phải là CSV với encoding UTF-8.'}, status=400)
-        reader = csv.DictReader(decoded_lines)
-        rows = []
-        for r in reader:
-            name = (r.get('name') or '').strip()
-            if not name:
-                continue
-            grade = (r.get('grade') or '').strip() or None
-            description = (r.get('description') or '').strip() or None
-            max_students_val = r.get('max_students')
-            try:
-                max_students = int(max_students_val) if max_students_val not in (None, '') else None
-            except ValueError:
-                max_students = None
-            teacher_id = (r.get('teacher_id') or '').strip() or None
-            academic_year_id = (r.get('academic_year_id') or '').strip() or None
-            is_active = (r.get('is_active', 'true').strip().lower() == 'true')
-            rows.append(Class(
-                id=uuid.uuid4(),
-                name=name,
-                grade=grade,
-                description=description,
-                max_students=max_students,
-                teacher_id=teacher_id,
-                academic_year_id=academic_year_id,
-                is_active=is_active,
-            ))
-        created = 0
-        if rows:
-            Class.objects.bulk_create(rows, ignore_conflicts=True)
-            created = len(rows)
-        return Response({'created': created})
-
-    @action(detail=True, methods=['get'], url_path='students')
+        return import_response(request, imports.import_classes)
+
+    # The roster runs the student list pipeline: ?fields=, ?search=, ?ordering=. It is
+    # the whole class (a plain list, as it always was) unless ?page= or ?page_size=
+    # asks for a page, which also carries the enrolment meta.
+    @action(detail=True, methods=['get'], url_path='students', serializer_class=StudentSerializer,
+            filter_backends=[filters.OrderingFilter, StudentSearchFilter],
+            ordering_fields=StudentViewSet.ordering_fields, ordering=['full_name', 'student_code'],
+            pagination_class=StandardPagination, sparse_actions=('students',), expand_relations={})
     def students(self, request, pk=None):
-        # Return students of this class respecting role restrictions
-        base_qs = self.get_queryset()
-        cls = base_qs.filter(pk=pk).first()
+        # Scope check (get_queryset only holds the caller's classes) and the
+        # enrolment figures come from one aggregated query
+        cls = (enrollment.annotate_counts(self.get_queryset().filter(pk=pk), attendance=False)
+               .values('max_students', 'student_count').first())
         if not cls:
             return Response({'detail': 'Not found.'}, status=404)
-        role = get_role_from_request(request)
-        if role == 'teacher':
-            # ensure teacher owns this class
-            claims = (request.auth or {}).get('claims') if isinstance(request.auth, dict) else None
-            sub = claims.get('sub') if claims else None
-            email = (claims.get('email') or (claims.get('user_metadata', {}) if claims else {}).get('email')) if claims else None
-            profile = None
-            if sub:
-                profile = Profile.objects.filter(id=sub).only('id').first()
-            if not profile and email:
-                profile = Profile.objects.filter(email=email).only('id').first()
-            if not profile or cls.teacher_id != profile.id:
-                return Response({'detail': 'Forbidden.'}, status=403)
-        elif role not in ('admin', 'manager', 'student'):
-            return Response({'detail': 'Forbidden.'}, status=403)
-        # Query students
-        students_qs = Student.objects.filter(class_fk_id=pk)
-        data = StudentSerializer(students_qs, many=True).data
-        return Response(data)
+        meta = {
+            'enrolled': cls['student_count'],
+            'max_students': cls['max_students'],
+            'available': None if cls['max_students'] is None else max(cls['max_students'] - cls['student_count'], 0),
+        }
+        queryset = self.filter_queryset(Student.objects.filter(class_fk_id=pk))
+        paginate = not {'page', 'page_size'}.isdisjoint(request.query_params)
+        fast = ValuesSerializer.for_serializer(StudentSerializer, self.get_sparse_fields())
+        if fast is not None:
+            rows = fast.values(queryset, order_columns(queryset))
+            page = self.paginate_queryset(rows) if paginate else None
+            data = fast.serialize(page if page is not None else rows)
+        else:
+            page = self.paginate_queryset(queryset) if paginate else None
+            data = self.get_serializer(page if page is not None else queryset, many=True).data
+        if page is None:
+            return Response(data)
+        response = self.get_paginated_response(data)
+        response.data['meta'] = meta
+        return response
 
     def get_queryset(self):
         qs = super().get_queryset()
-        role = get_role_from_request(self.request)
-        if role in ('admin', 'manager'):
-            return qs
-        claims = (self.request.auth or {}).get('claims') if isinstance(self.request.auth, dict) else None
-        sub = claims.get('sub') if claims else None
-        email = (claims.get('email') or (claims.get('user_metadata', {}) if claims else {}).get('email')) if claims else None
-        profile = None
-        if sub:
-            profile = Profile.objects.filter(id=sub).only('id', 'email', 'role').first()
-        if not profile and email:
-            profile = Profile.objects.filter(email=email).only('id', 'email', 'role').first()
-        if role == 'teacher' and profile:
-            return qs.filter(teacher_id=profile.id)
-        if role == 'student' and (sub or email):
+        principal = get_principal(self.request)
+        if principal.is_manager:
+            scoped = qs
+        elif principal.role == 'teacher' and principal.profile:
+            scoped = qs.filter(teacher_id=principal.profile_id)
+        elif principal.role == 'student' and principal.student_lookup:
             # Classes that have at least one student belonging to this user
-            stu_qs = Student.objects.all()
-            if sub:
-                stu_qs = stu_qs.filter(user_id=sub)
-            elif email:
-                stu_qs = stu_qs.filter(email=email)
-            student_class_ids = stu_qs.values_list('class_fk_id', flat=True)
-            return qs.filter(id__in=Subquery(student_class_ids))
-        return qs.none()
+            scoped = qs.filter(id__in=principal.student_class_ids)
+        else:
+            return qs.none()
+        if self.with_counts:
+            return enrollment.annotate_counts(scoped, self.counts_day)
+        return scoped
+
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ConditionalGetMixin, ExpandMixin, FastListMixin, SparseFieldsetMixin, KeysetOptInMixin,
+                        CsvExportMixin, viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [IsTeacherOrReadOnly]
@@ -251,32 +220,14 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     search_fields = ['status', 'notes']
     ordering_fields = ['date', 'created_at']
     ordering = ['-date']
-
-    def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        expand_param = request.query_params.get('expand') or ''
-        expand = set([e.strip() for e in expand_param.split(',') if e.strip()])
-        if not expand:
-            return response
-        data = response.data
-        items = data['results'] if isinstance(data, dict) and 'results' in data else data
-        if not isinstance(items, list):
-            return response
-        student_ids = {str(it.get('student_id')) for it in items if it.get('student_id')}
-        class_ids = {str(it.get('class_id')) for it in items if it.get('class_id')}
-        s_map = {}
-        c_map = {}
-        if 'student' in expand and student_ids:
-            s_map = {str(s['id']): s for s in Student.objects.filter(id__in=student_ids).values('id', 'full_name', 'student_code', 'email')}
-        if 'class' in expand and class_ids:
-            c_map = {str(c['id']): c for c in Class.objects.filter(id__in=class_ids).values('id', 'name', 'grade')}
-        for it in items:
-            if 'student' in expand:
-                it['student'] = s_map.get(str(it.get('student_id')))
-            if 'class' in expand:
-                it['class'] = c_map.get(str(it.get('class_id')))
-        response.data = data
-        return response
+    keyset_ordering = ['-date', '-created_at', '-id']
+    expand_relations = {'student': Relation('student_id', STUDENT), 'class': Relation('class_id', CLASS)}
+    conditional_actions = ('list', 'retrieve', 'reports', 'reports_timeseries', 'reports_export')
+    etag_tables = ('attendance', 'students', 'classes')
+    export_filename = 'attendance_export.csv'
+    export_columns = [('date', 'date'), ('class_id', 'class_fk_id'), ('student_id', 'student_fk_id'),
+                      ('status', 'status'), ('notes', 'notes')]
+    export_filters = ('class_id', 'start_date', 'end_date', 'status')
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -291,6 +242,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=201, headers=headers)
 
     @action(detail=False, methods=['get'], url_path='reports')
+    @cache_response('attendance.reports')
     def reports(self, request):
         # Summary report
         qs = self.get_queryset()
@@ -321,6 +273,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'], url_path='reports/timeseries')
+    @cache_response('attendance.reports_timeseries')
     def reports_timeseries(self, request):
         from datetime import timedelta
         qs = self.get_queryset()
@@ -361,51 +314,33 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='reports/export')
     def reports_export(self, request):
         # CSV export of raw records within filters
+        return self.export_response(request.query_params)
+
+    def export_queryset(self, params):
         qs = self.get_queryset()
-        class_id = request.query_params.get('class_id')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
+        class_id = params.get('class_id')
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
         if class_id:
             qs = qs.filter(class_fk_id=class_id)
         if start_date:
             qs = qs.filter(date__gte=start_date)
         if end_date:
             qs = qs.filter(date__lte=end_date)
-        status = request.query_params.get('status')
+        status = params.get('status')
         if status:
             qs = qs.filter(status=status)
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="attendance_export.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['date', 'class_id', 'student_id', 'status', 'notes'])
-        for rec in qs.values_list('date', 'class_fk_id', 'student_fk_id', 'status', 'notes'):
-            writer.writerow(rec)
-        return response
+        return qs
 
     def get_queryset(self):
         qs = super().get_queryset()
         # Role-based restriction
-        role = get_role_from_request(self.request)
-        claims = (self.request.auth or {}).get('claims') if isinstance(self.request.auth, dict) else None
-        sub = claims.get('sub') if claims else None
-        email = (claims.get('email') or (claims.get('user_metadata', {}) if claims else {}).get('email')) if claims else None
-        profile = None
-        if sub:
-            profile = Profile.objects.filter(id=sub).only('id', 'email', 'role').first()
-        if not profile and email:
-            profile = Profile.objects.filter(email=email).only('id', 'email', 'role').first()
-        if role == 'teacher' and profile:
-            teacher_class_ids = Class.objects.filter(teacher_id=profile.id).values_list('id', flat=True)
-            qs = qs.filter(class_fk_id__in=Subquery(teacher_class_ids))
-        elif role == 'student' and (sub or email):
-            stu_qs = Student.objects.all()
-            if sub:
-                stu_qs = stu_qs.filter(user_id=sub)
-            elif email:
-                stu_qs = stu_qs.filter(email=email)
-            student_ids = stu_qs.values_list('id', flat=True)
-            qs = qs.filter(student_fk_id__in=Subquery(student_ids))
-        elif role in ('admin', 'manager'):
+        principal = get_principal(self.request)
+        if principal.role == 'teacher' and principal.profile:
+            qs = qs.filter(class_fk_id__in=principal.teacher_class_ids)
+        elif principal.role == 'student' and principal.student_lookup:
+            qs = qs.filter(student_fk_id__in=principal.student_ids)
+        elif principal.is_manager:
             pass
         else:
             qs = qs.none()
@@ -423,9 +358,51 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             qs = qs.filter(date=date)
         if status:
             qs = qs.filter(status=status)
-
-        # Optimize when expanding related entities
-        expand_param = self.request.query_params.get('expand') or ''
-        if 'student' in expand_param or 'class' in expand_param:
-            qs = qs.select_related('student_fk', 'class_fk')
         return qs
+
+
+class ExportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """Background CSV exports: POST {kind, ...export filters}, poll GET /{id}/, then /{id}/download/."""
+    serializer_class = ExportJobSerializer
+    export_viewsets = {'students': StudentViewSet, 'classes': ClassViewSet, 'attendance': AttendanceViewSet}
+
+    def get_queryset(self):
+        scope = get_principal(self.request).scope_key
+        if scope is None:
+            return ExportJob.objects.none()
+        return ExportJob.objects.filter(scope=scope)
+
+    def create(self, request, *args, **kwargs):
+        kind = request.data.get('kind')
+        if kind not in self.export_viewsets:
+            return Response({'detail': f'kind phải là một trong: {", ".join(self.export_viewsets)}.'}, status=400)
+        principal = get_principal(request)
+        if principal.scope_key is None:
+            return Response({'detail': 'Forbidden.'}, status=403)
+        # Same rows as the synchronous export action of that viewset
+        source = self.export_viewsets[kind](request=request, format_kwarg=None, args=(), kwargs={}, action='export')
+        params = {name: str(request.data[name]) for name in source.export_filters
+                  if request.data.get(name) not in (None, '')}
+        fingerprint = jobs.fingerprint(kind, params, principal.scope_key, source.etag_tables)
+        job = jobs.find_reusable(fingerprint)
+        if job is not None:
+            return Response(self.get_serializer(job).data, status=200)
+        job = ExportJob.objects.create(kind=kind, params=params, scope=principal.scope_key, fingerprint=fingerprint,
+                                       created_by=principal.sub, file_name=source.export_filename)
+        header, fields = zip(*source.export_columns)
+        jobs.submit(job, list(header), source.export_queryset(params), list(fields))
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=202)
+
+    def retrieve(self, request, *args, **kwargs):
+        job = jobs.mark_if_stale(self.get_object())
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        job = jobs.mark_if_stale(self.get_object())
+        path = jobs.artifact_path(job)
+        if job.status != 'done' or not path.exists():
+            return Response({'detail': 'Export chưa hoàn tất.', 'status': job.status}, status=409)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.file_name, content_type='text/csv')
@@ -1,21 +1,311 @@
+import hashlib
 import json
+import logging
+import random
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
 import requests
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router
 from django.utils.functional import cached_property
 from rest_framework import authentication, exceptions
-from jwt import PyJWKClient, decode as jwt_decode, InvalidTokenError
+from jwt import PyJWKSet, decode as jwt_decode, get_unverified_header, InvalidTokenError, PyJWTError
 import os
 
+logger = logging.getLogger(__name__)
+
 SUPABASE_PROJECT_URL = os.getenv('SUPABASE_URL') or os.getenv('SUPABASE_PROJECT_URL')
 JWKS_URL = os.getenv('SUPABASE_JWKS_URL') or (f"{SUPABASE_PROJECT_URL}/auth/v1/jwks" if SUPABASE_PROJECT_URL else None)
 
-_jwks_client_cache = {
-    'client': None,
-    'fetched_at': 0,
-}
+# Optional local JWKS JSON used to start workers warm (and to run fully offline)
+JWKS_FILE = os.getenv('SUPABASE_JWKS_FILE')
+JWKS_REFRESH_INTERVAL = int(os.getenv('SUPABASE_JWKS_REFRESH_INTERVAL', '600'))
+JWKS_REFRESH_JITTER = float(os.getenv('SUPABASE_JWKS_REFRESH_JITTER', '0.1'))
+# Unknown kids trigger a background refresh at most this often
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv('SUPABASE_JWKS_MIN_REFRESH_INTERVAL', '30'))
+JWKS_FETCH_TIMEOUT = float(os.getenv('SUPABASE_JWKS_FETCH_TIMEOUT', '5'))
+
+
+class JWKSKeyStore:
+    """Signing keys indexed by ``kid``, refreshed by a background thread.
+
+    Keys are served stale while a refresh is in flight or after a failed fetch, so
+    the request path never calls the JWKS endpoint. The only wait is a cold worker
+    with no bootstrap file, which blocks once until the first fetch lands.
+    """
+
+    def __init__(self, url: Optional[str], bootstrap_file: Optional[str] = None,
+                 refresh_interval: int = JWKS_REFRESH_INTERVAL, jitter: float = JWKS_REFRESH_JITTER,
+                 min_refresh_interval: int = JWKS_MIN_REFRESH_INTERVAL, timeout: float = JWKS_FETCH_TIMEOUT):
+        self.url = url
+        self.bootstrap_file = bootstrap_file
+        self.refresh_interval = refresh_interval
+        self.jitter = jitter
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.fetched_at = 0.0
+        self.last_attempt_at = 0.0
+        self.refresh_count = 0
+        self.failure_count = 0
+        self._keys = {}
+        self._loaded = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._bootstrapped = False
+
+    @property
+    def configured(self) -> bool:
+        # Keys handed to load_jwks() directly (no URL, no file) are enough to verify tokens
+        return bool(self.url or self.bootstrap_file or self._keys)
+
+    def load_jwks(self, data: dict) -> int:
+        """Replace the key set from a JWKS document; returns the number of keys."""
+        jwk_set = PyJWKSet.from_dict(data)
+        keys = {key.key_id: key for key in jwk_set.keys}
+        self._keys = keys  # single assignment: readers see the old or the new map
+        self.fetched_at = time.time()
+        self._loaded.set()
+        return len(keys)
+
+    def bootstrap(self) -> bool:
+        if self._bootstrapped:
+            return self._loaded.is_set()
+        self._bootstrapped = True
+        if not self.bootstrap_file:
+            return False
+        try:
+            with open(self.bootstrap_file, encoding='utf-8') as fh:
+                self.load_jwks(json.load(fh))
+            return True
+        except (OSError, ValueError, PyJWTError) as e:
+            logger.warning('Could not load JWKS bootstrap file %s: %s', self.bootstrap_file, e)
+            return False
+
+    def refresh(self) -> bool:
+        """Fetch the JWKS endpoint; keeps the current keys if the fetch fails."""
+        if not self.url:
+            return False
+        if not self._refresh_lock.acquire(blocking=False):
+            return False  # another refresh is already in flight
+        try:
+            self.last_attempt_at = time.time()
+            resp = requests.get(self.url, timeout=self.timeout)
+            resp.raise_for_status()
+            self.load_jwks(resp.json())
+            self.refresh_count += 1
+            return True
+        except (requests.RequestException, ValueError, PyJWTError) as e:
+            self.failure_count += 1
+            logger.warning('JWKS refresh from %s failed: %s', self.url, e)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def next_interval(self) -> float:
+        spread = self.refresh_interval * self.jitter
+        return max(1.0, self.refresh_interval + random.uniform(-spread, spread))
+
+    def start(self) -> None:
+        if self._thread is not None or not self.url:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='jwks-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+        self._thread = None
+
+    def request_refresh(self) -> None:
+        """Ask the background thread for an early refresh (rate limited)."""
+        if time.time() - self.last_attempt_at >= self.min_refresh_interval:
+            self._wake.set()
+
+    def _run(self) -> None:
+        # Refresh immediately unless the bootstrap file already provided keys
+        wait = self.next_interval() if self._loaded.is_set() else 0
+        while not self._stop.is_set():
+            self._wake.wait(wait)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.refresh()
+            wait = self.next_interval()
+
+    def get_signing_key(self, kid: Optional[str]):
+        """Return the key for ``kid`` without touching the network (None if unknown)."""
+        self.bootstrap()
+        self.start()
+        if not self._loaded.is_set() and self.url:
+            self._loaded.wait(self.timeout)
+        keys = self._keys
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        key = keys.get(kid)
+        if key is None:
+            self.request_refresh()
+        return key
+
+    def stats(self) -> dict:
+        return {
+            'kids': sorted(k for k in self._keys if k),
+            'fetched_at': self.fetched_at,
+            'refreshes': self.refresh_count,
+            'failures': self.failure_count,
+        }
+
+
+jwks_key_store = JWKSKeyStore(JWKS_URL, bootstrap_file=JWKS_FILE)
+
+# Verified-claims cache: the frontend re-sends the same bearer token on every call,
+# so the RS256 check only needs to run once per token (until exp or max age).
+JWT_CACHE_SIZE = int(os.getenv('SUPABASE_JWT_CACHE_SIZE', '1024'))
+JWT_CACHE_MAX_AGE = int(os.getenv('SUPABASE_JWT_CACHE_MAX_AGE', '300'))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified JWT claims keyed by the SHA-256 digest of the token.
+
+    An entry expires at the token's ``exp`` claim or ``max_age`` seconds after it
+    was stored, whichever comes first. ``maxsize=0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int = JWT_CACHE_SIZE, max_age: int = JWT_CACHE_MAX_AGE):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> (expires_at, claims)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str, now: Optional[float] = None) -> Optional[dict]:
+        if self.maxsize <= 0:
+            return None
+        key = self.key_for(token)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, claims: dict, now: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        now = time.time() if now is None else now
+        expires_at = now + self.max_age
+        exp = claims.get('exp')
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+verified_token_cache = VerifiedTokenCache()
+
+# Supabase username -> local auth_user row (id and flags). The row is written on
+# first sight only; afterwards the user is rebuilt from the cached fields without
+# touching the database. Saving or deleting the row drops its cache entry
+# (core_app.signals); other workers' in-process entries expire after
+# USER_MAP_TIMEOUT seconds.
+USER_MAP_SIZE = int(os.getenv('SUPABASE_USER_MAP_SIZE', '4096'))
+USER_MAP_TIMEOUT = int(os.getenv('SUPABASE_USER_MAP_TIMEOUT', '60'))
+USER_CACHE_TIMEOUT = int(os.getenv('SUPABASE_USER_CACHE_TIMEOUT', '86400'))
+# auth_user fields the rebuilt user carries
+USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+_local_users = OrderedDict()  # username -> (expires_at, fields)
+_local_users_lock = threading.Lock()
+
+
+def _user_cache_key(username: str) -> str:
+    return 'supabase_user_row:' + hashlib.sha1(username.encode('utf-8')).hexdigest()
+
+
+def _remember_user(username: str, fields: dict) -> None:
+    with _local_users_lock:
+        _local_users[username] = (time.monotonic() + USER_MAP_TIMEOUT, fields)
+        _local_users.move_to_end(username)
+        while len(_local_users) > USER_MAP_SIZE:
+            _local_users.popitem(last=False)
+
+
+def forget_local_users() -> None:
+    """Drop the in-process username map (the shared cache entries expire on their own)."""
+    with _local_users_lock:
+        _local_users.clear()
+
+
+def forget_local_user(username: str) -> None:
+    """Drop the cached row of ``username`` (its auth_user row changed or was deleted)."""
+    cache.delete(_user_cache_key(username))
+    with _local_users_lock:
+        _local_users.pop(username, None)
+
+
+def resolve_local_user(username: str, email: Optional[str]) -> User:
+    """Return the Django user for a Supabase identity, hitting the DB only on first sight."""
+    entry = _local_users.get(username)
+    fields = entry[1] if entry is not None and entry[0] > time.monotonic() else None
+    if fields is None:
+        fields = cache.get(_user_cache_key(username))
+        if fields is None:
+            user, _ = User.objects.get_or_create(username=username, defaults={
+                'email': email or '',
+                'is_active': True,
+            })
+            fields = {name: getattr(user, name) for name in USER_FIELDS}
+            cache.set(_user_cache_key(username), fields, USER_CACHE_TIMEOUT)
+        _remember_user(username, fields)
+    user = User(username=username, email=email or '', **fields)
+    user._state.adding = False
+    user._state.db = router.db_for_read(User)
+    return user
+
 
 class SupabaseAuthentication(authentication.BaseAuthentication):
     """DRF authentication class validating Supabase JWT via JWKS.
@@ -45,33 +335,31 @@ class SupabaseAuthentication(authentication.BaseAuthentication):
         if not username:
             raise exceptions.AuthenticationFailed('Invalid token payload (missing subject/email).')
 
-        user, _ = User.objects.get_or_create(username=username, defaults={
-            'email': email or '',
-            'is_active': True,
-        })
+        user = resolve_local_user(username, email)
         # Return token info including claims so permissions can read role
         return (user, {'token': token, 'claims': payload})
 
     def _verify_token(self, token: str) -> dict:
-        if not JWKS_URL:
-            raise exceptions.AuthenticationFailed('SUPABASE_URL or SUPABASE_JWKS_URL not configured.')
+        if not jwks_key_store.configured:
+            raise exceptions.AuthenticationFailed(
+                'SUPABASE_URL, SUPABASE_JWKS_URL or SUPABASE_JWKS_FILE not configured.')
 
-        # Cache PyJWKClient for 10 minutes
-        now = time.time()
-        client = _jwks_client_cache['client']
-        if not client or now - _jwks_client_cache['fetched_at'] > 600:
-            client = PyJWKClient(JWKS_URL)
-            _jwks_client_cache['client'] = client
-            _jwks_client_cache['fetched_at'] = now
+        cached = verified_token_cache.get(token)
+        if cached is not None:
+            return cached
 
         try:
-            signing_key = client.get_signing_key_from_jwt(token)
+            kid = get_unverified_header(token).get('kid')
+            signing_key = jwks_key_store.get_signing_key(kid)
+            if signing_key is None:
+                raise exceptions.AuthenticationFailed('Invalid token: unknown signing key.')
             payload = jwt_decode(
                 token,
                 signing_key.key,
                 algorithms=['RS256'],
                 options={'verify_aud': False}  # Supabase default audience varies
             )
+            verified_token_cache.set(token, payload)
             return payload
         except InvalidTokenError as e:
             raise exceptions.AuthenticationFailed(f'Invalid token: {str(e)}')
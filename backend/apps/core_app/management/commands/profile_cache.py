@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core_app import profile_cache
+
+
+class Command(BaseCommand):
+    help = 'Show role/profile cache statistics or invalidate cached profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'invalidate'])
+        parser.add_argument('--id', dest='profile_id', help='Profile id (Supabase auth user id)')
+        parser.add_argument('--email', help='Profile email')
+        parser.add_argument('--all', action='store_true', help='Drop every cached profile')
+        parser.add_argument('--reset-stats', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        if options['action'] == 'stats':
+            for name, value in profile_cache.stats().items():
+                self.stdout.write(f'{name}: {value}')
+            if options['reset_stats']:
+                profile_cache.reset_stats()
+            return
+        if options['all']:
+            profile_cache.invalidate_all()
+            self.stdout.write('Invalidated all cached profiles.')
+            return
+        if not options['profile_id'] and not options['email']:
+            raise CommandError('Pass --id, --email or --all.')
+        dropped = profile_cache.invalidate_profile(options['profile_id'], options['email'])
+        self.stdout.write(f'Invalidated {dropped} cache key(s).')
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:15
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('email', models.EmailField(db_index=True, max_length=254, unique=True)),
+                ('full_name', models.CharField(max_length=255)),
+                ('role', models.CharField(db_index=True, max_length=32)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'profiles',
+            },
+        ),
+    ]
@@ -0,0 +1,161 @@
+import hashlib
+import uuid
+from collections import namedtuple
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Profile
+
+ProfileInfo = namedtuple('ProfileInfo', ['id', 'email', 'role'])
+
+# Cached value for "no such profile"; kept for PROFILE_CACHE_NEGATIVE_TIMEOUT only
+_MISSING = 'missing'
+_NAMESPACE_KEY = 'profile:ns'
+_STAT_NAMES = ('hits', 'misses', 'negative_hits', 'invalidations')
+
+
+def _timeout():
+    return getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300)
+
+
+def _negative_timeout():
+    return getattr(settings, 'PROFILE_CACHE_NEGATIVE_TIMEOUT', 30)
+
+
+def _namespace() -> int:
+    # Bumping the namespace drops every entry at once (management command --all)
+    ns = cache.get(_NAMESPACE_KEY)
+    if ns is None:
+        cache.add(_NAMESPACE_KEY, 1, None)
+        ns = cache.get(_NAMESPACE_KEY) or 1
+    return ns
+
+
+def _id_key(ns, profile_id) -> str:
+    return f'profile:{ns}:id:{profile_id}'
+
+
+def _email_key(ns, email) -> str:
+    return f'profile:{ns}:email:' + hashlib.sha1(email.strip().lower().encode('utf-8')).hexdigest()
+
+
+def _count(name: str, delta: int = 1) -> None:
+    key = f'profile:stats:{name}'
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def _as_uuid(value) -> Optional[uuid.UUID]:
+    if not value:
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _decode(value) -> Optional[ProfileInfo]:
+    return ProfileInfo(*value) if value and value != _MISSING else None
+
+
+def lookup_profile(sub=None, email=None) -> Optional[ProfileInfo]:
+    """Resolve (id, email, role) for a Supabase identity, preferring ``sub`` over ``email``.
+
+    Served from Django's cache when possible; a miss costs one query against
+    ``profiles`` and caches both the positive and the negative outcome.
+    """
+    sub_uuid = _as_uuid(sub)
+    if not sub_uuid and not email:
+        return None
+    ns = _namespace()
+    keys = {}
+    if sub_uuid:
+        keys['id'] = _id_key(ns, sub_uuid)
+    if email:
+        keys['email'] = _email_key(ns, email)
+    cached = cache.get_many(list(keys.values()))
+    by_id = cached.get(keys.get('id'))
+    by_email = cached.get(keys.get('email'))
+    if _decode(by_id):
+        _count('hits')
+        return _decode(by_id)
+    id_settled = 'id' not in keys or by_id == _MISSING
+    if id_settled and _decode(by_email):
+        _count('hits')
+        return _decode(by_email)
+    if id_settled and ('email' not in keys or by_email == _MISSING):
+        _count('negative_hits')
+        return None
+
+    _count('misses')
+    lookup = Q()
+    if sub_uuid:
+        lookup |= Q(id=sub_uuid)
+    if email:
+        lookup |= Q(email=email)
+    try:
+        rows = list(Profile.objects.filter(lookup).values_list('id', 'email', 'role')[:2])
+    except Exception:
+        return None
+    found_by_id = next((ProfileInfo(*r) for r in rows if r[0] == sub_uuid), None)
+    found_by_email = next((ProfileInfo(*r) for r in rows if email and r[1] == email), None)
+    to_set = {}
+    negative = []
+    for kind, found in (('id', found_by_id), ('email', found_by_email)):
+        if kind not in keys:
+            continue
+        if found:
+            to_set[keys[kind]] = tuple(found)
+        else:
+            negative.append(keys[kind])
+    if to_set:
+        cache.set_many(to_set, _timeout())
+    if negative:
+        cache.set_many({key: _MISSING for key in negative}, _negative_timeout())
+    return found_by_id or found_by_email
+
+
+def invalidate_profile(profile_id=None, email=None) -> int:
+    """Drop cached entries for a profile id and/or email; returns the number of keys dropped."""
+    ns = _namespace()
+    keys = []
+    profile_uuid = _as_uuid(profile_id)
+    if profile_uuid:
+        keys.append(_id_key(ns, profile_uuid))
+        # The cached row remembers the previous email, which may have changed since
+        previous = _decode(cache.get(keys[0]))
+        if previous and previous.email:
+            keys.append(_email_key(ns, previous.email))
+    if email:
+        keys.append(_email_key(ns, email))
+    if not keys:
+        return 0
+    cache.delete_many(keys)
+    _count('invalidations')
+    return len(keys)
+
+
+def invalidate_all() -> None:
+    try:
+        cache.incr(_NAMESPACE_KEY)
+    except ValueError:
+        cache.set(_NAMESPACE_KEY, 2, None)
+    _count('invalidations')
+
+
+def stats() -> dict:
+    values = cache.get_many([f'profile:stats:{name}' for name in _STAT_NAMES])
+    result = {name: values.get(f'profile:stats:{name}', 0) for name in _STAT_NAMES}
+    lookups = result['hits'] + result['negative_hits'] + result['misses']
+    result['hit_ratio'] = round((result['hits'] + result['negative_hits']) / lookups, 4) if lookups else 0.0
+    return result
+
+
+def reset_stats() -> None:
+    cache.delete_many([f'profile:stats:{name}' for name in _STAT_NAMES])
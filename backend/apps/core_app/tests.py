@@ -1,3 +1,264 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+import uuid
+from io import StringIO
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from jwt.algorithms import RSAAlgorithm
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from apps.core_app import auth, profile_cache
+from apps.core_app.auth import JWKSKeyStore, SupabaseAuthentication, VerifiedTokenCache
+from apps.core_app.models import Profile
+
+
+def make_token(private_key, kid='test-kid', **claims):
+    payload = {'sub': 'a1b2c3', 'email': 'teacher@example.com', 'exp': int(time.time()) + 3600}
+    payload.update(claims)
+    return jwt.encode(payload, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+def make_jwks(private_key, kid='test-kid'):
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({'kid': kid, 'alg': 'RS256', 'use': 'sig'})
+    return {'keys': [jwk]}
+
+
+def write_jwks_file(testcase, jwks):
+    fh = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    json.dump(jwks, fh)
+    fh.close()
+    testcase.addCleanup(os.unlink, fh.name)
+    return fh.name
+
+
+class StubJWKSServer:
+    """Serves a mutable JWKS document on localhost and counts fetches."""
+
+    def __init__(self, jwks):
+        self.jwks = jwks
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                body = json.dumps(stub.jwks).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/auth/v1/jwks'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class VerifiedTokenCacheTests(TestCase):
+    def test_hit_and_miss_counters(self):
+        cache = VerifiedTokenCache(maxsize=4, max_age=60)
+        self.assertIsNone(cache.get('tok'))
+        cache.set('tok', {'sub': 'x', 'exp': time.time() + 120})
+        self.assertEqual(cache.get('tok'), {'sub': 'x', 'exp': mock.ANY})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_entry_expires_at_token_exp_before_max_age(self):
+        cache = VerifiedTokenCache(maxsize=4, max_age=600)
+        cache.set('tok', {'exp': 1000}, now=990)
+        self.assertIsNotNone(cache.get('tok', now=999))
+        self.assertIsNone(cache.get('tok', now=1000))
+
+    def test_entry_expires_at_max_age_before_token_exp(self):
+        cache = VerifiedTokenCache(maxsize=4, max_age=30)
+        cache.set('tok', {'exp': 10_000}, now=1000)
+        self.assertIsNone(cache.get('tok', now=1031))
+
+    def test_lru_eviction_is_bounded(self):
+        cache = VerifiedTokenCache(maxsize=2, max_age=60)
+        for tok in ('a', 'b', 'c'):
+            cache.set(tok, {})
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+class SupabaseAuthenticationCacheTests(TestCase):
+    def setUp(self):
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.factory = APIRequestFactory()
+        auth.verified_token_cache.clear()
+        self.addCleanup(auth.verified_token_cache.clear)
+        auth.forget_local_users()
+        self.addCleanup(auth.forget_local_users)
+        cache.clear()
+
+    def test_repeated_token_skips_signature_lookup(self):
+        token = make_token(self.private_key)
+        store = JWKSKeyStore(None, bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        with mock.patch.object(auth, 'jwks_key_store', store), \
+                mock.patch.object(store, 'get_signing_key', wraps=store.get_signing_key) as lookup:
+            for _ in range(3):
+                request = self.factory.get('/api/health/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                _, info = SupabaseAuthentication().authenticate(request)
+                self.assertEqual(info['claims']['sub'], 'a1b2c3')
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(auth.verified_token_cache.stats()['hits'], 2)
+
+    def test_local_user_written_on_first_sight_only(self):
+        token = make_token(self.private_key)
+        store = JWKSKeyStore(None, bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        with mock.patch.object(auth, 'jwks_key_store', store):
+            request = self.factory.get('/api/health/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            first, _ = SupabaseAuthentication().authenticate(request)
+            with self.assertNumQueries(0):
+                again, _ = SupabaseAuthentication().authenticate(request)
+            # Another worker only shares the Django cache, not the in-process map
+            auth.forget_local_users()
+            with self.assertNumQueries(0):
+                other, _ = SupabaseAuthentication().authenticate(request)
+        self.assertEqual(User.objects.filter(username='teacher@example.com').count(), 1)
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(first.pk, other.pk)
+        self.assertTrue(again.is_authenticated)
+
+    def test_local_user_keeps_flags_and_follows_row_changes(self):
+        token = make_token(self.private_key)
+        store = JWKSKeyStore(None, bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        with mock.patch.object(auth, 'jwks_key_store', store):
+            request = self.factory.get('/api/health/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            first, _ = SupabaseAuthentication().authenticate(request)
+            row = User.objects.get(pk=first.pk)
+            row.is_staff = row.is_superuser = True
+            row.save()
+            staff, _ = SupabaseAuthentication().authenticate(request)
+            self.assertEqual((staff.pk, staff.is_staff, staff.is_superuser), (first.pk, True, True))
+            self.assertEqual(staff._state.db, 'default')
+            # A deleted row is created again instead of being referred to
+            row.delete()
+            fresh, _ = SupabaseAuthentication().authenticate(request)
+        self.assertNotEqual(fresh.pk, first.pk)
+        self.assertFalse(fresh.is_staff)
+        self.assertTrue(User.objects.filter(pk=fresh.pk).exists())
+
+
+class JWKSKeyStoreTests(TestCase):
+    def setUp(self):
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        auth.verified_token_cache.clear()
+        self.addCleanup(auth.verified_token_cache.clear)
+
+    def test_bootstrap_file_serves_keys_without_network(self):
+        store = JWKSKeyStore(None, bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        with mock.patch.object(auth.requests, 'get') as http_get:
+            self.assertIsNotNone(store.get_signing_key('test-kid'))
+            self.assertIsNone(store.get_signing_key('other-kid'))
+        http_get.assert_not_called()
+
+    def test_background_refresh_picks_up_rotated_key(self):
+        server = StubJWKSServer(make_jwks(self.private_key))
+        self.addCleanup(server.close)
+        store = JWKSKeyStore(server.url, refresh_interval=3600, min_refresh_interval=0, timeout=2)
+        self.addCleanup(store.stop)
+        self.assertIsNotNone(store.get_signing_key('test-kid'))
+
+        rotated = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        server.jwks = make_jwks(rotated, kid='rotated-kid')
+        # Unknown kid: rejected immediately, refresh happens in the background
+        self.assertIsNone(store.get_signing_key('rotated-kid'))
+        deadline = time.time() + 2
+        while store.get_signing_key('rotated-kid') is None and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertIsNotNone(store.get_signing_key('rotated-kid'))
+        self.assertGreaterEqual(server.hits, 2)
+
+    def test_failed_refresh_keeps_stale_keys(self):
+        store = JWKSKeyStore('http://127.0.0.1:9/jwks', timeout=0.2,
+                             bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        store.bootstrap()
+        with self.assertLogs('apps.core_app.auth', 'WARNING'):
+            self.assertFalse(store.refresh())
+        self.assertIsNotNone(store.get_signing_key('test-kid'))
+        self.assertEqual(store.stats()['failures'], 1)
+        store.stop()
+
+    def test_keys_loaded_directly_configure_the_store(self):
+        store = JWKSKeyStore(None)
+        self.assertFalse(store.configured)
+        store.load_jwks(make_jwks(self.private_key))
+        self.assertTrue(store.configured)
+        request = APIRequestFactory().get('/api/health/', HTTP_AUTHORIZATION=f'Bearer {make_token(self.private_key)}')
+        with mock.patch.object(auth, 'jwks_key_store', store), mock.patch.object(auth.requests, 'get') as http_get:
+            _, info = SupabaseAuthentication().authenticate(request)
+        self.assertEqual(info['claims']['sub'], 'a1b2c3')
+        http_get.assert_not_called()
+
+    def test_unknown_kid_is_rejected(self):
+        other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        store = JWKSKeyStore(None, bootstrap_file=write_jwks_file(self, make_jwks(self.private_key)))
+        with mock.patch.object(auth, 'jwks_key_store', store):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                SupabaseAuthentication()._verify_token(make_token(other, kid='forged-kid'))
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profile = Profile.objects.create(id=uuid.uuid4(), email='gv@example.com', full_name='GV', role='teacher')
+
+    def test_second_lookup_is_served_from_cache(self):
+        with self.assertNumQueries(1):
+            first = profile_cache.lookup_profile(str(self.profile.id), self.profile.email)
+        with self.assertNumQueries(0):
+            again = profile_cache.lookup_profile(str(self.profile.id), self.profile.email)
+        self.assertEqual(first, again)
+        self.assertEqual(again.role, 'teacher')
+        stats = profile_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_save_invalidates_cached_role(self):
+        profile_cache.lookup_profile(str(self.profile.id))
+        self.profile.role = 'admin'
+        self.profile.save()
+        self.assertEqual(profile_cache.lookup_profile(str(self.profile.id)).role, 'admin')
+        self.assertGreaterEqual(profile_cache.stats()['invalidations'], 1)
+
+    def test_unknown_user_is_negatively_cached_until_created(self):
+        sub = uuid.uuid4()
+        self.assertIsNone(profile_cache.lookup_profile(str(sub), 'new@example.com'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(profile_cache.lookup_profile(str(sub), 'new@example.com'))
+        self.assertEqual(profile_cache.stats()['negative_hits'], 1)
+        Profile.objects.create(id=sub, email='new@example.com', full_name='HS', role='student')
+        self.assertEqual(profile_cache.lookup_profile(str(sub), 'new@example.com').role, 'student')
 
-# Create your tests here.
+    def test_management_command_invalidates_all(self):
+        profile_cache.lookup_profile(str(self.profile.id))
+        # Simulate an edit made directly in Supabase (no Django signal)
+        Profile.objects.filter(id=self.profile.id).update(role='manager')
+        self.assertEqual(profile_cache.lookup_profile(str(self.profile.id)).role, 'teacher')
+        call_command('profile_cache', 'invalidate', '--all', stdout=StringIO())
+        self.assertEqual(profile_cache.lookup_profile(str(self.profile.id)).role, 'manager')
+        out = StringIO()
+        call_command('profile_cache', 'stats', stdout=out)
+        self.assertIn('hit_ratio', out.getvalue())
@@ -0,0 +1,63 @@
+import os
+import time
+
+from benchutil import setup_django
+
+DB_PATH = setup_django()
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from jwt.algorithms import RSAAlgorithm
+from rest_framework.test import APIRequestFactory
+
+from apps.core_app import auth
+from apps.core_app.views import HealthView
+
+REQUESTS = int(os.getenv('BENCH_REQUESTS', '200'))
+
+
+def make_store_and_token():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+    jwk.update({'kid': 'bench', 'alg': 'RS256', 'use': 'sig'})
+    store = auth.JWKSKeyStore(None)
+    store.load_jwks({'keys': [jwk]})
+    claims = {'sub': '00000000-0000-0000-0000-000000000001', 'email': 'bench@example.com',
+              'exp': int(time.time()) + 3600}
+    return store, jwt.encode(claims, key, algorithm='RS256', headers={'kid': 'bench'})
+
+
+def run(token, cold):
+    factory = APIRequestFactory()
+    view = HealthView.as_view()
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        if cold:
+            # Pre-change behaviour: every request resolves the user through the ORM
+            auth.forget_local_users()
+            cache.clear()
+        request = factory.get('/api/health/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+        assert response.status_code == 200 and response.data['authenticated']
+        queries += len(ctx.captured_queries)
+    elapsed = time.perf_counter() - start
+    return queries / REQUESTS, elapsed / REQUESTS * 1000
+
+
+def main():
+    store, token = make_store_and_token()
+    auth.jwks_key_store = store
+    for label, cold in (('get_or_create per request', True), ('cached user mapping', False)):
+        q, ms = run(token, cold)
+        print(f'{label:28s} queries/request={q:.2f} ms/request={ms:.3f}')
+    print('jwt_cache', auth.verified_token_cache.stats())
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
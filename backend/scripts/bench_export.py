@@ -0,0 +1,66 @@
+import csv
+import os
+import time
+import tracemalloc
+
+from benchutil import seed_school, setup_django
+
+DB_PATH = setup_django()
+
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.api.models import Attendance
+from apps.api.views import AttendanceViewSet
+
+CLASSES = int(os.getenv('BENCH_CLASSES', '1000'))
+STUDENTS_PER_CLASS = int(os.getenv('BENCH_STUDENTS_PER_CLASS', '30'))
+ATTENDANCE = int(os.getenv('BENCH_ATTENDANCE', '1000000'))
+
+COLUMNS = ('date', 'class_fk_id', 'student_fk_id', 'status', 'notes')
+HEADER = ['date', 'class_id', 'student_id', 'status', 'notes']
+
+
+def buffered():
+    # What reports_export did before: every row written into one HttpResponse
+    response = HttpResponse(content_type='text/csv')
+    writer = csv.writer(response)
+    writer.writerow(HEADER)
+    for rec in Attendance.objects.all().values_list(*COLUMNS):
+        writer.writerow(rec)
+    return [response.content]
+
+
+def streamed():
+    request = APIRequestFactory().get('/api/attendance/reports/export')
+    user = type('U', (), {'is_authenticated': True, 'is_staff': True})()
+    force_authenticate(request, user=user, token={'claims': {'role': 'admin'}})
+    return AttendanceViewSet.as_view({'get': 'reports_export'})(request).streaming_content
+
+
+def measure(label, produce):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first = None
+    total = 0
+    for chunk in produce():
+        if first is None:
+            first = time.perf_counter() - started
+        total += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<10} {total / 2**20:8.1f} MiB  first byte {first:7.3f} s  total {elapsed:7.2f} s  '
+          f'peak memory {peak / 2**20:8.1f} MiB')
+
+
+def main():
+    seed_school(classes=CLASSES, students_per_class=STUDENTS_PER_CLASS, attendance_rows=ATTENDANCE)
+    print(f'attendance rows={Attendance.objects.count()}')
+    measure('buffered', buffered)
+    measure('streamed', streamed)
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
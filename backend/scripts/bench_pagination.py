@@ -0,0 +1,59 @@
+import os
+
+from benchutil import seed_school, setup_django, timed
+
+DB_PATH = setup_django()
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.api.models import Attendance
+from apps.api.pagination import KeysetPagination
+from apps.api.views import AttendanceViewSet
+
+ATTENDANCE = int(os.getenv('BENCH_ATTENDANCE', '1000000'))
+PAGE_SIZE = 20
+DEPTHS = [int(d) for d in os.getenv('BENCH_DEPTHS', '1,100,1000,10000').split(',')]
+REPEAT = int(os.getenv('BENCH_REPEAT', '5'))
+
+
+def request(url):
+    factory = APIRequestFactory()
+    req = factory.get(url)
+    user = type('U', (), {'is_authenticated': True, 'is_staff': True})()
+    force_authenticate(req, user=user, token={'claims': {'role': 'admin'}})
+    response = AttendanceViewSet.as_view({'get': 'list'})(req)
+    assert response.status_code == 200, response.data
+    return response
+
+
+def cursor_for_page(page):
+    # Cursor pointing just before the first row of ``page`` (what the client would hold)
+    if page == 1:
+        return '/api/attendance/?pagination=cursor'
+    boundary = Attendance.objects.order_by('-date', '-created_at', 'id')[(page - 1) * PAGE_SIZE - 1]
+    paginator = KeysetPagination()
+    paginator.request = APIRequestFactory().get('/api/attendance/')
+    paginator.keys = [('date', True), ('created_at', True), ('pk', False)]
+    paginator.fields = [Attendance._meta.get_field('date'), Attendance._meta.get_field('created_at'),
+                        Attendance._meta.pk]
+    token = paginator.encode_cursor(boundary, reverse=False).split('cursor=')[1]
+    return f'/api/attendance/?cursor={token}'
+
+
+def main():
+    seed_school(classes=1000, attendance_rows=ATTENDANCE)
+    print(f'seeded attendance={Attendance.objects.count()}')
+    print(f'{"page":>8} {"page-number+count":>18} {"page-number, count=false":>25} {"keyset cursor":>14}')
+    for page in DEPTHS:
+        numbered, t_num = timed(lambda: request(f'/api/attendance/?page={page}'), REPEAT)
+        _, t_nocount = timed(lambda: request(f'/api/attendance/?page={page}&count=false'), REPEAT)
+        url = cursor_for_page(page)
+        keyset, t_key = timed(lambda: request(url), REPEAT)
+        # Page-number order only sorts by -date, so ties differ; compare sizes only
+        assert len(numbered.data['results']) == len(keyset.data['results'])
+        print(f'{page:>8} {t_num * 1000:>15.2f} ms {t_nocount * 1000:>22.2f} ms {t_key * 1000:>11.2f} ms')
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import os
+
+from benchutil import seed_school, setup_django, timed
+
+DB_PATH = setup_django()
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.api import renderers
+from apps.api.views import AttendanceViewSet, ClassViewSet, StudentViewSet
+
+CLASSES = int(os.getenv('BENCH_CLASSES', '200'))
+STUDENTS_PER_CLASS = int(os.getenv('BENCH_STUDENTS_PER_CLASS', '50'))
+ATTENDANCE = int(os.getenv('BENCH_ATTENDANCE', '20000'))
+PAGE_SIZE = int(os.getenv('BENCH_PAGE_SIZE', '200'))  # StandardPagination.max_page_size
+REPEAT = int(os.getenv('BENCH_REPEAT', '20'))
+
+ENDPOINTS = [
+    ('students', StudentViewSet, '/api/students/'),
+    ('attendance', AttendanceViewSet, '/api/attendance/'),
+    ('attendance+expand', AttendanceViewSet, '/api/attendance/?expand=student,class'),
+    ('classes+teacher', ClassViewSet, '/api/classes/?expand=teacher'),
+]
+
+factory = APIRequestFactory()
+user = type('U', (), {'is_authenticated': True, 'is_staff': True})()
+
+
+def page_data(viewset, url):
+    sep = '&' if '?' in url else '?'
+    request = factory.get(f'{url}{sep}page_size={PAGE_SIZE}')
+    force_authenticate(request, user=user, token={'claims': {'role': 'admin'}})
+    response = viewset.as_view({'get': 'list'})(request)
+    assert response.status_code == 200, response.data
+    return response.data
+
+
+def main():
+    seed_school(classes=CLASSES, students_per_class=STUDENTS_PER_CLASS, attendance_rows=ATTENDANCE)
+    cache.clear()
+    candidates = [('DRF JSONRenderer', JSONRenderer())]
+    if renderers.orjson is not None:
+        candidates.append(('ORJSONRenderer', renderers.ORJSONRenderer()))
+    if renderers.msgpack is not None:
+        candidates.append(('MessagePackRenderer', renderers.MessagePackRenderer()))
+    print(f'page_size={PAGE_SIZE}')
+    print(f'{"endpoint":<20}' + ''.join(f'{name:>26}' for name, _ in candidates))
+    for label, viewset, url in ENDPOINTS:
+        data = page_data(viewset, url)
+        cells = []
+        for _, renderer in candidates:
+            body, best = timed(lambda: renderer.render(data, renderer.media_type, {}), REPEAT)
+            cells.append(f'{best * 1000:7.2f} ms {len(body) / 1024:8.1f} KiB')
+        print(f'{label:<20}' + ''.join(f'{c:>26}' for c in cells))
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+
+from benchutil import seed_school, setup_django, timed
+
+DB_PATH = setup_django()
+
+from django.core.cache import cache
+from django.db.models import Subquery
+
+from apps.api import scope
+from apps.api.models import Attendance, Class
+
+CLASSES = int(os.getenv('BENCH_CLASSES', '1000'))
+ATTENDANCE = int(os.getenv('BENCH_ATTENDANCE', '1000000'))
+REPEAT = int(os.getenv('BENCH_REPEAT', '20'))
+
+
+def list_page(qs):
+    # What AttendanceViewSet.list does for page 1: COUNT(*) + first 20 rows
+    return qs.count(), list(qs.order_by('-date')[:20].values_list('id', flat=True))
+
+
+def main():
+    teacher_ids = seed_school(classes=CLASSES, attendance_rows=ATTENDANCE)
+    teacher = teacher_ids[0]
+    print(f'seeded classes={CLASSES} attendance={ATTENDANCE}')
+
+    def subquery_scope():
+        class_ids = Class.objects.filter(teacher_id=teacher).values_list('id', flat=True)
+        return list_page(Attendance.objects.filter(class_fk_id__in=Subquery(class_ids)))
+
+    def cached_scope():
+        return list_page(Attendance.objects.filter(class_fk_id__in=scope.teacher_class_ids(teacher)))
+
+    cache.clear()
+    expected, t_sub = timed(subquery_scope, REPEAT)
+    got, t_set = timed(cached_scope, REPEAT)
+    assert expected == got
+    print(f'subquery semi-join   {t_sub * 1000:8.2f} ms/page (count={expected[0]})')
+    print(f'cached IN-list scope {t_set * 1000:8.2f} ms/page')
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import os
+
+from benchutil import seed_school, setup_django, timed
+
+DB_PATH = setup_django()
+
+from django.db.models import Q
+
+from apps.api import search
+from apps.api.models import Student
+
+CLASSES = int(os.getenv('BENCH_CLASSES', '2000'))
+STUDENTS_PER_CLASS = int(os.getenv('BENCH_STUDENTS_PER_CLASS', '50'))
+REPEAT = int(os.getenv('BENCH_REPEAT', '10'))
+QUERIES = os.getenv('BENCH_QUERIES', 'nguyen van hung|Nguyễn Văn Hùng|quynh|SV0012345').split('|')
+
+
+def icontains_page(q):
+    # What SearchFilter over (full_name, student_code, email) did: COUNT(*) + first page
+    qs = Student.objects.filter(Q(full_name__icontains=q) | Q(student_code__icontains=q) | Q(email__icontains=q))
+    return qs.count(), list(qs.order_by('-created_at')[:20].values_list('id', flat=True))
+
+
+def indexed_page(q):
+    qs = search.search(Student.objects.all(), q)
+    return qs.count(), list(qs.order_by('-search_rank', '-pk')[:20].values_list('id', flat=True))
+
+
+def main():
+    seed_school(classes=CLASSES, students_per_class=STUDENTS_PER_CLASS, attendance_rows=0)
+    print(f'seeded students={Student.objects.count()} index={"fts5" if search._has_fts(search.connection) else "like"}')
+    print(f'{"query":<20} {"icontains x3":>22} {"search index":>22}')
+    for q in QUERIES:
+        (n_old, _), t_old = timed(lambda: icontains_page(q), REPEAT)
+        (n_new, _), t_new = timed(lambda: indexed_page(q), REPEAT)
+        print(f'{q:<20} {t_old * 1000:8.2f} ms ({n_old:>6} hits) {t_new * 1000:8.2f} ms ({n_new:>6} hits)')
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import os
+
+from benchutil import seed_school, setup_django, timed
+
+DB_PATH = setup_django()
+
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.api.views import StudentViewSet
+from apps.core_app.models import Profile
+
+CLASSES = int(os.getenv('BENCH_CLASSES', '2000'))
+STUDENTS_PER_CLASS = int(os.getenv('BENCH_STUDENTS_PER_CLASS', '50'))
+REPEAT = int(os.getenv('BENCH_REPEAT', '20'))
+QUERIES = os.getenv('BENCH_QUERIES', 'SV00123|sv0099|ngu|hung|nguyen van h|tran thi').split('|')
+
+factory = APIRequestFactory()
+view = StudentViewSet.as_view({'get': 'suggest'})
+user = type('U', (), {'is_authenticated': True, 'is_staff': False})()
+
+
+def request(q, claims):
+    req = factory.get('/api/students/suggest/', {'q': q, 'limit': 10})
+    force_authenticate(req, user=user, token={'claims': claims})
+    response = view(req)
+    assert response.status_code == 200, response.data
+    return response.data
+
+
+def main():
+    teacher_ids = seed_school(classes=CLASSES, students_per_class=STUDENTS_PER_CLASS, attendance_rows=0)
+    Profile.objects.create(id=teacher_ids[0], email='gv@example.com', full_name='GV', role='teacher')
+    print(f'seeded students={CLASSES * STUDENTS_PER_CLASS}')
+    callers = [('admin', {'role': 'admin'}),
+               ('teacher', {'sub': str(teacher_ids[0])})]
+    cache.clear()
+    print(f'{"q":<12}' + ''.join(f'{name:>22}' for name, _ in callers))
+    for q in QUERIES:
+        cells = []
+        for _, claims in callers:
+            data, best = timed(lambda: request(q, claims), REPEAT)
+            cells.append(f'{best * 1000:8.2f} ms ({len(data):>2} rows)')
+        print(f'{q:<12}' + ''.join(f'{c:>22}' for c in cells))
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
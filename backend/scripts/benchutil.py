@@ -0,0 +1,123 @@
+import os
+import sys
+import tempfile
+import time
+
+# Benchmarks run against a throwaway SQLite database so they never touch real data
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+
+def setup_django(db_path=None):
+    """Point Django at a fresh SQLite file (or ``db_path``) and create the schema."""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='sms_bench_', suffix='.sqlite3')
+        os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path.replace(chr(92), "/")}'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sms_backend.settings')
+    os.environ.setdefault('ALLOWED_HOSTS', 'testserver,localhost')
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    # core_app ships no migrations (profiles lives in Supabase): create it directly
+    from django.db import connection
+
+    from apps.core_app.models import Profile
+
+    if Profile._meta.db_table not in connection.introspection.table_names():
+        with connection.schema_editor() as editor:
+            editor.create_model(Profile)
+    return db_path
+
+
+def timed(fn, repeat=1):
+    """Run ``fn`` ``repeat`` times; returns (last result, best wall time in seconds)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def _insert(cursor, table, columns, rows):
+    placeholders = ', '.join(['%s'] * len(columns))
+    cursor.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})', rows)
+
+
+FAMILY_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ',
+                'Hồ', 'Ngô', 'Dương', 'Lý']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hữu', 'Đức', 'Minh', 'Ngọc', 'Thanh', 'Quốc', 'Gia', 'Bảo']
+GIVEN_NAMES = ['An', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Khánh',
+               'Lan', 'Linh', 'Long', 'Mai', 'Nam', 'Ngân', 'Nhung', 'Phúc', 'Phương', 'Quân', 'Quỳnh', 'Sơn',
+               'Tâm', 'Thảo', 'Trang', 'Trung', 'Tuấn', 'Vy', 'Yến']
+
+
+def student_name(n):
+    """Deterministic Vietnamese full name for student number ``n``."""
+    return (f'{FAMILY_NAMES[n % len(FAMILY_NAMES)]} {MIDDLE_NAMES[(n // 7) % len(MIDDLE_NAMES)]} '
+            f'{GIVEN_NAMES[(n // 3) % len(GIVEN_NAMES)]}')
+
+
+def seed_school(classes=1000, students_per_class=30, attendance_rows=1_000_000, teachers=200, chunk=50_000):
+    """Fill the benchmark database quickly with raw INSERTs (SQLite column formats).
+
+    Returns the generated teacher ids so callers can benchmark a teacher's scope.
+    """
+    import uuid
+    from datetime import date, datetime, timedelta, timezone
+
+    from django.db import connection, transaction
+
+    from apps.api.search import search_document
+
+    teacher_ids = [uuid.uuid4() for _ in range(teachers)]
+    class_rows = []
+    student_rows = []
+    now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    for c in range(classes):
+        class_id = uuid.uuid4()
+        class_rows.append((class_id.hex, f'Lop {c:05d}', str(10 + c % 3), 40, teacher_ids[c % teachers].hex, 1,
+                           now.isoformat(), now.isoformat()))
+        for s in range(students_per_class):
+            n = c * students_per_class + s
+            code, name = f'SV{n:07d}', student_name(n)
+            student_rows.append((uuid.uuid4().hex, code, name, class_id.hex, 1,
+                                 (now + timedelta(seconds=n)).isoformat(), (now + timedelta(seconds=n)).isoformat(),
+                                 search_document(code, name)))
+    with transaction.atomic(), connection.cursor() as cursor:
+        _insert(cursor, 'classes', ['id', 'name', 'grade', 'max_students', 'teacher_id', 'is_active',
+                                    'created_at', 'updated_at'], class_rows)
+        _insert(cursor, 'students', ['id', 'student_code', 'full_name', 'class_id', 'is_active',
+                                     'created_at', 'updated_at', 'search_text'], student_rows)
+        statuses = ('present', 'present', 'present', 'late', 'absent', 'excused')
+        batch = []
+        day = date(2025, 9, 1)
+        written = 0
+        while written < attendance_rows:
+            opened = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=7)
+            for i, st in enumerate(student_rows):
+                if written >= attendance_rows:
+                    break
+                # Roll call is taken class by class: distinct timestamps within the day
+                stamp = (opened + timedelta(milliseconds=i * 20)).isoformat()
+                batch.append((uuid.uuid4().hex, st[0], st[3], day.isoformat(), statuses[(written + i) % 6],
+                              stamp, stamp))
+                written += 1
+                if len(batch) >= chunk:
+                    _insert(cursor, 'attendance', ['id', 'student_id', 'class_id', 'date', 'status',
+                                                   'created_at', 'updated_at'], batch)
+                    batch = []
+            day += timedelta(days=1)
+        if batch:
+            _insert(cursor, 'attendance', ['id', 'student_id', 'class_id', 'date', 'status',
+                                           'created_at', 'updated_at'], batch)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return teacher_ids
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -88,6 +89,57 @@ DATABASES = {
     'default': dj_database_url.parse(os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'), conn_max_age=600, ssl_require=True if 'supabase.co' in os.getenv('DATABASE_URL', '') else False)
 }
 
+# Cache
+# Local memory by default; CACHE_BACKEND=file shares entries between worker processes
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sms-default',
+        }
+    }
+
+# Role/profile cache (sub/email -> profile id, role); unknown users are cached briefly
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', '300'))
+PROFILE_CACHE_NEGATIVE_TIMEOUT = int(os.getenv('PROFILE_CACHE_NEGATIVE_TIMEOUT', '30'))
+
+# Row-level scope sets (teacher -> class ids, student user -> student/class ids)
+SCOPE_CACHE_TIMEOUT = int(os.getenv('SCOPE_CACHE_TIMEOUT', '600'))
+
+# Server-side response cache TTLs in seconds per endpoint (0 disables that endpoint)
+RESPONSE_CACHE_TTLS = {
+    'classes.list': int(os.getenv('RESPONSE_CACHE_TTL_CLASSES', '300')),
+    'attendance.reports': int(os.getenv('RESPONSE_CACHE_TTL_REPORTS', '120')),
+    'attendance.reports_timeseries': int(os.getenv('RESPONSE_CACHE_TTL_REPORTS', '120')),
+}
+
+# CSV exports: rows fetched per database round trip (server-side cursor on Postgres)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+# PostgreSQL COPY for CSV export / student import (false: always the Python path);
+# exports use it with psycopg 3 only (apps.api.bulkio.copy_streams)
+BULK_COPY = os.getenv('BULK_COPY', 'true').lower() == 'true'
+
+# CSV imports: rows written per transaction, and failed rows listed in the report
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '1000'))
+
+# Background export jobs (POST /api/exports/): artifact directory, worker threads,
+# how long an identical request reuses a job, and when a silent job counts as dead
+EXPORT_ROOT = os.getenv('EXPORT_ROOT', str(BASE_DIR / 'exports'))
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+EXPORT_JOB_REUSE_SECONDS = int(os.getenv('EXPORT_JOB_REUSE_SECONDS', '3600'))
+EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', '300'))
+# Run jobs inline in the request (tests, debugging)
+EXPORT_JOBS_EAGER = os.getenv('EXPORT_JOBS_EAGER', 'false').lower() == 'true'
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -98,7 +150,20 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '20')),
+    # orjson-backed JSON (stdlib fallback) first; msgpack only when installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('apps.api.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('apps.api.renderers.MessagePackParser')
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -51,8 +51,8 @@ const AttendancePage = () => {
   const loadStudentsForClass = async (classId) => {
     if (!classId) { setClassStudents([]); return }
     try {
-      const data = await ClassService.getStudentsOfClass(classId)
-      setClassStudents(data || [])
+      const { items } = await ClassService.getStudentsOfClass(classId, { fields: 'id,student_code,full_name' })
+      setClassStudents(items)
     } catch (_) {
       setClassStudents([])
     }
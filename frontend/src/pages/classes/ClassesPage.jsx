@@ -253,7 +253,11 @@ const ClassesPage = () => {
                   <div className="flex items-center justify-between text-sm text-gray-500">
                     <div className="flex items-center space-x-1">
                       <Users className="w-4 h-4" />
-                      <span>Tối đa {cls.max_students} học sinh</span>
+                      <span>
+                        {cls.counts
+                          ? `${cls.counts.students}${cls.max_students ? `/${cls.max_students}` : ''} học sinh`
+                          : `Tối đa ${cls.max_students} học sinh`}
+                      </span>
                     </div>
                     <span className={`px-2 py-1 rounded-full text-xs ${
                       cls.is_active 
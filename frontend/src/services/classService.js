@@ -2,8 +2,11 @@ import api from './apiClient'
 
 export class ClassService {
   static async getAllClasses(options = {}) {
-    const { page = 1, limit = 100 } = options
-    const { data } = await api.get('/classes/', { params: { page, page_size: limit, ordering: 'name' } })
+    const { page = 1, limit = 100, withCounts = false } = options
+    const params = { page, page_size: limit, ordering: 'name' }
+    // counts: { students, available, attendance_today: { date, present, absent, late, excused } }
+    if (withCounts) params.with = 'counts'
+    const { data } = await api.get('/classes/', { params })
     const isPaginated = data && typeof data === 'object' && 'results' in data
     const items = Array.isArray(data) ? data : (data.results ?? [])
     const totalCount = isPaginated ? data.count : items.length
@@ -31,9 +34,33 @@ export class ClassService {
     return { success: true }
   }
 
-  static async getStudentsOfClass(classId) {
-    const { data } = await api.get(`/classes/${classId}/students/`)
-    return data
+  // Roster: { items, totalCount, meta, ... }. Without page/limit the whole class
+  // comes back as one list (meta is only sent with a page).
+  static async getStudentsOfClass(classId, options = {}) {
+    const { page, limit, search = '', ordering, fields } = options
+    const params = {}
+    if (page || limit) {
+      params.page = page || 1
+      params.page_size = limit || 200
+    }
+    if (search) params.search = search
+    if (ordering) params.ordering = ordering
+    if (fields) params.fields = Array.isArray(fields) ? fields.join(',') : fields
+    const { data } = await api.get(`/classes/${classId}/students/`, { params })
+    const isPaginated = data && typeof data === 'object' && 'results' in data
+    const items = Array.isArray(data) ? data : (data.results ?? [])
+    const totalCount = isPaginated && typeof data.count === 'number' ? data.count : items.length
+    const currentPage = params.page || 1
+    const totalPages = isPaginated ? Math.max(1, Math.ceil(totalCount / params.page_size)) : 1
+    return {
+      items,
+      totalCount,
+      meta: data?.meta ?? null,
+      totalPages,
+      currentPage,
+      hasNextPage: currentPage < totalPages,
+      hasPrevPage: currentPage > 1,
+    }
   }
 
   static async exportCsv() {
@@ -371,7 +371,7 @@ export const useClassStore = create((set, get) => ({
       const { ClassService } = await import('../services/classService')
       const page = options.page || get().pagination.currentPage || 1
       const limit = options.limit || get().pagination.limit || 20
-      const result = await ClassService.getAllClasses({ page, limit })
+      const result = await ClassService.getAllClasses({ page, limit, withCounts: true })
       
       set({
         classes: result.items,